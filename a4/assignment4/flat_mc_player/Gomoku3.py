@@ -5,21 +5,28 @@
 from gtp_connection import GtpConnection
 from board_util import GoBoardUtil, EMPTY
 from simple_board import SimpleGoBoard
+from mcts import UCTSearch
+from time_manager import TimeManager
 
 import random
 import numpy as np
+from timeit import default_timer as timer
+
+"""
+How genmove spends its simulations: uct grows a search tree with
+mcts.py, flat gives every legal move the same number of playouts
+"""
+MOVE_SEARCHES = ['uct', 'flat']
 
 def undo(board,move):
-    board.board[move]=EMPTY
-    board.current_player=GoBoardUtil.opponent(board.current_player)
+    board.undo_move_gomoku(move)
 
 def play_move(board, move, color):
     board.play_move_gomoku(move, color)
 
 def game_result(board):
     game_end, winner = board.check_game_end_gomoku()
-    moves = board.get_empty_points()
-    board_full = (len(moves) == 0)
+    board_full = board.is_board_full()
     if game_end:
         #return 1 if winner == board.current_player else -1
         return winner
@@ -32,6 +39,10 @@ class GomokuSimulationPlayer(object):
     For each move do `n_simualtions_per_move` playouts,
     then select the one with best win-rate.
     playout could be either random or rule_based (i.e., uses pre-defined patterns) 
+    move_search is one of MOVE_SEARCHES; uct uses the playouts of
+    mcts.py for playout_policy
+    time_manager gives get_move its deadline, out of the timelimit
+    of gtp_connection
     """
     def __init__(self, n_simualtions_per_move=10, playout_policy='random', board_size=7):
         assert(playout_policy in ['random', 'rule_based'])
@@ -45,6 +56,15 @@ class GomokuSimulationPlayer(object):
         self.name="Gomoku3"
         self.version = 3.0
         self.best_move=None
+        self.move_search='uct'
+        self.time_manager=TimeManager()
+
+    def set_timelimit(self, timelimit=60):
+        self.time_manager.timelimit=timelimit
+
+    def set_move_search(self, move_search='uct'):
+        assert(move_search in MOVE_SEARCHES)
+        self.move_search=move_search
     
     def set_playout_policy(self, playout_policy='random'):
         assert(playout_policy in ['random', 'rule_based'])
@@ -69,8 +89,11 @@ class GomokuSimulationPlayer(object):
         res=game_result(board)
         simulation_moves=[]
         while(res is None):
-            _ , candidate_moves = self.policy_moves(board, board.current_player)
-            playout_move=random.choice(candidate_moves)
+            if self.playout_policy=='random':
+                playout_move=GoBoardUtil.generate_random_move_gomoku(board)
+            else:
+                _ , candidate_moves = self.policy_moves(board, board.current_player)
+                playout_move=random.choice(candidate_moves)
             play_move(board, playout_move, board.current_player)
             simulation_moves.append(playout_move)
             res=game_result(board)
@@ -88,6 +111,9 @@ class GomokuSimulationPlayer(object):
         """
         The genmove function called by gtp_connection
         """
+        deadline = self.time_manager.deadline(board)
+        if self.move_search == 'uct':
+            return self._uct_get_move(board, deadline)
         moves=GoBoardUtil.generate_legal_moves_gomoku(board)
         toplay=board.current_player
         best_result, best_move=-1.1, None
@@ -96,6 +122,9 @@ class GomokuSimulationPlayer(object):
         visits = np.zeros(len(moves))
         while True:
             for i, move in enumerate(moves):
+                # at least one playout, even if the budget is too short
+                if visits[0] > 0 and timer() > deadline:
+                    return best_move
                 play_move(board, move, toplay)
                 res=game_result(board)
                 if res == toplay:
@@ -112,8 +141,22 @@ class GomokuSimulationPlayer(object):
                     best_move=move
                     self.best_move=best_move
                 undo(board, move)
-        assert(best_move is not None)
-        return best_move
+
+    def _uct_get_move(self, board, deadline):
+        """
+        UCT search until deadline, or until the best move is decided,
+        with best_move kept up to date for a genmove stopped by the
+        timelimit
+        """
+        search=UCTSearch(board, self.playout_policy)
+        def keep_best_move(search):
+            self.best_move=search.best_move()
+        # the timelimit is short and the playouts slow, so keep it
+        # after every simulation
+        move=search.run(deadline=deadline, callback=keep_best_move,
+                        callback_interval=1)
+        self.best_move=move
+        return move
 
 def run():
     """
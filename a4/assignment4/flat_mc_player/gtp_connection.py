@@ -14,6 +14,11 @@ import numpy as np
 import re
 import signal
 
+"""
+Seconds solve gets at least, for a timelimit of a second or less
+"""
+SOLVE_MIN_TIME = 0.1
+
 class GtpConnection():
 
     def __init__(self, go_engine, board, debug_mode = False):
@@ -56,9 +61,11 @@ class GtpConnection():
             "solve": self.solve_cmd,
             "list_solve_point": self.list_solve_point_cmd, # below is added for Gomoku3
             "policy": self.set_playout_policy, 
-            "policy_moves": self.display_pattern_moves
+            "policy_moves": self.display_pattern_moves,
+            "move_search": self.move_search_cmd
         }
         self.timelimit=2
+        self.go_engine.set_timelimit(self.timelimit)
 
         # used for argument checking
         # values: (required number of arguments, 
@@ -70,7 +77,8 @@ class GtpConnection():
             "genmove": (1, 'Usage: genmove {w,b}'),
             "play": (2, 'Usage: play {b,w} MOVE'),
             "legal_moves": (1, 'Usage: legal_moves {w,b}'),
-            "policy":(1, 'Usage: set playout policy {random, rule_based}')
+            "policy":(1, 'Usage: set playout policy {random, rule_based}'),
+            "move_search":(1, 'Usage: move_search {uct, flat}')
         }
     
     def set_playout_policy(self, args):
@@ -78,6 +86,17 @@ class GtpConnection():
         self.go_engine.set_playout_policy(playout_policy)
         self.respond()
 
+    def move_search_cmd(self, args):
+        """
+        How genmove spends its simulations: uct or flat
+        """
+        move_search=args[0]
+        if move_search not in ('uct', 'flat'):
+            self.error('Usage: move_search {uct, flat}')
+            return
+        self.go_engine.set_move_search(move_search)
+        self.respond()
+
     def display_pattern_moves(self, args):
         game_end, winner = self.board.check_game_end_gomoku()
         color=self.board.current_player
@@ -87,8 +106,7 @@ class GtpConnection():
             else:
                 self.respond("")
             return
-        all_moves=self.board.get_empty_points()
-        if len(all_moves) == 0:
+        if self.board.is_board_full():
             self.respond('')
             return
         moveType, moves=self.go_engine.policy_moves(self.board, color)
@@ -281,7 +299,16 @@ class GtpConnection():
             self.respond('{}'.format(str(e)))
 
     def timelimit_cmd(self, args):
-        self.timelimit = args[0]
+        """
+        Seconds per move for genmove and solve
+        """
+        try:
+            timelimit = float(args[0])
+        except ValueError:
+            self.error('Usage: timelimit FLOAT')
+            return
+        self.timelimit = timelimit
+        self.go_engine.set_timelimit(timelimit)
         self.respond('')
 
     def handler(self, signum, fram):
@@ -291,10 +318,11 @@ class GtpConnection():
     def solve_cmd(self, args):
         try:
             self.sboard = self.board.copy()
-            signal.alarm(int(self.timelimit)-1)
+            signal.setitimer(signal.ITIMER_REAL,
+                             max(self.timelimit - 1, SOLVE_MIN_TIME))
             winner,move = self.board.solve()
             self.board = self.sboard
-            signal.alarm(0)
+            signal.setitimer(signal.ITIMER_REAL, 0)
             if move != "NoMove":
                 if move == None:
                     self.respond('{} {}'.format(winner, self.board._point_to_coord(move)))
@@ -318,18 +346,19 @@ class GtpConnection():
             else:
                 self.respond("resign")
             return
-        moves = self.board.get_empty_points()
-        board_is_full = (len(moves) == 0)
+        board_is_full = self.board.is_board_full()
         if board_is_full:
             self.respond("pass")
             return
         move=None
         try:
-            signal.alarm(int(self.timelimit))
+            # the engine stops at the deadline of its time manager, the
+            # alarm at the full timelimit is only a backstop
+            signal.setitimer(signal.ITIMER_REAL, float(self.timelimit))
             self.sboard = self.board.copy()
             move = self.go_engine.get_move(self.board, color)
             self.board=self.sboard
-            signal.alarm(0)
+            signal.setitimer(signal.ITIMER_REAL, 0)
         except Exception as e:
             move=self.go_engine.best_move
 
@@ -400,8 +429,7 @@ class GtpConnection():
     
     def gogui_rules_final_result_cmd(self, args):
         game_end, winner = self.board.check_game_end_gomoku()
-        moves = self.board.get_empty_points()
-        board_full = (len(moves) == 0)
+        board_full = self.board.is_board_full()
         if board_full and not game_end:
             self.respond("draw")
             return
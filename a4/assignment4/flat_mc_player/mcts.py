@@ -0,0 +1,313 @@
+"""
+mcts.py
+
+Monte Carlo tree search with UCT for genmove.
+
+Each simulation walks down the tree from the root, picking the child
+with the best UCB1 value, adds the children of the leaf it reaches,
+plays one playout from there and backs the result up the path. So the
+playouts go where the moves look best, instead of the same number to
+every legal move as in flat Monte Carlo.
+
+The tree is kept in parallel arrays indexed by node, and the children
+of a node are one block of consecutive nodes, added at once when the
+node is expanded. A node only has children for the candidate moves:
+the wins, or the blocks of the opponent's wins, if there are any,
+else the empty points near a stone.
+
+This is the part of gomoku4/mcts.py that Gomoku3 uses, without the
+RAVE statistics and the tree kept between moves. Each player directory
+is a standalone program that imports its modules by name from its own
+directory, as it does board_util and simple_board, so Gomoku3 can not
+import the modules of gomoku4, which need the board of gomoku4.
+"""
+
+import random
+import numpy as np
+from array import array
+from math import log, sqrt
+from timeit import default_timer as timer
+from board_util import GoBoardUtil, EMPTY, BLACK, WHITE
+
+"""
+Exploration constant of UCB1, for results scored 1 win, 0.5 draw, 0 loss
+"""
+EXPLORATION = 0.7
+
+"""
+Distance from the nearest stone of the moves expanded in the tree,
+counted in king moves
+"""
+CANDIDATE_DISTANCE = 1
+
+"""
+Pattern classes of board.get_pattern_moves that leave no other move:
+a win, and the block of a win of the opponent
+"""
+FORCED_CLASSES = (0, 1)
+
+"""
+Marks a node that is not expanded yet
+"""
+NO_CHILDREN = -1
+
+class NodeStore(object):
+    """
+    The nodes of a search tree, in arrays indexed by node.
+    move: the move that leads to the node, from its parent
+    parent: the parent node, -1 for the root
+    first_child: the first node of the block of children,
+                 NO_CHILDREN if the node is not expanded
+    num_children: the number of children
+    visits: the number of simulations through the node
+    wins: the results of those simulations for the player who played
+          move, 1 for a win and 0.5 for a draw
+    """
+    def __init__(self):
+        self.move = array('i')
+        self.parent = array('i')
+        self.first_child = array('i')
+        self.num_children = array('i')
+        self.visits = array('i')
+        self.wins = array('d')
+
+    def add(self, move, parent):
+        node = len(self.move)
+        self.move.append(move)
+        self.parent.append(parent)
+        self.first_child.append(NO_CHILDREN)
+        self.num_children.append(0)
+        self.visits.append(0)
+        self.wins.append(0.0)
+        return node
+
+    def add_children(self, node, moves):
+        """
+        Add one child of node for each of moves, as one block
+        """
+        first = len(self.move)
+        count = len(moves)
+        self.move.extend(moves)
+        self.parent.extend([node] * count)
+        self.first_child.extend([NO_CHILDREN] * count)
+        self.num_children.extend([0] * count)
+        self.visits.extend([0] * count)
+        self.wins.extend([0.0] * count)
+        self.first_child[node] = first
+        self.num_children[node] = count
+
+    def children(self, node):
+        first = self.first_child[node]
+        if first == NO_CHILDREN:
+            return range(0)
+        return range(first, first + self.num_children[node])
+
+def random_playout(board, rng=random):
+    """
+    Play uniformly random moves to the end of the game and undo them.
+    Returns the winner, or EMPTY for a draw.
+    """
+    played = []
+    try:
+        while True:
+            game_end, winner = board.check_game_end_gomoku()
+            if game_end:
+                return winner
+            empty = board.empty_points
+            if not empty:
+                return EMPTY
+            move = empty[int(rng.random() * len(empty))]
+            board.play_move_gomoku(move, board.current_player)
+            played.append(move)
+    finally:
+        for move in reversed(played):
+            board.undo_move_gomoku(move)
+
+def rule_based_playout(board, rng=random):
+    """
+    Same as random_playout, but plays the moves of
+    board.get_pattern_moves when there are any
+    """
+    played = []
+    try:
+        while True:
+            game_end, winner = board.check_game_end_gomoku()
+            if game_end:
+                return winner
+            empty = board.empty_points
+            if not empty:
+                return EMPTY
+            ret = board.get_pattern_moves()
+            if ret is not None:
+                moves = ret[1]
+                move = moves[int(rng.random() * len(moves))]
+            else:
+                move = empty[int(rng.random() * len(empty))]
+            board.play_move_gomoku(move, board.current_player)
+            played.append(move)
+    finally:
+        for move in reversed(played):
+            board.undo_move_gomoku(move)
+
+PLAYOUTS = {'random': random_playout, 'rule_based': rule_based_playout}
+
+class UCTSearch(object):
+    """
+    A UCT search from the position of board for the player to move.
+    The board is changed during simulate, and given back unchanged.
+    playout: 'random' or 'rule_based'
+    """
+    def __init__(self, board, playout='random', exploration=EXPLORATION,
+                 distance=CANDIDATE_DISTANCE, rng=random):
+        self.board = board
+        self.playout = PLAYOUTS[playout]
+        self.exploration = exploration
+        self.distance = distance
+        self.rng = rng
+        self.color = board.current_player
+        self.nodes = NodeStore()
+        self.nodes.add(0, -1)
+
+    def candidates(self, board):
+        """
+        The moves of the children of a node with the position of board
+        """
+        ret = board.get_pattern_moves()
+        if ret is not None and ret[0] in FORCED_CLASSES:
+            return sorted(ret[1])
+        empty = sorted(board.empty_points)
+        if board.stone_count == 0:
+            return empty
+        size, NS, d = board.size, board.NS, self.distance
+        near = set()
+        for stone in np.nonzero((board.board == BLACK) |
+                                (board.board == WHITE))[0]:
+            row, col = divmod(int(stone), NS)
+            for r in range(max(row - d, 1), min(row + d, size) + 1):
+                for c in range(max(col - d, 1), min(col + d, size) + 1):
+                    near.add(r * NS + c)
+        return [move for move in empty if move in near]
+
+    def _select(self, node):
+        """
+        The child of node with the best UCB1 value, the first child
+        with no visits if there is one
+        """
+        nodes = self.nodes
+        visits, wins = nodes.visits, nodes.wins
+        first = nodes.first_child[node]
+        scale = self.exploration * sqrt(log(max(visits[node], 1)))
+        best, best_value = first, -1.0
+        for child in range(first, first + nodes.num_children[node]):
+            n = visits[child]
+            if n == 0:
+                return child
+            value = wins[child] / n + scale / sqrt(n)
+            if value > best_value:
+                best, best_value = child, value
+        return best
+
+    def simulate(self):
+        """
+        One simulation: select, expand, play out and back up
+        """
+        board = self.board
+        nodes = self.nodes
+        node = 0
+        path = [0]
+        try:
+            while True:
+                game_end, winner = board.check_game_end_gomoku()
+                if game_end:
+                    break
+                if board.is_board_full():
+                    winner = EMPTY
+                    break
+                if nodes.first_child[node] == NO_CHILDREN:
+                    if nodes.visits[node] == 0 and node != 0:
+                        winner = self.playout(board, self.rng)
+                        break
+                    nodes.add_children(node, self.candidates(board))
+                node = self._select(node)
+                board.play_move_gomoku(nodes.move[node], board.current_player)
+                path.append(node)
+        finally:
+            for node in reversed(path[1:]):
+                board.undo_move_gomoku(nodes.move[node])
+        self._backup(path, winner)
+
+    def _backup(self, path, winner):
+        nodes = self.nodes
+        visits, wins = nodes.visits, nodes.wins
+        # the player who played the move into path[i]
+        mover = self.color if len(path) % 2 == 0 \
+                else GoBoardUtil.opponent(self.color)
+        for node in reversed(path):
+            visits[node] += 1
+            if winner == mover:
+                wins[node] += 1.0
+            elif winner == EMPTY:
+                wins[node] += 0.5
+            mover = GoBoardUtil.opponent(mover)
+
+    def run(self, deadline=None, callback=None, callback_interval=100):
+        """
+        Simulate until deadline, a timer() value, until the simulations
+        left until deadline, at the speed so far, can not change the
+        best move, or until it turns out the root has only one move.
+        Without deadline, simulate until stopped by an exception, such
+        as the alarm of genmove.
+        callback is called with the search every callback_interval
+        simulations.
+        """
+        start = timer()
+        count = 0
+        while True:
+            now = timer()
+            # at least one simulation, even if the deadline has passed
+            if deadline is not None and now > deadline and count > 0:
+                break
+            if count % callback_interval == 0 and count > 0:
+                if callback is not None:
+                    callback(self)
+                if deadline is not None and \
+                        self.decided(count * (deadline - now) / (now - start)):
+                    break
+            self.simulate()
+            count += 1
+            if self.nodes.num_children[0] == 1:
+                break
+        return self.best_move()
+
+    def decided(self, simulations_left):
+        """
+        Whether the most visited root move stays the most visited
+        whatever root moves get simulations_left more simulations
+        """
+        nodes = self.nodes
+        visits = sorted((nodes.visits[child] for child in nodes.children(0)),
+                        reverse=True)
+        if len(visits) < 2:
+            return True
+        return visits[0] - visits[1] > simulations_left
+
+    def root_stats(self):
+        """
+        (move, visits, win rate) of each root move, most visited first
+        """
+        nodes = self.nodes
+        stats = [(nodes.move[child], nodes.visits[child],
+                  nodes.wins[child] / nodes.visits[child]
+                  if nodes.visits[child] else 0.0)
+                 for child in nodes.children(0)]
+        stats.sort(key=lambda stat: (-stat[1], -stat[2], stat[0]))
+        return stats
+
+    def best_move(self):
+        """
+        The most visited root move, None before the first simulation
+        """
+        stats = self.root_stats()
+        if not stats:
+            return None
+        return stats[0][0]
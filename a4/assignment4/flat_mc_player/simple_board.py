@@ -10,6 +10,7 @@ The board uses a 1-dimensional representation with padding
 """
 
 import numpy as np
+import random
 from board_util import GoBoardUtil, BLACK, WHITE, EMPTY, BORDER, \
                        PASS, is_black_white, coord_to_point, where1d, \
                        MAXSIZE, NULLPOINT
@@ -64,6 +65,15 @@ class SimpleGoBoard(object):
         """
         return where1d(self.board == EMPTY)
 
+    def random_empty_point(self):
+        """
+        Return:
+            A random empty point, or PASS if the board is full
+        """
+        if not self.empty_points:
+            return PASS
+        return random.choice(self.empty_points)
+
     def __init__(self, size):
         """
         Creates a Go board of given size
@@ -82,10 +92,14 @@ class SimpleGoBoard(object):
         self.WE = 1
         self.ko_recapture = None
         self.current_player = BLACK
+        self.winner = None
+        self.win_point = None
+        self.stone_count = 0
         self.maxpoint = size * size + 3 * (size + 1)
         self.board = np.full(self.maxpoint, BORDER, dtype = np.int32)
         self.liberty_of = np.full(self.maxpoint, NULLPOINT, dtype = np.int32)
         self._initialize_empty_points(self.board)
+        self._initialize_empty_index()
         self._initialize_neighbors()
 
     def copy(self):
@@ -94,6 +108,11 @@ class SimpleGoBoard(object):
         assert b.WE == self.WE
         b.ko_recapture = self.ko_recapture
         b.current_player = self.current_player
+        b.winner = self.winner
+        b.win_point = self.win_point
+        b.stone_count = self.stone_count
+        b.empty_points = list(self.empty_points)
+        b.empty_position = list(self.empty_position)
         assert b.maxpoint == self.maxpoint
         b.board = np.copy(self.board)
         return b
@@ -114,6 +133,44 @@ class SimpleGoBoard(object):
             start = self.row_start(row)
             board[start : start + self.size] = EMPTY
 
+    def _initialize_empty_index(self):
+        """
+        Besides the board array, the empty points are kept in the list
+        empty_points, and empty_position[point] is the index of point
+        in that list. play_move_gomoku swap-removes the point from the
+        list and undo_move_gomoku puts it back in the same place,
+        so both are O(1) and do not look at the rest of the board.
+        """
+        self.empty_points = [int(point) for point in self.get_empty_points()]
+        self.empty_position = [NULLPOINT] * self.maxpoint
+        for i, point in enumerate(self.empty_points):
+            self.empty_position[point] = i
+
+    def _remove_empty_point(self, point):
+        """
+        Swap-remove point from empty_points. empty_position[point]
+        keeps its old index, for _restore_empty_point.
+        """
+        i = self.empty_position[point]
+        last = self.empty_points.pop()
+        if last != point:
+            self.empty_points[i] = last
+            self.empty_position[last] = i
+
+    def _restore_empty_point(self, point):
+        """
+        Undo _remove_empty_point. Only correct when points are restored
+        in the reverse order they were removed.
+        """
+        i = self.empty_position[point]
+        if i == len(self.empty_points):
+            self.empty_points.append(point)
+        else:
+            moved = self.empty_points[i]
+            self.empty_position[moved] = len(self.empty_points)
+            self.empty_points.append(moved)
+            self.empty_points[i] = point
+
     def _on_board_neighbors(self, point):
         nbs = []
         for nb in self._neighbors(point):
@@ -348,8 +405,27 @@ class SimpleGoBoard(object):
         if self.board[point] != EMPTY:
             return False
         self.board[point] = color
+        self.stone_count += 1
+        self._remove_empty_point(point)
+        if self.winner is None and self.point_check_game_end_gomoku(point):
+            self.winner = color
+            self.win_point = point
         self.current_player = GoBoardUtil.opponent(color)
         return True
+
+    def undo_move_gomoku(self, point):
+        """
+            Take back the stone on point, for the game of gomoku.
+            Moves must be undone in the reverse order they were played.
+            """
+        assert is_black_white(self.board[point])
+        self.board[point] = EMPTY
+        self.stone_count -= 1
+        self._restore_empty_point(int(point))
+        if point == self.win_point:
+            self.winner = None
+            self.win_point = None
+        self.current_player = GoBoardUtil.opponent(self.current_player)
         
     def _point_direction_check_connect_gomoko(self, point, shift):
         """
@@ -368,6 +444,8 @@ class SimpleGoBoard(object):
                     break
             else:
                 break
+        if count == 5:
+            return True
         d = -d
         p = point
         while True:
@@ -406,20 +484,19 @@ class SimpleGoBoard(object):
     def check_game_end_gomoku(self):
         """
             Check if the game ends for the game of Gomoku.
+            The winner is kept up to date by play_move_gomoku and
+            undo_move_gomoku, so this does not scan the board.
             """
-        white_points = where1d(self.board == WHITE)
-        black_points = where1d(self.board == BLACK)
-        
-        for point in white_points:
-            if self.point_check_game_end_gomoku(point):
-                return True, WHITE
-    
-        for point in black_points:
-            if self.point_check_game_end_gomoku(point):
-                return True, BLACK
-
+        if self.winner is not None:
+            return True, self.winner
         return False, None
 
+    def is_board_full(self):
+        """
+            Check if there are no empty points left on the board.
+            """
+        return self.stone_count == self.size * self.size
+
     def solve(self):
         result, move, drawMove = alphabeta.solve(self)
         if move=="First":
@@ -0,0 +1,84 @@
+"""
+time_manager.py
+
+How long genmove thinks: a budget for each move out of the GTP
+timelimit, and the deadline the search stops at.
+
+The budget depends on the position. A forced move, a win or the block
+of a win, gets almost no time. A position with a four to make or to
+stop gets all of it, a quiet one a bit less. Late in the game, with
+few empty points left, the budget shrinks with the number of moves
+still to choose from. Part of the timelimit is always kept free to
+send the move before the timelimit runs out.
+
+Deadlines are timer() values, from a monotonic clock.
+
+This is the part of gomoku4/time_manager.py that Gomoku3 uses, kept in
+this directory for the same reason as mcts.py: each player is a
+standalone program that only imports modules from its own directory.
+"""
+
+from timeit import default_timer as timer
+
+"""
+Seconds of the timelimit kept free to answer genmove, and the largest
+part of the timelimit that is used at all
+"""
+TIME_MARGIN = 0.5
+MAX_FRACTION = 0.9
+
+"""
+Part of the usable time for a forced move, a quiet position and a
+position with a four to make or to stop
+"""
+FORCED_FRACTION = 0.02
+QUIET_FRACTION = 0.75
+CRITICAL_FRACTION = 1.0
+
+"""
+Pattern classes of board.get_pattern_moves: a win or the block of a
+win leave no choice, an open four or its block are critical
+"""
+FORCED_CLASSES = (0, 1)
+
+"""
+Once more than this part of the board is filled, the budget shrinks
+with the empty points, down to LATE_FRACTION
+"""
+LATE_GAME = 0.5
+LATE_FRACTION = 0.25
+
+class TimeManager(object):
+    """
+    The time budget of each move, for a timelimit in seconds per move
+    """
+    def __init__(self, timelimit=60):
+        self.timelimit = timelimit
+
+    def usable_time(self):
+        return max(0.0, min(self.timelimit - TIME_MARGIN,
+                            self.timelimit * MAX_FRACTION))
+
+    def budget(self, board):
+        """
+        Seconds to think about the move of the player to move on board
+        """
+        ret = board.get_pattern_moves()
+        if ret is not None and ret[0] in FORCED_CLASSES:
+            criticality = FORCED_FRACTION
+        elif ret is not None:
+            criticality = CRITICAL_FRACTION
+        else:
+            criticality = QUIET_FRACTION
+        filled = board.stone_count / (board.size * board.size)
+        if filled <= LATE_GAME:
+            phase = 1.0
+        else:
+            phase = max(LATE_FRACTION, (1.0 - filled) / (1.0 - LATE_GAME))
+        return self.usable_time() * criticality * phase
+
+    def deadline(self, board):
+        """
+        The timer() value the search for the move on board must stop at
+        """
+        return timer() + self.budget(board)
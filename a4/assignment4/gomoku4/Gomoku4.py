@@ -8,21 +8,31 @@ from timeit import default_timer as timer
 from gtp_connection import GtpConnection, point_to_coord
 from board_util import GoBoardUtil, EMPTY, coord_to_point
 from simple_board import SimpleGoBoard
-
+from bitboard import BitboardGomokuBoard
+from batch_playout import batch_playouts, playout_scores
+from threat_space import find_threat_win
+from solved_db import lookup_solve, open_db
+from opening_book import OpeningBook
+from time_manager import TimeManager
+from mcts import UCTSearch, AMAFTable, RAVE_EQUIVALENCE
+import parallel_mcts
+
+import sys
 import random
 import numpy as np
 
-def undo(board,move):
-    board.board[move]=EMPTY
-    board.current_player=GoBoardUtil.opponent(board.current_player)
+"""
+How genmove spends its simulations: uct grows a search tree with
+mcts.py, flat gives every legal move the same number of playouts
+"""
+MOVE_SEARCHES = ['uct', 'flat']
 
 def play_move(board, move, color):
     board.play_move_gomoku(move, color)
 
 def game_result(board):
     game_end, winner = board.check_game_end_gomoku()
-    moves = board.get_empty_points()
-    board_full = (len(moves) == 0)
+    board_full = board.is_board_full()
     if game_end:
         #return 1 if winner == board.current_player else -1
         return winner
@@ -30,11 +40,35 @@ def game_result(board):
         return 'draw'
     return None
 
+def immediate_win(board, moves, color):
+    """
+    The first of moves that wins for color at once, or None
+    """
+    for move in moves:
+        with board.try_move(move, color):
+            if game_result(board) == color:
+                return move
+    return None
+
 class GomokuSimulationPlayer(object):
     """
     For each move do `n_simualtions_per_move` playouts,
     then select the one with best win-rate.
     playout could be either random or rule_based (i.e., uses pre-defined patterns) 
+    batch_size > 0 makes get_move evaluate each move with batch_size
+    random playouts from batch_playout.py instead
+    get_move plays the move of the opening book, opening_book.py,
+    in the positions it has
+    move_search is one of MOVE_SEARCHES; uct uses the playouts of
+    mcts.py for playout_policy
+    tree is the UCT search of the last genmove, kept for the next one
+    while the game goes on
+    workers > 1 runs the simulations of get_move in that many processes
+    with parallel_mcts.py, each with the playouts of mcts.py
+    rave blends all-moves-as-first statistics into the choice of move,
+    for uct and flat
+    time_manager gives get_move its deadline, out of the timelimit
+    of gtp_connection
     """
     def __init__(self, n_simualtions_per_move=5, playout_policy='rule_based', board_size=7):
         assert(playout_policy in ['random', 'rule_based'])
@@ -48,7 +82,45 @@ class GomokuSimulationPlayer(object):
         self.name="Gomoku3"
         self.version = 3.0
         self.best_move=None
+        self.batch_size=0
+        self.move_search='uct'
+        self.tree=None
+        self.workers=1
+        self.rave=True
+        self.time_manager=TimeManager()
+        self.book=OpeningBook.load()
+
+    def set_timelimit(self, timelimit=60):
+        self.time_manager.timelimit=timelimit
+
+    def set_rave(self, rave=True):
+        self.rave=rave
+
+    def set_workers(self, workers=1):
+        assert(workers >= 1)
+        self.workers=workers
+
+    def move_played(self, move):
+        """
+        Called by gtp_connection for every move played in the game
+        """
+        if self.tree is not None and not self.tree.advance(move):
+            self.tree=None
+
+    def new_game(self):
+        """
+        Called by gtp_connection when the board is cleared
+        """
+        self.tree=None
+
+    def set_move_search(self, move_search='uct'):
+        assert(move_search in MOVE_SEARCHES)
+        self.move_search=move_search
     
+    def set_batch_size(self, batch_size=0):
+        assert(batch_size >= 0)
+        self.batch_size=batch_size
+
     def set_playout_policy(self, playout_policy='rule_based'):
         assert(playout_policy in ['random', 'rule_based'])
         self.playout_policy=playout_policy
@@ -148,46 +220,23 @@ class GomokuSimulationPlayer(object):
         
         # check if pattern moves will be created
         moves_can_create_pattern_move = []
-        copyboard = board.copy()
-        
-        for i in legal_moves_2d:
-            move_point = coord_to_point(i[0], i[1], copyboard.size)
-            copyboard.play_move_gomoku(move_point, current_color)
-            ret = copyboard.get_pattern_moves()
-            if ret != None:
-                moves_can_create_pattern_move.append(i)
-            copyboard = board.copy()
-            
         must_win_move = []
         for i in legal_moves_2d:
-            move_point = coord_to_point(i[0], i[1], copyboard.size)
-            copyboard.play_move_gomoku(move_point, current_color)
-            ret = copyboard.get_pattern_moves()
-            if ret != None:
-                second_copy_board = copyboard.copy()
-                for j in ret[1]:
-                    second_copy_board.play_move_gomoku(j, GoBoardUtil.opponent(current_color))
-                    ret2 = second_copy_board.get_pattern_moves()
-                    if ret2 != None:
-                        must_win_move.append(i)
-                    second_copy_board = copyboard.copy()
-            copyboard = board.copy()
+            move_point = coord_to_point(i[0], i[1], board.size)
+            with board.try_move(move_point, current_color):
+                ret = board.get_pattern_moves()
+                if ret != None:
+                    moves_can_create_pattern_move.append(i)
+                    for j in ret[1]:
+                        with board.try_move(j, GoBoardUtil.opponent(current_color)):
+                            ret2 = board.get_pattern_moves()
+                        if ret2 != None:
+                            must_win_move.append(i)
             
-        # handle white start
-        if (len(player_color_old_moves_2d) == 0) and (len(opponent_color_old_moves_2d) == 1) \
-            and ((4,4) in legal_moves_2d):
-            return [random.choice(self.twod_to_oned_list([(4,4)],board.size))]
-
-        elif (len(player_color_old_moves_2d) == 0) and (len(opponent_color_old_moves_2d) == 1) \
-            and ((3,3) in legal_moves_2d):
-            return [random.choice(self.twod_to_oned_list([(3,3)],board.size))]
-
-        # handle black start
-        elif len(player_color_old_moves_2d) == 0 and len(opponent_color_old_moves_2d) == 0:
-            return [random.choice(self.twod_to_oned_list([(4,4)],board.size))]
-        
+        # the first moves of a game come from the opening book in get_move
+
         #handle must win moves
-        elif len(must_win_move) > 0:
+        if len(must_win_move) > 0:
             cloest_must_win_move = find_move_close_to_center(must_win_move, center = (3.5, 3.5))
             return [random.choice(self.twod_to_oned_list(cloest_must_win_move,board.size))]
 
@@ -228,14 +277,17 @@ class GomokuSimulationPlayer(object):
             return "Random", self._random_moves(board, color_to_play)
         else:
             assert(self.playout_policy=='rule_based')
-            assert(isinstance(board, SimpleGoBoard))
+            assert(isinstance(board, (SimpleGoBoard, BitboardGomokuBoard)))
             ret=board.get_pattern_moves()
             if ret is None:
                 return "Random", self._random_moves(board, color_to_play)
             movetype_id, moves=ret
             return self.pattern_list[movetype_id], moves
     
-    def _do_playout(self, board, color_to_play):
+    def _do_playout(self, board, color_to_play, moves=None):
+        """
+        moves: a list the moves of the playout are appended to
+        """
         res=game_result(board)
         simulation_moves=[]
         while(res is None):
@@ -245,7 +297,9 @@ class GomokuSimulationPlayer(object):
             simulation_moves.append(playout_move)
             res=game_result(board)
         for m in simulation_moves[::-1]:
-            undo(board, m)
+            board.undo_move()
+        if moves is not None:
+            moves.extend(simulation_moves)
         if res == color_to_play:
             return 1.0
         elif res == 'draw':
@@ -254,53 +308,162 @@ class GomokuSimulationPlayer(object):
             assert(res == GoBoardUtil.opponent(color_to_play))
             return -1.0
 
+    def _batch_get_move(self, board, color_to_play, deadline):
+        """
+        Flat Monte Carlo with batch_size vectorized random playouts per
+        move, for the moves that can be scored until deadline.
+        best_move is kept up to date, for a genmove stopped by the
+        timelimit.
+        """
+        moves=GoBoardUtil.generate_legal_moves_gomoku(board, unique=True)
+        best_result, best_move=-1.1, None
+        # a legal move, before the first one is scored
+        self.best_move=moves[0]
+        for move in moves:
+            # at least one move scored, even if the budget is too short
+            if best_move is not None and timer() > deadline:
+                break
+            with board.try_move(move, color_to_play):
+                if game_result(board) == color_to_play:
+                    #This move is a immediate win
+                    best_move=move
+                    self.best_move=best_move
+                    break
+                results=batch_playouts(board, self.batch_size)
+            win_rate=playout_scores(results, color_to_play).mean()
+            if win_rate > best_result:
+                best_result=win_rate
+                best_move=move
+                self.best_move=best_move
+        return best_move
+
     def get_move(self, board, color_to_play):
         """
         The genmove function called by gtp_connection
         """
         global current_color
         current_color = color_to_play
-        moves=GoBoardUtil.generate_legal_moves_gomoku(board)
+        deadline = self.time_manager.deadline(board)
+        if color_to_play == board.current_player:
+            move = self.book.lookup(board)
+            if move is not None:
+                self.best_move = move
+                return move
+            # a win or draw proven before, in this game or another one,
+            # not one found by alphabeta in its candidate moves
+            stored = lookup_solve(board, exact_only=True)
+            if stored is not None and stored[0]:
+                move = stored[1] if stored[1] != "NoMove" else stored[2]
+                if move is not None:
+                    self.best_move = move
+                    return move
+            line = find_threat_win(board, deadline=deadline)
+            if line is not None:
+                self.best_move = line[0]
+                return line[0]
+        if self.batch_size > 0:
+            return self._batch_get_move(board, color_to_play, deadline)
+        if self.workers > 1:
+            return self._parallel_get_move(board, deadline)
+        if self.move_search == 'uct':
+            return self._uct_get_move(board, deadline)
+        moves=GoBoardUtil.generate_legal_moves_gomoku(board, unique=True)
         toplay=board.current_player
-        best_result, best_move=-1.1, None
-        best_move=None
+        move=immediate_win(board, moves, toplay)
+        if move is not None:
+            self.best_move=move
+            return move
         wins = np.zeros(len(moves))
         visits = np.zeros(len(moves))
-        start_time = timer()
-        total_time = 0.0
-        bad_simulation = False
-        while total_time < 55.0 and bad_simulation:
+        amaf = AMAFTable(board.maxpoint) if self.rave else None
+        # a legal move, before the first round of playouts is done
+        self.best_move=moves[0]
+        while True:
             for i, move in enumerate(moves):
-                print(total_time)
-                end_time = timer()
-                total_time = end_time - start_time
-                play_move(board, move, toplay)
-                res=game_result(board)
-                if res == toplay:
-                    undo(board, move)
-                    #This move is a immediate win
-                    self.best_move=move
-                    return move
-                ret=self._do_playout(board, toplay)
-                wins[i] += ret
-                visits[i] += 1
-                win_rate = wins[i] / visits[i]
-                if win_rate > best_result:
-                    best_result=win_rate
-                    best_move=move
+                # at least one playout, even if the budget is too short
+                if visits[0] > 0 and timer() > deadline:
+                    best_move=self._flat_best_move(moves, wins, visits,
+                                                   amaf, toplay)
                     self.best_move=best_move
-                undo(board, move)
-                if total_time > 54.9:
-                    bad_simulation = True
+                    return best_move
+                wins[i] += self.flat_playout(board, move, toplay, amaf)
+                visits[i] += 1
+            # once a round, it costs about as much as a playout
+            self.best_move=self._flat_best_move(moves, wins, visits, amaf,
+                                                toplay)
 
-        if (best_move!= None) and (bad_simulation==False):
-            print("best move", best_move)
-            return best_move
-        else:
-            _ , candidate_moves = self.policy_moves(board, board.current_player)
-            print("candidate move", candidate_moves)
-            playout_move=random.choice(candidate_moves)
-            return playout_move
+    def flat_playout(self, board, move, color, amaf=None):
+        """
+        The result of a playout after move of color, 1.0, 0.0 or -1.0
+        for color, also counted in amaf if it is not None.
+        Used by the flat loop of get_move and by parallel_mcts.py.
+        """
+        play_move(board, move, color)
+        simulation_moves=[move]
+        ret=self._do_playout(board, color, simulation_moves)
+        board.undo_move()
+        if amaf is not None:
+            amaf.update(color, simulation_moves, ret)
+        return ret
+
+    def _flat_best_move(self, moves, wins, visits, amaf, color):
+        """
+        The move with the best win rate, blended with its AMAF win rate
+        if amaf is not None, among the moves with playouts
+        """
+        rates = wins / np.maximum(visits, 1)
+        if amaf is not None:
+            beta = np.sqrt(RAVE_EQUIVALENCE / (3 * visits + RAVE_EQUIVALENCE))
+            amaf_rates = np.array([amaf.win_rate(color, move, 0.0)
+                                   for move in moves])
+            rates = (1 - beta) * rates + beta * amaf_rates
+        rates[visits == 0] = -np.inf
+        return moves[int(np.argmax(rates))]
+
+    def _uct_get_move(self, board, deadline):
+        """
+        UCT search until deadline, or until the best move is decided,
+        going on with the tree of the last genmove. best_move is kept
+        up to date, for a genmove stopped by the timelimit.
+        """
+        search=self.tree
+        if search is None or not search.matches(board) \
+            or search.playout_policy != self.playout_policy \
+            or search.rave != self.rave:
+            search=UCTSearch(board, self.playout_policy, rave=self.rave)
+            self.tree=search
+        # gtp_connection gives genmove a different board object each time
+        search.board=board
+        def keep_best_move(search):
+            self.best_move=search.best_move()
+        move=search.run(deadline=deadline, callback=keep_best_move)
+        self.best_move=move
+        return move
+
+    def _parallel_get_move(self, board, deadline):
+        """
+        Root-parallel simulations until deadline: the most
+        visited move for uct, the move of _flat_best_move for flat, with
+        the playouts of flat_playout. The trees of the workers are not
+        kept for the next genmove.
+        """
+        self.tree=None
+        if self.move_search == 'uct':
+            moves, wins, visits=parallel_mcts.search(board, self.workers,
+                deadline, 'uct', self.playout_policy, rave=self.rave)
+            self.best_move=moves[int(np.argmax(visits))]
+            return self.best_move
+        moves=GoBoardUtil.generate_legal_moves_gomoku(board, unique=True)
+        toplay=board.current_player
+        move=immediate_win(board, moves, toplay)
+        if move is not None:
+            self.best_move=move
+            return move
+        amaf = AMAFTable(board.maxpoint) if self.rave else None
+        moves, wins, visits=parallel_mcts.search(board, self.workers,
+            deadline, 'flat', self.playout_policy, moves, self.rave, amaf)
+        self.best_move=self._flat_best_move(moves, wins, visits, amaf, toplay)
+        return self.best_move
 
 # https://www.geeksforgeeks.org/python-remove-duplicates-list/
 def remove(duplicate): 
@@ -325,13 +488,20 @@ def find_move_close_to_center(candidate_list, center = (3.5, 3.5)):
 
     
 
-def run():
+def run(use_bitboard=False):
     """
     start the gtp connection and wait for commands.
+    use_bitboard selects BitboardGomokuBoard instead of SimpleGoBoard.
+    Positions solved by earlier games are read from, and new ones
+    written to, solved_db.DEFAULT_PATH.
     """
-    board = SimpleGoBoard(7)
+    open_db()
+    if use_bitboard:
+        board = BitboardGomokuBoard(7)
+    else:
+        board = SimpleGoBoard(7)
     con = GtpConnection(GomokuSimulationPlayer(), board)
     con.start_connection()
 
 if __name__=='__main__':
-    run()
+    run(use_bitboard='--bitboard' in sys.argv[1:])
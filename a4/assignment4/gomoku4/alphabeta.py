@@ -1,79 +1,411 @@
+import json
 from board_util import GoBoardUtil, BLACK, WHITE, EMPTY, BORDER
-#from profilehooks import profile
-
-def undo(board,move):
-    board.board[move]=EMPTY
-    board.current_player=GoBoardUtil.opponent(board.current_player)
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from timeit import default_timer as timer
+from threat_space import find_threat_win
+from move_ordering import MoveOrdering
+from solved_db import lookup_solve, store_solve
 
 def game_end(board):
     game_end, winner = board.check_game_end_gomoku()
-    moves = board.get_empty_points()
-    board_full = (len(moves) == 0)
+    board_full = board.is_board_full()
     if game_end:
         return 1 if winner == board.current_player else -1
     if board_full:
         return 0
     return None
 
-def alphabeta(board,alpha,beta):
-    #print(GoBoardUtil.get_twoD_board(board),alpha,beta)
-    result=game_end(board)
-    if (result!=None):
-        return result
+"""
+The solver keeps its transposition table from one solve to the next.
+Positions are keyed by board.hash, which includes the player to move,
+and a position has the same value however it was reached.
+"""
+transposition_table = TranspositionTable()
+
+"""
+The deadline is checked once every POLL_INTERVAL nodes, so checking it
+costs almost nothing. One node takes well under a millisecond, so the
+search stops within a few hundredths of a second of the deadline.
+"""
+POLL_INTERVAL = 256
+
+class SolveTimeout(Exception):
+    """
+    Raised inside the search when the deadline has passed
+    """
+    pass
+
+class Search(object):
+    """
+    The state of one solve.
+    table: the transposition table
+    deadline: timer() value to stop at, or None for no limit
+    nodes: number of positions searched so far
+    root_values: the values found for root moves, by move. After a
+    draw is found only wins are searched for, so the later values are
+    upper bounds, where 0 means not a win.
+    threat_line: the winning line found by the threat-space search
+    before the full search, or None
+    ordering: the move_ordering.MoveOrdering of the solve
+    root_moves, root_index, draw_move, child: where the search of the
+    root moves is, so a solve that ran out of time can be resumed:
+    the root moves, the index of the one searched now, the first move
+    found to draw, and the StackSearch of the current root move
+    root_key: board.hash of the root position
+    paused: True if the search ran out of time, and can be resumed
+    Statistics, see stats:
+    time: seconds spent in solve, over all the calls that resumed it
+    cutoffs: move index -> number of beta cutoffs by the move at that index
+    forced_moves: nodes where list_solve_point gave the only move
+    tt_hits: nodes found in the transposition table
+    max_depth: the most moves played on top of the root position
+    result: the result of the last call to solve, see result_name
+    calls: the number of calls to solve that ran this search
+    trace: an open file the nodes are written to, or None
+    """
+    def __init__(self, table, deadline=None, ordering=None):
+        self.table=table
+        self.deadline=deadline
+        self.ordering=ordering if ordering is not None else MoveOrdering()
+        self.nodes=0
+        self.root_values={}
+        self.threat_line=None
+        self.root_moves=None
+        self.root_index=0
+        self.draw_move=None
+        self.child=None
+        self.root_key=None
+        self.paused=False
+        self.time=0.0
+        self.cutoffs={}
+        self.forced_moves=0
+        self.tt_hits=0
+        self.max_depth=0
+        self.result=None
+        self.calls=0
+        self.trace=None
+
+    def count_node(self):
+        self.nodes+=1
+        if self.deadline is not None and self.nodes % POLL_INTERVAL == 0 \
+            and timer() > self.deadline:
+            raise SolveTimeout()
+
+    def stats(self):
+        """
+        The statistics of the search, as a dict that can be written as JSON
+        """
+        return {
+            'result': self.result,
+            'nodes': self.nodes,
+            'time': round(self.time, 3),
+            'nodes_per_second': int(self.nodes / self.time) if self.time else 0,
+            'cutoffs_by_index': {str(i): n for i, n in sorted(self.cutoffs.items())},
+            'forced_moves': self.forced_moves,
+            'tt_hits': self.tt_hits,
+            'max_depth': self.max_depth,
+            'threat_win': self.threat_line is not None,
+            'calls': self.calls,
+        }
+
+"""
+The Search of the last call to solve, to look at its partial results
+"""
+last_search = None
+
+"""
+Optional outputs of solve, None to turn them off.
+stats_log: path of a file that gets Search.stats of every solve as
+one JSON line.
+trace_path: path of a file that gets every node searched, to replay
+the search tree offline. For each solve it gets the lines
+    solve SIZE TO_PLAY COLORS   the root position, COLORS has the
+                                color of each point, row by row
+    e PLY MOVE ALPHA BETA       a node, reached by MOVE, is entered
+    x PLY VALUE REASON          the node at PLY is done: REASON is
+                                end (game over), tt (table), all
+                                (all moves searched) or cut INDEX
+                                (cutoff by the move at INDEX)
+    result RESULT
+Ply 0 is the position after a root move. A solve that resumes a
+search enters again the node it stopped at.
+"""
+stats_log = None
+trace_path = None
+
+def result_name(result):
+    """
+    win, draw, loss, over (game already over) or unknown,
+    for a result of solve
+    """
+    have_result, move, draw_move = result
+    if move == "First":
+        return "over"
+    if move == "Unknown":
+        return "unknown"
+    if move != "NoMove":
+        return "win"
+    return "draw" if have_result else "loss"
+
+def _moves(board, best_move, search):
+    """
+    The forced solve point if there is one, else the candidate moves
+    of the ordering of search, with the best move stored in the table
+    first.
+    """
     solvePoint=board.list_solve_point()
     if solvePoint:
-        #print(solvePoint[0])
-        board.play_move_gomoku(solvePoint[0],board.current_player)
-        result=-alphabeta(board,-beta,-alpha)
-        if(result>alpha):
-            alpha=result
-        undo(board,solvePoint[0])
-        if(result>=beta):
-            return beta
-    else:
-        for m in GoBoardUtil.generate_legal_moves_gomoku(board):
-            board.play_move_gomoku(m,board.current_player)
-            result=-alphabeta(board,-beta,-alpha)
-            if(result>alpha):
-                alpha=result
-            undo(board,m)
-            if(result>=beta):
-                return beta
-    return alpha
-
-#@profile
+        search.forced_moves+=1
+        return [solvePoint[0]]
+    if best_move is not None and board.get_color(best_move) != EMPTY:
+        best_move=None
+    return search.ordering.generate(board, best_move)
+
+class StackSearch(object):
+    """
+    Alphabeta without recursion: the frames of the nodes on the current
+    path are kept in lists indexed by ply, allocated once for the
+    deepest possible path.
+
+    When the deadline passes, run takes back the moves of the path and
+    raises SolveTimeout, keeping the frames. run again plays the path
+    again and goes on where the search stopped.
+    """
+    def __init__(self, board, alpha, beta, search):
+        size=len(board.empty_points)+1
+        self.board=board
+        self.search=search
+        self.moves=[None]*size
+        self.index=[0]*size
+        self.alpha=[0]*size
+        self.beta=[0]*size
+        self.old_alpha=[0]*size
+        self.best_move=[None]*size
+        self.key=[0]*size
+        self.depth=[0]*size
+        self.alpha[0],self.beta[0]=alpha,beta
+        self.ply=0
+        self.entering=True
+        self.path=None
+
+    def run(self):
+        """
+        The value of the root position for the player to move, between
+        alpha and beta. The steps of a node are written out in one loop,
+        with the lists and methods it uses in local variables.
+        """
+        board=self.board
+        search=self.search
+        table=search.table
+        ordering=search.ordering
+        play=board.play_move_gomoku
+        undo=board.undo_move
+        count_node=search.count_node
+        lookup=table.lookup
+        store=table.store
+        moves,index,alphas,betas=self.moves,self.index,self.alpha,self.beta
+        old_alphas,best_moves,keys,depths=\
+            self.old_alpha,self.best_move,self.key,self.depth
+        cutoffs=search.cutoffs
+        trace=search.trace
+        tt_hits=0
+        ply=self.ply
+        max_ply=ply
+        if self.path is not None:
+            for m in self.path:
+                play(m,board.current_player)
+            self.path=None
+        try:
+            while True:
+                value=None
+                if self.entering:
+                    count_node()
+                    self.entering=False
+                    if trace is not None:
+                        trace.write('e %d %d %d %d\n' % (ply, board.moves[-1],
+                                    alphas[ply], betas[ply]))
+                    value=game_end(board)
+                    reason='end'
+                    if value is None:
+                        alpha,beta=alphas[ply],betas[ply]
+                        key=board.hash
+                        entry=lookup(key)
+                        best_move=None
+                        if entry is not None:
+                            tt_hits+=1
+                            reason='tt'
+                            best_move=entry[2]
+                            bound=entry[1]
+                            if bound==EXACT:
+                                value=entry[0]
+                            elif bound==LOWER and entry[0]>=beta:
+                                value=beta
+                            elif bound==UPPER and entry[0]<=alpha:
+                                value=alpha
+                        if value is None:
+                            keys[ply]=key
+                            depths[ply]=len(board.empty_points)
+                            old_alphas[ply]=alpha
+                            best_moves[ply]=best_move
+                            moves[ply]=_moves(board,best_move,search)
+                            index[ply]=0
+                if value is None:
+                    i=index[ply]
+                    if i<len(moves[ply]):
+                        play(moves[ply][i],board.current_player)
+                        alphas[ply+1],betas[ply+1]=-betas[ply],-alphas[ply]
+                        ply+=1
+                        if ply>max_ply:
+                            max_ply=ply
+                        self.entering=True
+                        continue
+                    # all moves searched
+                    value=alphas[ply]
+                    reason='all'
+                    bound=EXACT if value>old_alphas[ply] else UPPER
+                    store(keys[ply],value,bound,best_moves[ply],depths[ply])
+                # the node at ply is done, go back to its parent
+                if trace is not None:
+                    trace.write('x %d %d %s\n' % (ply, value, reason))
+                while ply>0:
+                    undo()
+                    ply-=1
+                    result=-value
+                    i=index[ply]
+                    m=moves[ply][i]
+                    if(result>=betas[ply]):
+                        ordering.cutoff(board,m)
+                        cutoffs[i]=cutoffs.get(i,0)+1
+                        value=betas[ply]
+                        store(keys[ply],value,LOWER,m,depths[ply])
+                        if trace is not None:
+                            trace.write('x %d %d cut %d\n' % (ply, value, i))
+                        continue
+                    if(result>alphas[ply]):
+                        alphas[ply]=result
+                        best_moves[ply]=m
+                    index[ply]+=1
+                    break
+                else:
+                    return value
+        except BaseException:
+            # also on SolveTimeout: leave the board as it was
+            self.path=[moves[p][index[p]] for p in range(ply)]
+            for _ in range(ply):
+                undo()
+            raise
+        finally:
+            self.ply=ply
+            search.tt_hits+=tt_hits
+            # ply 0 is one move after the root position of solve
+            search.max_depth=max(search.max_depth,max_ply+1)
+
 """
-if have winning move, return _,winning_move
-else return have_draw,"NoMove"
+if have winning move, return True,winning_move,None
+else return have_draw,"NoMove",draw_move
+if the game is already over, return its result,"First",None
+if the deadline passes first, return None,"Unknown",draw_move, where
+draw_move is a move already proven to draw, or None.
+Values proven before the deadline stay in the table for the next solve,
+and last_search.root_values has the root moves searched so far.
+The next solve of the same position with the same table goes on
+where the search stopped.
+Results are looked up in and stored to solved_db, as exact unless the
+ordering only searches the moves near a stone.
+table: the transposition table to use, the module one by default
+deadline: timer() value to stop at, or None for no limit
+ordering: the move_ordering.MoveOrdering to use, a new default one
+if None
 """
-def solve(board):
+def solve(board, table=None, deadline=None, ordering=None):
+    global last_search
+    if table is None:
+        table=transposition_table
+    search=last_search
+    if ordering is None and search is not None and search.paused \
+        and search.table is table and search.root_key==board.hash:
+        # go on with the search that ran out of time on this position
+        search.deadline=deadline
+    else:
+        table.new_search()
+        search=Search(table, deadline, ordering)
+        search.root_key=board.hash
+    last_search=search
+    search.calls+=1
+    start=timer()
     result=game_end(board)
     if (result!=None):
-        return result,"First"
-    alpha,beta=-1,1
-    haveDraw=False
-    solvePoint=board.list_solve_point()
-    if solvePoint:
-        #print(solvePoint[0])
-        board.play_move_gomoku(solvePoint[0],board.current_player)
-        result=-alphabeta(board,-beta,-alpha)
-        undo(board,solvePoint[0])
+        result=result,"First",None
+    else:
+        exact=search.ordering.distance is None
+        # positions solved before, maybe by another process
+        result=lookup_solve(board, exact_only=exact)
+        if result is None:
+            if trace_path is not None:
+                search.trace=open(trace_path, 'a')
+                search.trace.write('solve %d %d %s\n' % (board.size,
+                    board.current_player, ''.join(str(board.get_color(p))
+                    for p in board.get_board_points())))
+            try:
+                result=_solve_root(board, search)
+            finally:
+                if search.trace is not None:
+                    search.trace.write('result %s\n' % result_name(result)
+                                       if result else 'result error\n')
+                    search.trace.close()
+                    search.trace=None
+            search.paused=result[1]=="Unknown"
+            store_solve(board, result, exact)
+    search.time+=timer()-start
+    search.result=result_name(result)
+    if stats_log is not None:
+        with open(stats_log, 'a') as f:
+            f.write(json.dumps(search.stats())+'\n')
+    return result
+
+def _solve_root(board, search):
+    if search.root_moves is None:
+        # most wins are a sequence of fours and threes, found much faster
+        # by the threat-space search
+        search.threat_line=find_threat_win(board, deadline=search.deadline)
+        if search.threat_line is not None:
+            return True,search.threat_line[0],None
+        solvePoint=board.list_solve_point()
+        if solvePoint:
+            moves=[solvePoint[0]]
+        else:
+            moves=search.ordering.generate(board)
+            moves=search.ordering.order(board, board.drop_symmetric_moves(moves))
+        search.root_moves=moves
+    beta=1
+    while search.root_index<len(search.root_moves):
+        m=search.root_moves[search.root_index]
+        alpha=0 if search.draw_move is not None else -1
+        board.play_move_gomoku(m,board.current_player)
+        try:
+            if search.child is None:
+                search.child=StackSearch(board,-beta,-alpha,search)
+            else:
+                # the same position, but maybe on another board object,
+                # such as the copy of genmove
+                search.child.board=board
+            result=-search.child.run()
+        except SolveTimeout:
+            # search.child keeps its path, to resume it
+            return None,"Unknown",search.draw_move
+        finally:
+            board.undo_move()
+        search.child=None
+        search.root_index+=1
+        #print(GoBoardUtil.get_twoD_board(board))
+        #print(result)
+        search.root_values[m]=result
         if(result==1):
-            return True,solvePoint[0]
-        elif(result==0):
-            haveDraw=True
-    else: 
-        for m in GoBoardUtil.generate_legal_moves_gomoku(board):
-            board.play_move_gomoku(m,board.current_player)
-            result=-alphabeta(board,-beta,-alpha)
-            #print(GoBoardUtil.get_twoD_board(board))
-            #print(result)
-            undo(board,m)
-            if(result==1):
-                return True,m
-            elif(result==0):
-                haveDraw=True
-    return haveDraw,"NoMove"
+            return True,m,None
+        elif(result==0 and search.draw_move is None):
+            # only a win can improve on a draw now
+            search.draw_move=m
+    return search.draw_move is not None,"NoMove",search.draw_move
 
 
     """
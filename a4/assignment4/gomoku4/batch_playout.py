@@ -0,0 +1,81 @@
+"""
+batch_playout.py
+
+Random Gomoku playouts for a whole batch of games at once, with NumPy.
+
+The games are stored as one (N, size * size) int8 array. Each step plays
+one random move in every unfinished game, and five in a row is detected
+for the whole batch with sliding window sums in the four directions.
+All games start from the same position, so after each step every
+unfinished game has the same number of empty points.
+"""
+
+import numpy as np
+from board_util import GoBoardUtil, BLACK, WHITE, EMPTY
+
+def has_five(stones):
+    """
+    stones: boolean array of shape (N, size, size)
+    Returns a boolean array of shape (N,), True for the games that have
+    five stones in a row. A window sum is 5 exactly where the five
+    points of the window all have a stone.
+    """
+    n, size = stones.shape[0], stones.shape[1]
+    found = np.zeros(n, dtype = bool)
+    if size < 5:
+        return found
+    s = stones.astype(np.int8)
+    k = size - 4
+    windows = [
+        sum(s[:, :, i : i + k] for i in range(5)),                 # horizontal
+        sum(s[:, i : i + k, :] for i in range(5)),                 # vertical
+        sum(s[:, i : i + k, i : i + k] for i in range(5)),         # y=x
+        sum(s[:, i : i + k, 4 - i : 4 - i + k] for i in range(5))  # y=-x
+    ]
+    for window in windows:
+        found |= (window == 5).reshape(n, -1).any(axis = 1)
+    return found
+
+def batch_playouts(board, num_games, rng=np.random):
+    """
+    Play num_games uniformly random games from the position on board.
+    The board itself is not changed.
+    rng: np.random or a np.random.RandomState
+    Returns an int8 array with the winner of each game,
+    BLACK or WHITE, or EMPTY for a draw.
+    """
+    results = np.full(num_games, EMPTY, dtype = np.int8)
+    game_end, winner = board.check_game_end_gomoku()
+    if game_end:
+        results[:] = winner
+        return results
+    size = board.size
+    start = GoBoardUtil.get_twoD_board(board).astype(np.int8).reshape(1, -1)
+    games = np.repeat(start, num_games, axis = 0)
+    num_empty = int(np.count_nonzero(start == EMPTY))
+    color = board.current_player
+    active = np.arange(num_games)
+    while len(active) > 0 and num_empty > 0:
+        sub = games[active]
+        # the largest random key among the empty points is a uniformly
+        # random empty point
+        keys = rng.random_sample(sub.shape)
+        keys[sub != EMPTY] = -1.0
+        sub[np.arange(len(active)), keys.argmax(axis = 1)] = color
+        games[active] = sub
+        won = has_five((sub == color).reshape(-1, size, size))
+        results[active[won]] = color
+        active = active[~won]
+        num_empty -= 1
+        color = GoBoardUtil.opponent(color)
+    return results
+
+def playout_scores(results, color):
+    """
+    Scores of batch_playouts results for color, as in _do_playout:
+    1.0 for a win, 0.0 for a draw and -1.0 for a loss.
+    """
+    scores = np.zeros(len(results))
+    scores[results == color] = 1.0
+    scores[results == GoBoardUtil.opponent(color)] = -1.0
+    return scores
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+"""
+bench.py
+
+Micro benchmarks for the Gomoku engine.
+Usage: python3 bench.py [name ...]
+Runs all benchmarks if no name is given.
+"""
+
+import sys
+import random
+from board_util import BLACK
+from timeit import default_timer as timer
+from simple_board import SimpleGoBoard
+from bitboard import BitboardGomokuBoard
+from batch_playout import batch_playouts
+from Gomoku4 import GomokuSimulationPlayer
+from transposition import TranspositionTable
+import alphabeta
+
+def random_position(board, num_moves, seed=1):
+    """
+    Play num_moves random moves on board, stopping early at the end of game
+    """
+    rng = random.Random(seed)
+    for _ in range(num_moves):
+        moves = sorted(board.empty_points)
+        board.play_move_gomoku(rng.choice(moves), board.current_player)
+        if board.check_game_end_gomoku()[0]:
+            break
+    return board
+
+def time_per_call(function, min_time=0.5):
+    """
+    Average time of one call of function, in microseconds
+    """
+    calls = 0
+    start = timer()
+    while True:
+        function()
+        calls += 1
+        elapsed = timer() - start
+        if elapsed >= min_time:
+            return elapsed / calls * 1e6
+
+def bench_copy():
+    for size in [7, 15]:
+        for board_class in [SimpleGoBoard, BitboardGomokuBoard]:
+            board = random_position(board_class(size), 10)
+            print("copy {}x{} {}: {:.1f} us".format(
+                  size, size, board_class.__name__, time_per_call(board.copy)))
+
+def bench_board():
+    """
+    The operations of a search node on each board class
+    """
+    from simple_board import PATTERN_MOVES_TABLE, PATTERN_MOVES_AUTOMATON
+    from mcts import random_playout
+    for board_class in [SimpleGoBoard, BitboardGomokuBoard]:
+        board = random_position(board_class(7), 12)
+        move = sorted(board.empty_points)[0]
+        color = board.current_player
+        def play_undo():
+            board.play_move_gomoku(move, color)
+            board.undo_move()
+        name = board_class.__name__
+        print("board 7x7 {} play and undo: {:.1f} us".format(
+              name, time_per_call(play_undo)))
+        print("board 7x7 {} check_game_end_gomoku: {:.2f} us".format(
+              name, time_per_call(board.check_game_end_gomoku)))
+        for engine in ['line_codes', 'automaton']:
+            board.set_pattern_engine(engine)
+            print("board 7x7 {} pattern_move_sets {}: {:.1f} us".format(
+                  name, engine, time_per_call(lambda: board.pattern_move_sets(
+                      PATTERN_MOVES_TABLE, PATTERN_MOVES_AUTOMATON, color))))
+        board.set_pattern_engine('line_codes')
+        rng = random.Random(1)
+        print("board 7x7 {} random playout: {:.1f} us".format(
+              name, time_per_call(lambda: random_playout(board, rng))))
+
+def bench_playout():
+    board = random_position(SimpleGoBoard(7), 4)
+    player = GomokuSimulationPlayer(playout_policy='random')
+    player.set_playout_policy('random')
+    single = time_per_call(lambda: player._do_playout(board, BLACK))
+    print("playout 7x7 _do_playout random: {:.1f} us".format(single))
+    for num_games in [100, 1000]:
+        batch = time_per_call(lambda: batch_playouts(board, num_games))
+        print("playout 7x7 batch_playouts {}: {:.1f} us per game".format(
+              num_games, batch / num_games))
+
+def bench_solve():
+    """
+    Positions with no threat-space win, that alphabeta solves in seconds
+    """
+    total_nodes, total_time = 0, 0.0
+    for seed in [9, 12, 29, 47, 48, 54]:
+        board = random_position(SimpleGoBoard(7), 26 + seed % 10, seed)
+        start = timer()
+        result = alphabeta.solve(board, TranspositionTable(),
+                                 deadline=timer() + 60)
+        elapsed = timer() - start
+        nodes = alphabeta.last_search.nodes
+        total_nodes += nodes
+        total_time += elapsed
+        print("solve 7x7 seed {}: {} {} nodes {:.2f} s".format(
+              seed, result[:2], nodes, elapsed))
+    print("solve 7x7 total: {} nodes {:.2f} s".format(total_nodes, total_time))
+
+def bench_stack():
+    """
+    StackSearch against the recursive alphabeta of test_alphabeta, with
+    the full window on the positions of bench_solve, best of 3 runs
+    """
+    from test_alphabeta import recursive_alphabeta
+    searches = [("recursive", lambda board, search:
+                     recursive_alphabeta(board, -1, 1, search)),
+                ("stack", lambda board, search:
+                     alphabeta.StackSearch(board, -1, 1, search).run())]
+    for name, run in searches:
+        total_nodes, total_time = 0, 0.0
+        for seed in [9, 12, 29, 47, 48, 54]:
+            board = random_position(SimpleGoBoard(7), 26 + seed % 10, seed)
+            times = []
+            # the best of 3 runs, the timing of one is noisy
+            for _ in range(3):
+                search = alphabeta.Search(TranspositionTable())
+                start = timer()
+                run(board, search)
+                times.append(timer() - start)
+            total_time += min(times)
+            total_nodes += search.nodes
+        print("stack 7x7 {}: {} nodes {:.2f} s, {:.0f} nodes/s".format(
+              name, total_nodes, total_time, total_nodes / total_time))
+
+BENCHMARKS = {
+    "copy": bench_copy,
+    "board": bench_board,
+    "playout": bench_playout,
+    "solve": bench_solve,
+    "stack": bench_stack,
+}
+
+if __name__=='__main__':
+    names = sys.argv[1:] or list(BENCHMARKS.keys())
+    for name in names:
+        BENCHMARKS[name]()
@@ -0,0 +1,276 @@
+"""
+bitboard.py
+
+Implements a Gomoku board that stores the stones of each color
+as a Python int bitmask.
+
+Bit p of a mask stands for point p of the padded 1-dimensional layout
+used by SimpleGoBoard (see board_util.coord_to_point), so point numbers
+can be passed between the two boards unchanged.
+The BORDER points are never set in a color mask, which is what stops
+a run of stones from wrapping around from one row to the next.
+"""
+
+import numpy as np
+from board_util import GoBoardUtil, BLACK, WHITE, EMPTY, BORDER, \
+                       PASS, is_black_white, coord_to_point, MAXSIZE
+from simple_board import SimpleGoBoard
+from board_geometry import board_geometry
+
+class BitboardGomokuBoard(object):
+
+    def __init__(self, size):
+        """
+        Creates a Gomoku board of given size
+        """
+        assert 2 <= size <= MAXSIZE
+        self.pattern_engine = 'line_codes'
+        self.solver = 'alphabeta'
+        self.workers = 1
+        self.reset(size)
+
+    def reset(self, size):
+        """
+        Creates a start state, an empty board with the given size
+        """
+        self.geometry = board_geometry(size)
+        self.size = size
+        self.NS = self.geometry.NS
+        self.WE = self.geometry.WE
+        self.ko_recapture = None
+        self.current_player = BLACK
+        self.winner = None
+        self.win_point = None
+        self.stone_count = 0
+        self.moves = []
+        self.maxpoint = self.geometry.maxpoint
+        self.black_bits = 0
+        self.white_bits = 0
+        # bit of each point, also turns numpy integers into python ints
+        self.point_bit = self.geometry.point_bit
+        self.on_board_bits = self.geometry.on_board_bits
+        # horizontal, vertical, y=x and y=-x
+        self.shifts = [1, self.NS, self.NS + 1, self.NS - 1]
+        self.lines = self.geometry.lines
+        self.line_codes = [0] * len(self.lines.lines)
+        self._initialize_empty_index()
+        self.zobrist = self.geometry.zobrist
+        self.stone_hash = 0
+
+    def copy(self):
+        b = BitboardGomokuBoard.__new__(BitboardGomokuBoard)
+        b.__dict__.update(self.__dict__)
+        b.moves = list(self.moves)
+        b.line_codes = list(self.line_codes)
+        b.empty_points = list(self.empty_points)
+        b.empty_position = list(self.empty_position)
+        return b
+
+    def pt(self, row, col):
+        return coord_to_point(row, col, self.size)
+
+    def row_start(self, row):
+        assert row >= 1
+        assert row <= self.size
+        return row * self.NS + 1
+
+    @property
+    def board(self):
+        """
+        The board as a 1-dimensional numpy array, in the same encoding
+        as SimpleGoBoard.board. It is rebuilt on every access, so it is
+        meant for display only; searches use get_color, point_colors
+        or the bitmasks.
+        """
+        board = np.full(self.maxpoint, BORDER, dtype = np.int32)
+        board[self._points_of(self.on_board_bits)] = EMPTY
+        board[self._points_of(self.black_bits)] = BLACK
+        board[self._points_of(self.white_bits)] = WHITE
+        return board
+
+    def point_colors(self):
+        """
+        The color of each point as a list, as SimpleGoBoard.point_colors,
+        from the empty board and the stones played
+        """
+        colors = list(self.geometry.empty_colors)
+        black_bits = self.black_bits
+        point_bit = self.point_bit
+        for point in self.moves:
+            colors[point] = BLACK if black_bits & point_bit[point] else WHITE
+        return colors
+
+    def _points_of(self, bits):
+        """ List of the points set in bits, in increasing order """
+        points = []
+        while bits:
+            low = bits & -bits
+            points.append(low.bit_length() - 1)
+            bits ^= low
+        return points
+
+    def _bits_of_color(self, color):
+        if color == BLACK:
+            return self.black_bits
+        return self.white_bits
+
+    def get_color(self, point):
+        bit = self.point_bit[point]
+        if self.black_bits & bit:
+            return BLACK
+        if self.white_bits & bit:
+            return WHITE
+        if self.on_board_bits & bit:
+            return EMPTY
+        return BORDER
+
+    def get_empty_points(self):
+        """
+        Return:
+            The empty points on the board
+        """
+        return self._points_of(self.on_board_bits
+                               & ~(self.black_bits | self.white_bits))
+
+    def get_same_color_points(self, color):
+        """
+        Return:
+            The same color points on the board
+        """
+        return self._points_of(self._bits_of_color(color))
+
+    def get_board_points(self):
+        """
+        Return:
+            All points on the board, without the BORDER padding
+        """
+        return self.geometry.board_points
+
+    def is_legal(self, point, color):
+        """
+        All empty points are legal in gomoku
+        """
+        if point == PASS:
+            return True
+        return self.is_legal_gomoku(point, color)
+
+    def is_legal_gomoku(self, point, color):
+        """
+            Check whether it is legal for color to play on point, for the game of gomoku
+            """
+        empty = self.on_board_bits & ~(self.black_bits | self.white_bits)
+        return bool(empty & self.point_bit[point])
+
+    def play_move(self, point, color):
+        """
+        Only passing is handled here, stones are played by play_move_gomoku
+        """
+        assert is_black_white(color)
+        if point == PASS:
+            self.current_player = GoBoardUtil.opponent(color)
+            return True
+        return self.play_move_gomoku(point, color)
+
+    def play_move_gomoku(self, point, color):
+        """
+            Play a move of color on point, for the game of gomoku
+            Returns boolean: whether move was legal
+            """
+        assert is_black_white(color)
+        assert point != PASS
+        if not self.is_legal_gomoku(point, color):
+            return False
+        if color == BLACK:
+            self.black_bits |= self.point_bit[point]
+        else:
+            self.white_bits |= self.point_bit[point]
+        self.stone_count += 1
+        self.moves.append(point)
+        self.stone_hash ^= self.zobrist.keys[color][point]
+        self._remove_empty_point(point)
+        for line_index, power in self.lines.point_lines[point]:
+            self.line_codes[line_index] += color * power
+        if self.winner is None and self._has_five(self._bits_of_color(color)):
+            self.winner = color
+            self.win_point = point
+        self.current_player = GoBoardUtil.opponent(color)
+        return True
+
+    def undo_move(self):
+        """
+            Take back the last move played by play_move_gomoku.
+            """
+        point = self.moves.pop()
+        bit = self.point_bit[point]
+        if self.black_bits & bit:
+            color = BLACK
+        else:
+            assert self.white_bits & bit
+            color = WHITE
+        for line_index, power in self.lines.point_lines[point]:
+            self.line_codes[line_index] -= color * power
+        self.black_bits &= ~bit
+        self.white_bits &= ~bit
+        self.stone_count -= 1
+        self.stone_hash ^= self.zobrist.keys[color][point]
+        self._restore_empty_point(int(point))
+        if point == self.win_point:
+            self.winner = None
+            self.win_point = None
+        self.current_player = color
+
+    def _has_five(self, bits):
+        """
+        Check if bits contains five in a row in any direction.
+        After the shifts, bit p of run is set when p, p + shift, ...,
+        p + 4 * shift are all set in bits.
+        """
+        for shift in self.shifts:
+            run = bits & (bits >> shift)
+            run &= run >> (2 * shift)
+            run &= bits >> (4 * shift)
+            if run:
+                return True
+        return False
+
+    def check_game_end_gomoku(self):
+        """
+            Check if the game ends for the game of Gomoku.
+            """
+        if self.winner is not None:
+            return True, self.winner
+        return False, None
+
+    def is_board_full(self):
+        """
+            Check if there are no empty points left on the board.
+            """
+        return self.stone_count == self.size * self.size
+
+    def _point_to_coord(self, point):
+        if point is None:
+            return 'pass'
+        row, col = divmod(point, self.NS)
+        return row, col
+
+    # The empty point index, the pattern matcher, the hash and the solver
+    # only read the board through empty_points, lines, line_codes, board,
+    # stone_hash and current_player, so they are shared with SimpleGoBoard.
+    _initialize_empty_index = SimpleGoBoard._initialize_empty_index
+    _remove_empty_point = SimpleGoBoard._remove_empty_point
+    _restore_empty_point = SimpleGoBoard._restore_empty_point
+    random_empty_point = SimpleGoBoard.random_empty_point
+    try_move = SimpleGoBoard.try_move
+    hash = SimpleGoBoard.hash
+    _stones = SimpleGoBoard._stones
+    canonical_key = SimpleGoBoard.canonical_key
+    symmetric_transforms = SimpleGoBoard.symmetric_transforms
+    drop_symmetric_moves = SimpleGoBoard.drop_symmetric_moves
+    solve = SimpleGoBoard.solve
+    set_solver = SimpleGoBoard.set_solver
+    set_workers = SimpleGoBoard.set_workers
+    set_pattern_engine = SimpleGoBoard.set_pattern_engine
+    pattern_move_sets = SimpleGoBoard.pattern_move_sets
+    _find_pattern_moves = SimpleGoBoard._find_pattern_moves
+    get_pattern_moves = SimpleGoBoard.get_pattern_moves
+    list_solve_point = SimpleGoBoard.list_solve_point
@@ -0,0 +1,103 @@
+"""
+board_geometry.py
+
+Everything about a board that only depends on its size: the padded
+point layout, neighbor tables, symmetries, lines and Zobrist keys.
+
+It is built once per board size and shared by all boards of that size,
+so resetting or copying a board does not rebuild any of it.
+None of it may be changed after it is built.
+"""
+
+import numpy as np
+from board_util import EMPTY, BORDER, coord_to_point
+from line_patterns import board_lines
+from zobrist import zobrist_table
+
+# (row, col) -> image of (row, col), with m = size + 1
+SYMMETRY_TRANSFORMS = [
+    lambda row, col, m: (row, col),
+    lambda row, col, m: (col, m - row),
+    lambda row, col, m: (m - row, m - col),
+    lambda row, col, m: (m - col, row),
+    lambda row, col, m: (row, m - col),
+    lambda row, col, m: (m - row, col),
+    lambda row, col, m: (col, row),
+    lambda row, col, m: (m - col, m - row),
+]
+
+class BoardGeometry(object):
+    """
+    size, NS, WE, maxpoint: as in SimpleGoBoard
+    empty_board: read-only array of an empty board, EMPTY on the board
+                 and BORDER on the padding
+    board_points: all points on the board, in increasing order
+    neighbors: for each point, the list of its on-the-board neighbors
+    diag_neighbors: for each point, the list of its four diagonal neighbors
+    point_bit: for each point, the int with only the bit of that point set
+    on_board_bits: the int with the bits of all board points set
+    symmetries: the 8 symmetries of the square, each one a list that maps
+                every point to its image. Points off the board map to
+                themselves. symmetries[0] is the identity.
+    inverse_symmetry: symmetries[inverse_symmetry[t]] undoes symmetries[t]
+    lines: the line_patterns.BoardLines of the board
+    zobrist: the zobrist.ZobristTable of the board
+    """
+    def __init__(self, size):
+        self.size = size
+        self.NS = size + 1
+        self.WE = 1
+        self.maxpoint = size * size + 3 * (size + 1)
+        self.board_points = [coord_to_point(row, col, size)
+                             for row in range(1, size + 1)
+                             for col in range(1, size + 1)]
+        self.empty_board = np.full(self.maxpoint, BORDER, dtype = np.int32)
+        self.empty_board[self.board_points] = EMPTY
+        self.empty_board.flags.writeable = False
+        self.empty_colors = self.empty_board.tolist()
+        self.neighbors = []
+        self.diag_neighbors = []
+        for point in range(self.maxpoint):
+            self.diag_neighbors.append([point - self.NS - 1,
+                                        point - self.NS + 1,
+                                        point + self.NS - 1,
+                                        point + self.NS + 1])
+            if self.empty_board[point] == BORDER:
+                self.neighbors.append([])
+                continue
+            nbs = []
+            for nb in [point - 1, point + 1, point - self.NS, point + self.NS]:
+                if self.empty_board[nb] != BORDER:
+                    nbs.append(nb)
+            self.neighbors.append(nbs)
+        self.point_bit = [1 << point for point in range(self.maxpoint)]
+        self.on_board_bits = 0
+        for point in self.board_points:
+            self.on_board_bits |= self.point_bit[point]
+        self.symmetries = []
+        for transform in SYMMETRY_TRANSFORMS:
+            symmetry = list(range(self.maxpoint))
+            for row in range(1, size + 1):
+                for col in range(1, size + 1):
+                    image = transform(row, col, size + 1)
+                    symmetry[coord_to_point(row, col, size)] = \
+                        coord_to_point(image[0], image[1], size)
+            self.symmetries.append(symmetry)
+        self.inverse_symmetry = []
+        for symmetry in self.symmetries:
+            for u, other in enumerate(self.symmetries):
+                if all(other[symmetry[p]] == p for p in self.board_points):
+                    self.inverse_symmetry.append(u)
+                    break
+        self.lines = board_lines(size)
+        self.zobrist = zobrist_table(size)
+
+_board_geometries = {}
+
+def board_geometry(size):
+    """
+    The BoardGeometry of the given size, shared by all boards of that size.
+    """
+    if size not in _board_geometries:
+        _board_geometries[size] = BoardGeometry(size)
+    return _board_geometries[size]
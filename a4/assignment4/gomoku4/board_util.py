@@ -113,18 +113,27 @@ class GoBoardUtil(object):
         return legal_moves
     
     @staticmethod
-    def generate_legal_moves_gomoku(board):
+    def generate_legal_moves_gomoku(board, unique=False):
         """
         generate a list of all legal moves on the board for gomoku, where
         all empty positions are legal.
+        unique: drop moves that are symmetric to another move, for root
+        searches on symmetric positions.
         """
-        moves = board.get_empty_points()
-        legal_moves = []
-        for move in moves:
-            legal_moves.append(move)
+        legal_moves = list(board.empty_points)
+        if unique:
+            legal_moves = board.drop_symmetric_moves(legal_moves)
         shuffle(legal_moves)
         return legal_moves
 
+    @staticmethod
+    def generate_ordered_moves_gomoku(board):
+        """
+        generate a list of all legal moves on the board for gomoku,
+        in increasing point order, for searches that must be deterministic.
+        """
+        return sorted(board.empty_points)
+
     def find_old_moves_gomoku(board, color):
         """
         generate a list of all legal moves on the board for gomoku, where
@@ -142,11 +151,7 @@ class GoBoardUtil(object):
         """
         Generate a random move for the game of Gomoku.
         """
-        moves = board.get_empty_points()
-        if len(moves) == 0:
-            return PASS
-        np.random.shuffle(moves)
-        return moves[0]
+        return board.random_empty_point()
 
     @staticmethod       
     def generate_random_move(board, color, use_eye_filter):
@@ -0,0 +1,286 @@
+"""
+dfpn.py
+
+Depth-first proof-number search (df-pn) for Gomoku, a second backend
+for SimpleGoBoard.solve next to alphabeta.py.
+
+Proof-number search answers yes/no questions, so solve asks two:
+can the player to move win, and if not, can the opponent win.
+A no to both is a draw.
+
+Numbers are kept in the phi/delta form: phi is the proof number of the
+player to move at a node, delta its disproof number. For the attacker
+the goal is to win, for the defender it is not to lose. Each node
+is searched until its numbers reach the thresholds from its parent,
+so the search always works on the part of the tree that looks
+cheapest to prove or disprove, and all it learns is kept in a
+ProofTable.
+
+Moves are generated exactly: a player who can make five only makes
+five, a player facing a four only blocks it, and a player facing a
+three only blocks it or makes a four, since any other move loses to
+the open four. Otherwise all moves are searched, fours and threes
+first. So the results are exact, as are those of alphabeta.py with
+the default move ordering.
+"""
+
+import random
+from timeit import default_timer as timer
+from board_util import GoBoardUtil
+from transposition import ENTRY_BYTES, DEFAULT_MEMORY_MB
+from threat_space import find_threat_win, THREAT_TABLE, THREAT_AUTOMATON, \
+                         FIVE, FOUR, THREE_DEFENCE, THREE
+from alphabeta import game_end, SolveTimeout, POLL_INTERVAL
+from solved_db import lookup_solve, store_solve
+
+"""
+Infinite proof or disproof number
+"""
+INF = 10 ** 9
+
+"""
+The 1+epsilon trick: the best child may go a bit past the second best
+child before the search switches to it. This avoids searching the same
+two children in turn over and over.
+"""
+EPSILON_FACTOR = 1.25
+
+"""
+Keys added to the position hash, so both questions can share a table
+"""
+_attacker_rng = random.Random(496)
+ATTACKER_KEYS = [0] + [_attacker_rng.getrandbits(64) for _ in range(2)]
+
+class ProofTable(object):
+    """
+    Proof and disproof numbers by position, for one board size.
+    entries hold (phi, delta, work), where work is the number of nodes
+    searched below the position. When the table is full the less
+    valuable half is collected: the pinned positions are kept first,
+    then proven and disproven positions, then the ones with the most
+    work behind them.
+    pinned: the keys of the children of the root of the last search,
+    which proving_move needs after the search
+    """
+    def __init__(self, memory_mb=DEFAULT_MEMORY_MB):
+        self.resize(memory_mb)
+
+    def resize(self, memory_mb):
+        """
+        Set the memory cap, and clear the table
+        """
+        self.memory_mb = memory_mb
+        self.max_entries = max(16, int(memory_mb * 2**20) // ENTRY_BYTES)
+        self.clear()
+
+    def clear(self):
+        self.entries = {}
+        self.pinned = set()
+        self.collections = 0
+
+    def lookup(self, key):
+        return self.entries.get(key)
+
+    def store(self, key, phi, delta, work):
+        self.entries[key] = (phi, delta, work)
+        if len(self.entries) > self.max_entries:
+            self.collect()
+
+    def collect(self):
+        pinned = self.pinned
+        def worth(item):
+            phi, delta, work = item[1]
+            return (item[0] in pinned, phi == 0 or delta == 0, work)
+        kept = sorted(self.entries.items(), key=worth, reverse=True)
+        self.entries = dict(kept[:self.max_entries // 2])
+        self.collections += 1
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        return {'entries': len(self), 'capacity': self.max_entries,
+                'collections': self.collections}
+
+"""
+The table is kept from one solve to the next, like the one of alphabeta.py
+"""
+proof_table = ProofTable()
+
+class ProofSearch(object):
+    """
+    One df-pn search: does attacker win from the position on board?
+    """
+    def __init__(self, board, attacker, table, deadline=None):
+        self.board = board
+        self.attacker = attacker
+        self.table = table
+        self.deadline = deadline
+        self.salt = ATTACKER_KEYS[attacker]
+        self.zobrist = board.zobrist
+        self.nodes = 0
+        # key -> (moves, child keys), so nodes searched again do not
+        # generate their moves again
+        self.children = {}
+
+    def prove(self):
+        """
+        Returns True if attacker wins, False if not.
+        Raises SolveTimeout when the deadline passes first.
+        """
+        self.table.pinned = set(self._child_key(move)
+                                for move in self._moves())
+        phi, delta = self._mid(INF - 1, INF - 1)
+        if self.board.current_player == self.attacker:
+            return phi == 0
+        return delta == 0
+
+    def proving_move(self):
+        """
+        After prove, a move of the player to move that reaches the
+        goal of that player, or None
+        """
+        for move in self._moves():
+            entry = self.table.lookup(self._child_key(move))
+            if entry is not None and entry[1] == 0:
+                return move
+        return None
+
+    def _key(self):
+        return self.board.hash ^ self.salt
+
+    def _child_key(self, move):
+        board = self.board
+        return self._key() ^ self.zobrist.keys[board.current_player][move] \
+               ^ self.zobrist.white_to_play
+
+    def _terminal(self):
+        """
+        (phi, delta) of a finished game, or None
+        """
+        result = game_end(self.board)
+        if result is None:
+            return None
+        if self.board.current_player == self.attacker:
+            goal = result == 1
+        else:
+            goal = result != -1
+        return (0, INF) if goal else (INF, 0)
+
+    def _moves(self):
+        board = self.board
+        color = board.current_player
+        mine = board.pattern_move_sets(THREAT_TABLE, THREAT_AUTOMATON, color)
+        if mine[FIVE]:
+            return [min(mine[FIVE])]
+        theirs = board.pattern_move_sets(THREAT_TABLE, THREAT_AUTOMATON,
+                                         GoBoardUtil.opponent(color))
+        if theirs[FIVE]:
+            return sorted(theirs[FIVE])
+        if theirs[THREE_DEFENCE]:
+            # any other move loses to the open four
+            return sorted(theirs[THREE_DEFENCE] | mine[FOUR])
+        first = sorted(mine[FOUR] | mine[THREE] | theirs[FOUR])
+        rest = [m for m in GoBoardUtil.generate_ordered_moves_gomoku(board)
+                if m not in first]
+        return first + rest
+
+    def _count_node(self):
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % POLL_INTERVAL == 0 \
+            and timer() > self.deadline:
+            raise SolveTimeout()
+
+    def _mid(self, phi_threshold, delta_threshold):
+        """
+        Search the position on board until its phi reaches phi_threshold
+        or its delta reaches delta_threshold. Returns (phi, delta).
+        """
+        self._count_node()
+        terminal = self._terminal()
+        key = self._key()
+        if terminal is not None:
+            self.table.store(key, terminal[0], terminal[1], 0)
+            return terminal
+        board = self.board
+        children = self.children.get(key)
+        if children is None:
+            moves = self._moves()
+            children = (moves, [self._child_key(move) for move in moves])
+            if len(self.children) >= self.table.max_entries:
+                self.children.clear()
+            self.children[key] = children
+        moves, child_keys = children
+        nodes = self.nodes
+        while True:
+            # phi is the smallest child delta, delta the sum of child phis
+            phi, delta = INF, 0
+            best, best_phi, best_delta, second_delta = None, INF, INF, INF
+            for i, child_key in enumerate(child_keys):
+                entry = self.table.lookup(child_key)
+                child_phi, child_delta = (1, 1) if entry is None else entry[:2]
+                delta = min(INF, delta + child_phi)
+                if child_delta < best_delta:
+                    second_delta = best_delta
+                    best, best_phi, best_delta = i, child_phi, child_delta
+                elif child_delta < second_delta:
+                    second_delta = child_delta
+            phi = best_delta
+            if phi >= phi_threshold or delta >= delta_threshold \
+                or phi == 0 or delta == 0:
+                self.table.store(key, phi, delta, self.nodes - nodes)
+                return phi, delta
+            child_phi_threshold = delta_threshold - delta + best_phi
+            child_delta_threshold = min(phi_threshold,
+                                        int(second_delta * EPSILON_FACTOR) + 1)
+            board.play_move_gomoku(moves[best], board.current_player)
+            try:
+                self._mid(child_phi_threshold, child_delta_threshold)
+            finally:
+                board.undo_move()
+
+"""
+The ProofSearch objects of the last call to solve
+"""
+last_searches = []
+
+def solve(board, table=None, deadline=None):
+    """
+    Same results as alphabeta.solve:
+    True,winning_move,None or have_draw,"NoMove",draw_move,
+    result,"First",None if the game is already over, and
+    None,"Unknown",None if the deadline passes first.
+    """
+    global last_searches
+    if table is None:
+        table = proof_table
+    last_searches = []
+    result = game_end(board)
+    if result is not None:
+        return result,"First",None
+    # alphabeta with a candidate distance stores results that are not exact
+    stored = lookup_solve(board, exact_only=True)
+    if stored is not None:
+        return stored
+    result = _solve_root(board, table, deadline)
+    store_solve(board, result, exact=True)
+    return result
+
+def _solve_root(board, table, deadline):
+    line = find_threat_win(board, deadline=deadline)
+    if line is not None:
+        return True,line[0],None
+    to_play = board.current_player
+    try:
+        for attacker in [to_play, GoBoardUtil.opponent(to_play)]:
+            search = ProofSearch(board, attacker, table, deadline)
+            last_searches.append(search)
+            wins = search.prove()
+            if attacker == to_play and wins:
+                return True,search.proving_move(),None
+            if attacker != to_play:
+                if wins:
+                    return False,"NoMove",None
+                return True,"NoMove",search.proving_move()
+    except SolveTimeout:
+        return None,"Unknown",None
@@ -13,6 +13,16 @@ from board_util import GoBoardUtil, BLACK, WHITE, EMPTY, BORDER, PASS, \
 import numpy as np
 import re
 import signal
+import multiprocessing
+from timeit import default_timer as timer
+from simple_board import SOLVERS, PATTERN_ENGINES
+import alphabeta
+import json
+
+"""
+Seconds kept free of the timelimit in solve, to send the response
+"""
+SOLVE_TIME_MARGIN = 0.1
 
 class GtpConnection():
 
@@ -56,9 +66,20 @@ class GtpConnection():
             "solve": self.solve_cmd,
             "list_solve_point": self.list_solve_point_cmd, # below is added for Gomoku3
             "policy": self.set_playout_policy, 
-            "policy_moves": self.display_pattern_moves
+            "policy_moves": self.display_pattern_moves,
+            "pattern_engine": self.pattern_engine_cmd,
+            "batch_playouts": self.batch_playouts_cmd,
+            "move_search": self.move_search_cmd,
+            "playout_workers": self.playout_workers_cmd,
+            "rave": self.rave_cmd,
+            "solver": self.solver_cmd,
+            "solve_workers": self.solve_workers_cmd,
+            "solve_stats": self.solve_stats_cmd,
+            "solve_log": self.solve_log_cmd,
+            "solve_trace": self.solve_trace_cmd
         }
         self.timelimit=60
+        self.go_engine.set_timelimit(self.timelimit)
 
         # used for argument checking
         # values: (required number of arguments, 
@@ -70,7 +91,16 @@ class GtpConnection():
             "genmove": (1, 'Usage: genmove {w,b}'),
             "play": (2, 'Usage: play {b,w} MOVE'),
             "legal_moves": (1, 'Usage: legal_moves {w,b}'),
-            "policy":(1, 'Usage: set playout policy {random, rule_based}')
+            "policy":(1, 'Usage: set playout policy {random, rule_based}'),
+            "pattern_engine":(1, 'Usage: pattern_engine {line_codes, automaton}'),
+            "batch_playouts":(1, 'Usage: batch_playouts INT'),
+            "move_search":(1, 'Usage: move_search {uct, flat}'),
+            "playout_workers":(1, 'Usage: playout_workers INT (0 for all cores)'),
+            "rave":(1, 'Usage: rave {on, off}'),
+            "solver":(1, 'Usage: solver {alphabeta, dfpn}'),
+            "solve_workers":(1, 'Usage: solve_workers INT (0 for all cores)'),
+            "solve_log":(1, 'Usage: solve_log {FILE, off}'),
+            "solve_trace":(1, 'Usage: solve_trace {FILE, off}')
         }
     
     def set_playout_policy(self, args):
@@ -78,6 +108,116 @@ class GtpConnection():
         self.go_engine.set_playout_policy(playout_policy)
         self.respond()
 
+    def pattern_engine_cmd(self, args):
+        pattern_engine=args[0]
+        if pattern_engine not in PATTERN_ENGINES:
+            self.error('Usage: pattern_engine {line_codes, automaton}')
+            return
+        self.board.set_pattern_engine(pattern_engine)
+        self.respond()
+
+    def move_search_cmd(self, args):
+        """
+        How genmove spends its simulations: uct or flat
+        """
+        move_search=args[0]
+        if move_search not in ('uct', 'flat'):
+            self.error('Usage: move_search {uct, flat}')
+            return
+        self.go_engine.set_move_search(move_search)
+        self.respond()
+
+    def solver_cmd(self, args):
+        solver=args[0]
+        if solver not in SOLVERS:
+            self.error('Usage: solver {alphabeta, dfpn}')
+            return
+        self.board.set_solver(solver)
+        self.respond()
+
+    def solve_stats_cmd(self, args):
+        """
+        The statistics of the last alphabeta solve, as JSON
+        """
+        if alphabeta.last_search is None:
+            self.respond('{}')
+            return
+        self.respond(json.dumps(alphabeta.last_search.stats()))
+
+    def solve_log_cmd(self, args):
+        """
+        Append the statistics of every alphabeta solve to a file,
+        one JSON line each
+        """
+        alphabeta.stats_log = None if args[0] == 'off' else args[0]
+        self.respond()
+
+    def solve_trace_cmd(self, args):
+        """
+        Append every node searched by alphabeta solves to a file,
+        see alphabeta.trace_path
+        """
+        alphabeta.trace_path = None if args[0] == 'off' else args[0]
+        self.respond()
+
+    def solve_workers_cmd(self, args):
+        """
+        Number of processes the alphabeta solver splits the root moves
+        between, 0 for one per core
+        """
+        try:
+            workers=int(args[0])
+        except ValueError:
+            self.error('Usage: solve_workers INT (0 for all cores)')
+            return
+        if workers < 0:
+            self.error('Usage: solve_workers INT (0 for all cores)')
+            return
+        self.board.set_workers(workers or multiprocessing.cpu_count())
+        self.respond()
+
+    def playout_workers_cmd(self, args):
+        """
+        Number of processes that run the simulations of genmove,
+        0 for one per core
+        """
+        try:
+            workers=int(args[0])
+        except ValueError:
+            self.error('Usage: playout_workers INT (0 for all cores)')
+            return
+        if workers < 0:
+            self.error('Usage: playout_workers INT (0 for all cores)')
+            return
+        self.go_engine.set_workers(workers or multiprocessing.cpu_count())
+        self.respond()
+
+    def rave_cmd(self, args):
+        """
+        Blend all-moves-as-first statistics into the move choice of
+        genmove, on or off
+        """
+        if args[0] not in ('on', 'off'):
+            self.error('Usage: rave {on, off}')
+            return
+        self.go_engine.set_rave(args[0] == 'on')
+        self.respond()
+
+    def batch_playouts_cmd(self, args):
+        """
+        Number of batched random playouts per move in genmove, 0 to turn off
+        """
+        try:
+            batch_size=int(args[0])
+        except ValueError:
+            self.error('Usage: batch_playouts INT')
+            return
+        if batch_size < 0:
+            self.error('Usage: batch_playouts INT')
+            return
+        self.go_engine.set_batch_size(batch_size)
+        self.respond()
+
     def display_pattern_moves(self, args):
         game_end, winner = self.board.check_game_end_gomoku()
         color=self.board.current_player
@@ -87,8 +227,7 @@ class GtpConnection():
             else:
                 self.respond("")
             return
-        all_moves=self.board.get_empty_points()
-        if len(all_moves) == 0:
+        if self.board.is_board_full():
             self.respond('')
             return
         moveType, moves=self.go_engine.policy_moves(self.board, color)
@@ -177,6 +316,7 @@ class GtpConnection():
         Reset the board to empty board of given size
         """
         self.board.reset(size)
+        self.go_engine.new_game()
 
     def board2d(self):
         return str(GoBoardUtil.get_twoD_board(self.board))
@@ -274,6 +414,7 @@ class GtpConnection():
                 self.respond("illegal move: \"{}\" occupied".format(board_move))
                 return
             else:
+                self.go_engine.move_played(move)
                 self.debug_msg("Move: {}\nBoard:\n{}\n".
                                 format(board_move, self.board2d()))
             self.respond()
@@ -281,7 +422,16 @@ class GtpConnection():
             self.respond('{}'.format(str(e)))
 
     def timelimit_cmd(self, args):
-        self.timelimit = args[0]
+        """
+        Seconds per move for genmove and solve
+        """
+        try:
+            timelimit = float(args[0])
+        except ValueError:
+            self.error('Usage: timelimit FLOAT')
+            return
+        self.timelimit = timelimit
+        self.go_engine.set_timelimit(timelimit)
         self.respond('')
 
     def handler(self, signum, fram):
@@ -289,21 +439,30 @@ class GtpConnection():
         raise Exception("unknown")
 
     def solve_cmd(self, args):
+        """
+        Solve the position within timelimit seconds, or respond unknown.
+        The solver checks the deadline itself and takes back its moves,
+        so the board is unchanged and what it proved stays in its table.
+        With solve_workers, every worker searches until the same
+        deadline, so the search time grows with the number of cores.
+        """
+        deadline = timer() + float(self.timelimit) - SOLVE_TIME_MARGIN
         try:
-            self.sboard = self.board.copy()
-            signal.alarm(int(self.timelimit)-1)
-            winner,move = self.board.solve()
-            self.board = self.sboard
-            signal.alarm(0)
-            if move != "NoMove":
-                if move == None:
-                    self.respond('{} {}'.format(winner, self.board._point_to_coord(move)))
-                    return 
-                self.respond('{} {}'.format(winner, format_point(point_to_coord(move, self.board.size))))
-                return 
-            self.respond('{}'.format(winner))
+            winner,move = self.board.solve(deadline)
         except Exception as e:
-            self.respond('{}'.format(str(e)))
+            # the solver takes back its moves as the error unwinds it,
+            # so the board is still the position to solve
+            self.debug_msg("Error in solve {}\n{}\n".format(str(e),
+                           traceback.format_exc()))
+            self.respond('unknown')
+            return
+        if move != "NoMove":
+            if move == None:
+                self.respond('{} {}'.format(winner, self.board._point_to_coord(move)))
+                return 
+            self.respond('{} {}'.format(winner, format_point(point_to_coord(move, self.board.size))))
+            return 
+        self.respond('{}'.format(winner))
 
     def genmove_cmd(self, args):
         """
@@ -318,19 +477,23 @@ class GtpConnection():
             else:
                 self.respond("resign")
             return
-        moves = self.board.get_empty_points()
-        board_is_full = (len(moves) == 0)
+        board_is_full = self.board.is_board_full()
         if board_is_full:
             self.respond("pass")
             return
         move=None
         try:
-            signal.alarm(int(self.timelimit))
+            # the engine stops at the deadline of its time manager, the
+            # alarm at the full timelimit is only a backstop
+            signal.setitimer(signal.ITIMER_REAL, float(self.timelimit))
             self.sboard = self.board.copy()
             move = self.go_engine.get_move(self.board, color)
             self.board=self.sboard
-            signal.alarm(0)
+            signal.setitimer(signal.ITIMER_REAL, 0)
         except Exception as e:
+            # the alarm may have stopped the search in the middle of
+            # changing the tree
+            self.go_engine.tree=None
             move=self.go_engine.best_move
 
         if move == PASS:
@@ -340,6 +503,7 @@ class GtpConnection():
         move_as_string = format_point(move_coord)
         if self.board.is_legal_gomoku(move, color):
             self.board.play_move_gomoku(move, color)
+            self.go_engine.move_played(move)
             self.respond(move_as_string)
         else:
             self.respond("illegal move: {}".format(move_as_string))
@@ -386,7 +550,7 @@ class GtpConnection():
         for row in range(size-1, -1, -1):
             start = self.board.row_start(row + 1)
             for i in range(size):
-                point = self.board.board[start + i]
+                point = self.board.get_color(start + i)
                 if point == BLACK:
                     str += 'X'
                 elif point == WHITE:
@@ -400,8 +564,7 @@ class GtpConnection():
     
     def gogui_rules_final_result_cmd(self, args):
         game_end, winner = self.board.check_game_end_gomoku()
-        moves = self.board.get_empty_points()
-        board_full = (len(moves) == 0)
+        board_full = self.board.is_board_full()
         if board_full and not game_end:
             self.respond("draw")
             return
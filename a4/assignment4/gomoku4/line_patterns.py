@@ -0,0 +1,141 @@
+"""
+line_patterns.py
+
+Gomoku pattern matching on packed line codes.
+
+Every row, column and diagonal of the board that can hold five stones
+is a line. The contents of a line are packed into one integer, with
+the color of the i-th point of the line (EMPTY, BLACK or WHITE) as the
+i-th base 3 digit. A board keeps one code per line and updates it
+with a single addition when a stone is played or taken back.
+
+The moves a pattern list finds in a line only depend on the line code
+and the color to play, so they are looked up in a table instead of
+matching the pattern strings point by point.
+"""
+
+from board_util import EMPTY, coord_to_point, GoBoardUtil
+
+"""
+Lines shorter than this can not contain any pattern
+"""
+MIN_LINE_LENGTH = 5
+
+class BoardLines(object):
+    """
+    The lines of a board of a given size, in the padded 1-dimensional
+    point layout of board_util.coord_to_point.
+
+    lines: list of lines, each one a list of points in increasing order,
+           so the pattern strings read the line in the same direction
+           as the padded board.
+    point_lines: for each point, the list of (line index, 3 ** position)
+                 of the lines through that point.
+    """
+    def __init__(self, size):
+        NS = size + 1
+        maxpoint = size * size + 3 * (size + 1)
+        on_board = [False] * maxpoint
+        for row in range(1, size + 1):
+            for col in range(1, size + 1):
+                on_board[coord_to_point(row, col, size)] = True
+        self.size = size
+        self.lines = []
+        self.point_lines = [[] for _ in range(maxpoint)]
+        # horizontal, vertical, y=x and y=-x
+        for shift in [1, NS, NS + 1, NS - 1]:
+            for start in range(maxpoint):
+                if not on_board[start] or on_board[start - shift]:
+                    continue
+                line = []
+                point = start
+                while point < maxpoint and on_board[point]:
+                    line.append(point)
+                    point += shift
+                if len(line) < MIN_LINE_LENGTH:
+                    continue
+                for position, p in enumerate(line):
+                    self.point_lines[p].append((len(self.lines), 3 ** position))
+                self.lines.append(line)
+
+_board_lines = {}
+
+def board_lines(size):
+    """
+    The BoardLines of the given size. They never change, so one
+    object is shared by all boards of that size.
+    """
+    if size not in _board_lines:
+        _board_lines[size] = BoardLines(size)
+    return _board_lines[size]
+
+class PatternTable(object):
+    """
+    Lookup table from a line code to the moves found by a pattern list.
+
+    pattern_list has the format used by SimpleGoBoard: a list of four
+    dicts from a pattern string to the set of move offsets, counted from
+    the end of the pattern. In the pattern strings 'x' is a stone of the
+    color to play, 'o' an opponent stone, '.' an empty point and 'B' the
+    border just outside the line.
+    Entries are computed the first time a line code is seen and kept
+    for all later queries.
+    """
+    def __init__(self, pattern_list):
+        self.pattern_list = pattern_list
+        self.table = {}
+        self.pairs = {}
+
+    def line_moves(self, length, code, color):
+        """
+        Return a tuple with, for each of the four pattern classes,
+        the tuple of positions in the line of the moves found.
+        """
+        key = (length, code, color)
+        moves = self.table.get(key)
+        if moves is None:
+            moves = self._match(self._line_string(length, code, color))
+            self.table[key] = moves
+        return moves
+
+    def line_move_pairs(self, length, code, color):
+        """
+        The moves of line_moves as one tuple of (pattern class, position)
+        pairs, empty for the many lines without a pattern, which makes
+        it faster to go through.
+        """
+        key = (length, code, color)
+        pairs = self.pairs.get(key)
+        if pairs is None:
+            moves = self.line_moves(length, code, color)
+            pairs = tuple((i, position) for i in range(0, 4)
+                          for position in sorted(moves[i]))
+            self.pairs[key] = pairs
+        return pairs
+
+    def _line_string(self, length, code, color):
+        opp_color = GoBoardUtil.opponent(color)
+        line = 'B'
+        for _ in range(length):
+            code, piece = divmod(code, 3)
+            if piece == EMPTY:
+                line += '.'
+            elif piece == color:
+                line += 'x'
+            else:
+                assert piece == opp_color
+                line += 'o'
+        return line + 'B'
+
+    def _match(self, line):
+        moves = [set(), set(), set(), set()]
+        for i in range(0, 4):
+            for pattern, offsets in self.pattern_list[i].items():
+                start = line.find(pattern)
+                while start >= 0:
+                    end = start + len(pattern) - 1
+                    for dis in offsets:
+                        # -1 for the border at the start of line
+                        moves[i].add(end - dis - 1)
+                    start = line.find(pattern, start + 1)
+        return tuple(tuple(sorted(m)) for m in moves)
@@ -0,0 +1,502 @@
+"""
+mcts.py
+
+Monte Carlo tree search with UCT for genmove.
+
+Each simulation walks down the tree from the root, picking the child
+with the best UCB1 value, adds the children of the leaf it reaches,
+plays one playout from there and backs the result up the path. So the
+playouts go where the moves look best, instead of the same number to
+every legal move as in flat Monte Carlo.
+
+The tree is kept in parallel arrays indexed by node, and the children
+of a node are one block of consecutive nodes, added at once when the
+node is expanded. A node only has children for the candidate moves:
+the wins, or the blocks of the opponent's wins, if there are any,
+else the empty points near a stone.
+
+A search is kept from one move of the game to the next: advance makes
+the child for the move played the new root, and only its subtree is
+kept, so the simulations already spent below it are not lost.
+
+RAVE: every move of a simulation, in the tree or in the playout, is
+also counted, all-moves-as-first (AMAF), for the children with that
+move of the nodes on the path where the same player was to move. So
+one playout gives statistics to many moves, not just to one. UCB1
+blends the AMAF win rate of a child with its own, trusting AMAF less
+as the child gets more visits (Gelly and Silver, 2007).
+AMAFTable keeps the same statistics for flat Monte Carlo.
+"""
+
+import random
+from array import array
+from math import log, sqrt
+from timeit import default_timer as timer
+from board_util import GoBoardUtil, BLACK, WHITE, EMPTY
+from move_ordering import MoveOrdering
+
+"""
+Exploration constant of UCB1, for results scored 1 win, 0.5 draw, 0 loss
+"""
+EXPLORATION = 0.7
+
+"""
+Distance from the nearest stone of the moves expanded in the tree
+"""
+CANDIDATE_DISTANCE = 1
+
+"""
+Pattern classes of board.get_pattern_moves that leave no other move:
+a win, and the block of a win of the opponent
+"""
+FORCED_CLASSES = (0, 1)
+
+"""
+RAVE: the number of visits at which a child's own win rate and its
+AMAF win rate count the same, and the AMAF win rate of a move with
+no AMAF statistics yet
+"""
+RAVE_EQUIVALENCE = 50
+FIRST_PLAY_URGENCY = 1.0
+
+def rave_beta(visits):
+    """
+    The weight of the AMAF win rate for a move with visits visits
+    """
+    return sqrt(RAVE_EQUIVALENCE / (3 * visits + RAVE_EQUIVALENCE))
+
+"""
+Marks a node that is not expanded yet
+"""
+NO_CHILDREN = -1
+
+class NodeStore(object):
+    """
+    The nodes of a search tree, in arrays indexed by node.
+    move: the move that leads to the node, from its parent
+    parent: the parent node, -1 for the root
+    first_child: the first node of the block of children,
+                 NO_CHILDREN if the node is not expanded
+    num_children: the number of children
+    visits: the number of simulations through the node
+    wins: the results of those simulations for the player who played
+          move, 1 for a win and 0.5 for a draw
+    amaf_visits, amaf_wins: the same for the simulations through the
+          parent in which that player played move at any later turn
+    """
+    def __init__(self):
+        self.move = array('i')
+        self.parent = array('i')
+        self.first_child = array('i')
+        self.num_children = array('i')
+        self.visits = array('i')
+        self.wins = array('d')
+        self.amaf_visits = array('i')
+        self.amaf_wins = array('d')
+
+    def add(self, move, parent):
+        node = len(self.move)
+        self.move.append(move)
+        self.parent.append(parent)
+        self.first_child.append(NO_CHILDREN)
+        self.num_children.append(0)
+        self.visits.append(0)
+        self.wins.append(0.0)
+        self.amaf_visits.append(0)
+        self.amaf_wins.append(0.0)
+        return node
+
+    def add_children(self, node, moves):
+        """
+        Add one child of node for each of moves, as one block
+        """
+        first = len(self.move)
+        count = len(moves)
+        self.move.extend(moves)
+        self.parent.extend([node] * count)
+        self.first_child.extend([NO_CHILDREN] * count)
+        self.num_children.extend([0] * count)
+        self.visits.extend([0] * count)
+        self.wins.extend([0.0] * count)
+        self.amaf_visits.extend([0] * count)
+        self.amaf_wins.extend([0.0] * count)
+        self.first_child[node] = first
+        self.num_children[node] = count
+
+    def subtree(self, root):
+        """
+        A new store with the nodes below root, and root as node 0
+        """
+        store = NodeStore()
+        store.add(self.move[root], -1)
+        store.visits[0] = self.visits[root]
+        store.wins[0] = self.wins[root]
+        store.amaf_visits[0] = self.amaf_visits[root]
+        store.amaf_wins[0] = self.amaf_wins[root]
+        # (node here, node in store), parents before children
+        queue = [(root, 0)]
+        for node, copy in queue:
+            if self.first_child[node] == NO_CHILDREN:
+                continue
+            children = self.children(node)
+            first = len(store)
+            store.add_children(copy, [self.move[child] for child in children])
+            for i, child in enumerate(children):
+                store.visits[first + i] = self.visits[child]
+                store.wins[first + i] = self.wins[child]
+                store.amaf_visits[first + i] = self.amaf_visits[child]
+                store.amaf_wins[first + i] = self.amaf_wins[child]
+                queue.append((child, first + i))
+        return store
+
+    def children(self, node):
+        first = self.first_child[node]
+        if first == NO_CHILDREN:
+            return range(0)
+        return range(first, first + self.num_children[node])
+
+    def __len__(self):
+        return len(self.move)
+
+def random_playout(board, rng=random, moves=None):
+    """
+    Play uniformly random moves to the end of the game and undo them.
+    Returns the winner, or EMPTY for a draw.
+    moves: a list the moves played are appended to
+    """
+    played = 0
+    try:
+        while True:
+            game_end, winner = board.check_game_end_gomoku()
+            if game_end:
+                return winner
+            empty = board.empty_points
+            if not empty:
+                return EMPTY
+            move = empty[int(rng.random() * len(empty))]
+            board.play_move_gomoku(move, board.current_player)
+            played += 1
+            if moves is not None:
+                moves.append(move)
+    finally:
+        for _ in range(played):
+            board.undo_move()
+
+def rule_based_playout(board, rng=random, moves=None):
+    """
+    Same as random_playout, but plays the moves of
+    board.get_pattern_moves when there are any
+    """
+    played = 0
+    try:
+        while True:
+            game_end, winner = board.check_game_end_gomoku()
+            if game_end:
+                return winner
+            empty = board.empty_points
+            if not empty:
+                return EMPTY
+            ret = board.get_pattern_moves()
+            if ret is not None:
+                pattern_moves = ret[1]
+                move = pattern_moves[int(rng.random() * len(pattern_moves))]
+            else:
+                move = empty[int(rng.random() * len(empty))]
+            board.play_move_gomoku(move, board.current_player)
+            played += 1
+            if moves is not None:
+                moves.append(move)
+    finally:
+        for _ in range(played):
+            board.undo_move()
+
+PLAYOUTS = {'random': random_playout, 'rule_based': rule_based_playout}
+
+class AMAFTable(object):
+    """
+    All-moves-as-first statistics of flat Monte Carlo, in one array per
+    color indexed by point: the number of playouts in which the color
+    played the point, and the sum of their results for the color.
+    """
+    def __init__(self, maxpoint):
+        self.visits = {color: [0] * maxpoint for color in (BLACK, WHITE)}
+        self.wins = {color: [0.0] * maxpoint for color in (BLACK, WHITE)}
+
+    def update(self, color, moves, result):
+        """
+        Count a game of moves, played in turn from color, with result
+        for color: 1 for a win, 0 for a draw and -1 for a loss, as in
+        the flat Monte Carlo of Gomoku4
+        """
+        opponent = GoBoardUtil.opponent(color)
+        for player, player_moves, player_result in \
+                [(color, moves[0::2], result), (opponent, moves[1::2], -result)]:
+            visits, wins = self.visits[player], self.wins[player]
+            for move in player_moves:
+                visits[move] += 1
+                wins[move] += player_result
+
+    def add(self, other):
+        """
+        Count the games of other, an AMAFTable of the same board size,
+        such as one of a worker of parallel_mcts.py
+        """
+        for color in (BLACK, WHITE):
+            self.visits[color] = [a + b for a, b in
+                                  zip(self.visits[color], other.visits[color])]
+            self.wins[color] = [a + b for a, b in
+                                zip(self.wins[color], other.wins[color])]
+
+    def win_rate(self, color, move, default=FIRST_PLAY_URGENCY):
+        visits = self.visits[color][move]
+        if visits == 0:
+            return default
+        return self.wins[color][move] / visits
+
+class UCTSearch(object):
+    """
+    A UCT search from the position of board for the player to move.
+    The board is changed during simulate, and given back unchanged.
+    playout: 'random' or 'rule_based'
+    rave: blend in the AMAF statistics
+    root_moves: the moves played to get to the root position
+    """
+    def __init__(self, board, playout='random', exploration=EXPLORATION,
+                 distance=CANDIDATE_DISTANCE, rng=random, rave=True):
+        self.board = board
+        self.playout_policy = playout
+        self.playout = PLAYOUTS[playout]
+        self.exploration = exploration
+        self.ordering = MoveOrdering(distance)
+        self.rng = rng
+        self.rave = rave
+        self.color = board.current_player
+        self.nodes = NodeStore()
+        self.nodes.add(0, -1)
+        self.simulations = 0
+        self.root_moves = list(board.moves)
+
+    def matches(self, board):
+        """
+        Whether the root is the position on board, with the same
+        player to move. A pass changes the player but not the moves.
+        """
+        return self.root_moves == board.moves \
+            and self.color == board.current_player
+
+    def advance(self, move):
+        """
+        Make the child for move the root and free the rest of the tree.
+        Returns False if the root has no child for move, and then
+        the search must not be used any more.
+        """
+        nodes = self.nodes
+        for child in nodes.children(0):
+            if nodes.move[child] == move:
+                self.nodes = nodes.subtree(child)
+                self.color = GoBoardUtil.opponent(self.color)
+                self.root_moves.append(move)
+                return True
+        return False
+
+    def candidates(self, board):
+        """
+        The moves of the children of a node with the position of board
+        """
+        ret = board.get_pattern_moves()
+        if ret is not None and ret[0] in FORCED_CLASSES:
+            return sorted(ret[1])
+        if not board.moves:
+            # the moves on an empty board are all the same up to symmetry
+            return board.drop_symmetric_moves(self.ordering.candidates(board))
+        return self.ordering.candidates(board)
+
+    def _select(self, node):
+        """
+        The child of node with the best UCB1 value, the first child
+        with no visits if there is one
+        """
+        if self.rave:
+            return self._select_rave(node)
+        nodes = self.nodes
+        visits, wins = nodes.visits, nodes.wins
+        first = nodes.first_child[node]
+        scale = self.exploration * sqrt(log(max(visits[node], 1)))
+        best, best_value = first, -1.0
+        for child in range(first, first + nodes.num_children[node]):
+            n = visits[child]
+            if n == 0:
+                return child
+            value = wins[child] / n + scale / sqrt(n)
+            if value > best_value:
+                best, best_value = child, value
+        return best
+
+    def _select_rave(self, node):
+        """
+        The child of node with the best UCB1 value of its win rate
+        blended with its AMAF win rate. A child with no visits counts
+        as one with a single visit and its AMAF win rate.
+        """
+        nodes = self.nodes
+        visits, wins = nodes.visits, nodes.wins
+        amaf_visits, amaf_wins = nodes.amaf_visits, nodes.amaf_wins
+        first = nodes.first_child[node]
+        scale = self.exploration * sqrt(log(max(visits[node], 1)))
+        best, best_value = first, -1.0
+        for child in range(first, first + nodes.num_children[node]):
+            n = visits[child]
+            amaf_n = amaf_visits[child]
+            amaf_rate = amaf_wins[child] / amaf_n if amaf_n \
+                        else FIRST_PLAY_URGENCY
+            if n == 0:
+                value = amaf_rate + scale
+            else:
+                beta = rave_beta(n)
+                value = (1 - beta) * wins[child] / n + beta * amaf_rate \
+                        + scale / sqrt(n)
+            if value > best_value:
+                best, best_value = child, value
+        return best
+
+    def simulate(self):
+        """
+        One simulation: select, expand, play out and back up
+        """
+        board = self.board
+        nodes = self.nodes
+        node = 0
+        path = [0]
+        # the moves of the simulation, in the tree and in the playout
+        moves = [] if self.rave else None
+        try:
+            while True:
+                game_end, winner = board.check_game_end_gomoku()
+                if game_end:
+                    break
+                if board.is_board_full():
+                    winner = EMPTY
+                    break
+                if nodes.first_child[node] == NO_CHILDREN:
+                    if nodes.visits[node] == 0 and node != 0:
+                        winner = self.playout(board, self.rng, moves)
+                        break
+                    nodes.add_children(node, self.candidates(board))
+                node = self._select(node)
+                board.play_move_gomoku(nodes.move[node], board.current_player)
+                path.append(node)
+        finally:
+            for _ in range(len(path) - 1):
+                board.undo_move()
+        self._backup(path, winner)
+        if self.rave:
+            self._backup_amaf(path, winner,
+                              [nodes.move[node] for node in path[1:]] + moves)
+        self.simulations += 1
+
+    def _backup(self, path, winner):
+        nodes = self.nodes
+        visits, wins = nodes.visits, nodes.wins
+        # the player who played the move into path[i]
+        mover = self.color if len(path) % 2 == 0 \
+                else GoBoardUtil.opponent(self.color)
+        for node in reversed(path):
+            visits[node] += 1
+            if winner == mover:
+                wins[node] += 1.0
+            elif winner == EMPTY:
+                wins[node] += 0.5
+            mover = GoBoardUtil.opponent(mover)
+
+    def _backup_amaf(self, path, winner, moves):
+        """
+        Count moves, the moves of a simulation through path, for the
+        children of the nodes on path: moves[i] is played from path[i]
+        """
+        nodes = self.nodes
+        first_child, num_children = nodes.first_child, nodes.num_children
+        amaf_visits, amaf_wins, move_of = \
+            nodes.amaf_visits, nodes.amaf_wins, nodes.move
+        # no point is played twice in a simulation
+        turn = {move: i for i, move in enumerate(moves)}
+        to_play = self.color
+        for i, node in enumerate(path):
+            first = first_child[node]
+            if first != NO_CHILDREN:
+                if winner == to_play:
+                    result = 1.0
+                elif winner == EMPTY:
+                    result = 0.5
+                else:
+                    result = 0.0
+                for child in range(first, first + num_children[node]):
+                    j = turn.get(move_of[child])
+                    # played later by the player to move at node
+                    if j is not None and j >= i and (j - i) % 2 == 0:
+                        amaf_visits[child] += 1
+                        amaf_wins[child] += result
+            to_play = GoBoardUtil.opponent(to_play)
+
+    def run(self, deadline=None, simulations=None, callback=None,
+            callback_interval=100, stop_when_decided=True):
+        """
+        Simulate until deadline, a timer() value, or until the given
+        number of simulations, whichever comes first, or until it
+        turns out the root has only one move. With neither, simulate
+        until stopped by an exception, such as the alarm of genmove.
+        stop_when_decided: also stop when the simulations left until
+        deadline, at the speed so far, can not change the best move.
+        callback is called with the search every callback_interval
+        simulations.
+        """
+        start = timer()
+        count = 0
+        while simulations is None or count < simulations:
+            now = timer()
+            # at least one simulation, even if the deadline has passed
+            if deadline is not None and now > deadline and count > 0:
+                break
+            if count % callback_interval == 0 and count > 0:
+                if callback is not None:
+                    callback(self)
+                if stop_when_decided and deadline is not None and \
+                        self.decided(count * (deadline - now) / (now - start)):
+                    break
+            self.simulate()
+            count += 1
+            if self.nodes.num_children[0] == 1:
+                break
+        return self.best_move()
+
+    def decided(self, simulations_left):
+        """
+        Whether the most visited root move stays the most visited
+        whatever root moves get simulations_left more simulations
+        """
+        nodes = self.nodes
+        visits = sorted((nodes.visits[child] for child in nodes.children(0)),
+                        reverse=True)
+        if len(visits) < 2:
+            return True
+        return visits[0] - visits[1] > simulations_left
+
+    def root_stats(self):
+        """
+        (move, visits, win rate) of each root move, most visited first
+        """
+        nodes = self.nodes
+        stats = [(nodes.move[child], nodes.visits[child],
+                  nodes.wins[child] / nodes.visits[child]
+                  if nodes.visits[child] else 0.0)
+                 for child in nodes.children(0)]
+        stats.sort(key=lambda stat: (-stat[1], -stat[2], stat[0]))
+        return stats
+
+    def best_move(self):
+        """
+        The most visited root move, None before the first simulation
+        """
+        stats = self.root_stats()
+        if not stats:
+            return None
+        return stats[0][0]
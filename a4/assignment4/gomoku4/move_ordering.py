@@ -0,0 +1,147 @@
+"""
+move_ordering.py
+
+Move ordering for the alphabeta solver.
+
+By default all empty points are searched, so the results of a solve
+are proven. A candidate distance restricts the search to the empty
+points near a stone: a move far from all stones rarely makes or stops
+a threat, so the search is faster, but its results are not proven and
+are stored in solved_db as not exact. The candidates are then
+ordered so the moves most likely to cause a beta cutoff come first:
+the best move stored in the transposition table, the killer moves of
+the ply, then by threat score and history score.
+
+The threat score counts the fours and threes a move makes or blocks.
+The history score of a move grows every time it causes a cutoff,
+more so near the root, where a cutoff saves more work. Killer moves
+are the last two moves that caused a cutoff at the same ply.
+
+In deterministic mode, equal moves are ordered by point, so a solve
+searches the same tree every time. Otherwise they are shuffled.
+"""
+
+import random
+from board_util import GoBoardUtil
+from board_geometry import board_geometry
+from threat_space import THREAT_TABLE, THREAT_AUTOMATON, \
+                         FIVE, FOUR, THREE_DEFENCE, THREE
+
+"""
+Default distance from the nearest stone of a candidate move, counted
+in king moves, None for all empty points, and the default mode
+"""
+CANDIDATE_DISTANCE = None
+DETERMINISTIC = True
+
+"""
+Threat score of a move for each pattern class of the player to move
+and of the opponent
+"""
+OWN_THREAT_SCORES = {FIVE: 64, FOUR: 16, THREE: 4}
+OPPONENT_THREAT_SCORES = {FIVE: 32, FOUR: 8, THREE_DEFENCE: 2, THREE: 1}
+
+"""
+(size, distance) -> for each point, the int with the bits of the
+points within distance set
+"""
+_nearby_bits = {}
+
+def nearby_bits(size, distance):
+    if (size, distance) not in _nearby_bits:
+        geometry = board_geometry(size)
+        bits = [0] * geometry.maxpoint
+        for point in geometry.board_points:
+            row, col = divmod(point, geometry.NS)
+            for other in geometry.board_points:
+                other_row, other_col = divmod(other, geometry.NS)
+                if max(abs(row - other_row), abs(col - other_col)) <= distance:
+                    bits[point] |= geometry.point_bit[other]
+        _nearby_bits[(size, distance)] = bits
+    return _nearby_bits[(size, distance)]
+
+class MoveOrdering(object):
+    """
+    The move ordering of one solve.
+    distance: candidates are within distance of a stone,
+              None to search all empty points
+    deterministic: break ties by point instead of at random
+    history: (color, move) -> history score
+    killers: ply -> the last two moves that caused a cutoff at that ply,
+             where the ply is the number of stones on the board
+    """
+    def __init__(self, distance=CANDIDATE_DISTANCE,
+                 deterministic=DETERMINISTIC, rng=random):
+        self.distance = distance
+        self.deterministic = deterministic
+        self.rng = rng
+        self.history = {}
+        self.killers = {}
+
+    def candidates(self, board):
+        """
+        The empty points within distance of a stone, in increasing
+        order. All empty points on an empty board.
+        """
+        moves = GoBoardUtil.generate_ordered_moves_gomoku(board)
+        if self.distance is None or not board.moves:
+            return moves
+        bits = nearby_bits(board.size, self.distance)
+        near = 0
+        for stone in board.moves:
+            near |= bits[stone]
+        point_bit = board.geometry.point_bit
+        return [move for move in moves if near & point_bit[move]]
+
+    def threat_scores(self, board):
+        """
+        move -> threat score, for the moves that have one
+        """
+        scores = {}
+        color = board.current_player
+        for player, class_scores in [(color, OWN_THREAT_SCORES),
+                (GoBoardUtil.opponent(color), OPPONENT_THREAT_SCORES)]:
+            move_sets = board.pattern_move_sets(THREAT_TABLE, THREAT_AUTOMATON,
+                                                player)
+            for pattern_class, score in class_scores.items():
+                for move in move_sets[pattern_class]:
+                    scores[move] = scores.get(move, 0) + score
+        return scores
+
+    def order(self, board, moves, best_move=None):
+        """
+        moves sorted for the player to move on board, best_move first
+        """
+        color = board.current_player
+        killers = self.killers.get(board.stone_count, ())
+        threats = self.threat_scores(board)
+        history = self.history
+        if self.deterministic:
+            moves = sorted(moves)
+        else:
+            moves = list(moves)
+            self.rng.shuffle(moves)
+        def key(move):
+            return (move == best_move, move in killers,
+                    threats.get(move, 0), history.get((color, move), 0))
+        # sorted is stable, also with reverse, so equal moves keep
+        # the order from above
+        return sorted(moves, key=key, reverse=True)
+
+    def generate(self, board, best_move=None):
+        """
+        The ordered candidate moves of the player to move
+        """
+        return self.order(board, self.candidates(board), best_move)
+
+    def cutoff(self, board, move):
+        """
+        Record that move of the player to move on board caused a cutoff
+        """
+        depth = len(board.empty_points)
+        key = (board.current_player, move)
+        self.history[key] = self.history.get(key, 0) + depth * depth
+        killers = self.killers.setdefault(board.stone_count, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+"""
+opening_book.py
+
+An opening book: the move to play in the positions of the first plies
+of a game, built offline and looked up in O(1) by genmove.
+
+The book has a move for every position of the first plies in which the
+player to move has only played book moves, whatever the opponent
+played. Positions are keyed by board.canonical_key and moves are
+stored for the canonical image, so one entry covers all 8 symmetric
+images of a position.
+
+The book is saved as a header and one fixed-size record per position.
+
+Building a book: python3 opening_book.py [--plies N] [--games N]
+                 [--solve-time SECONDS] [--workers N] [--out PATH]
+The first two moves are the hand-tuned openings genmove played before
+the book: black opens in the centre, and white takes the centre, or the
+point diagonally next to it if black took it. Every other book move is
+a threat-space win if there is one, else a win or draw proven by
+alphabeta within the solve time, else the candidate move with the best
+score in batched random playouts. The positions of
+one ply are evaluated in parallel by a pool of worker processes.
+"""
+
+import argparse
+import multiprocessing
+import os
+import struct
+import numpy as np
+from timeit import default_timer as timer
+from board_util import GoBoardUtil, BLACK, WHITE, EMPTY
+from simple_board import SimpleGoBoard
+from batch_playout import batch_playouts, playout_scores
+from move_ordering import MoveOrdering
+from threat_space import find_threat_win
+from transposition import TranspositionTable
+from parallel_solve import encode_position, decode_position
+import alphabeta
+
+MAGIC = b'GMKBOOK1'
+
+"""
+Record: canonical key, board size and the move in canonical coordinates
+"""
+RECORD = struct.Struct('<QBH')
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'opening_book.bin')
+
+class OpeningBook(object):
+    """
+    entries: (canonical key, size) -> move in canonical coordinates
+    """
+    def __init__(self):
+        self.entries = {}
+
+    @staticmethod
+    def load(path=DEFAULT_PATH):
+        """
+        The book saved at path, or an empty book if there is none
+        """
+        book = OpeningBook()
+        if not os.path.exists(path):
+            return book
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:len(MAGIC)] != MAGIC:
+            return book
+        data = data[len(MAGIC):]
+        data = data[:len(data) - len(data) % RECORD.size]
+        for key, size, move in RECORD.iter_unpack(data):
+            book.entries[(key, size)] = move
+        return book
+
+    def save(self, path=DEFAULT_PATH):
+        with open(path, 'wb') as f:
+            f.write(MAGIC)
+            for (key, size), move in sorted(self.entries.items()):
+                f.write(RECORD.pack(key, size, move))
+
+    def add(self, board, move):
+        key, transform = board.canonical_key()
+        self.entries[(key, board.size)] = \
+            board.geometry.symmetries[transform][move]
+
+    def lookup(self, board):
+        """
+        The book move of the player to move on board, or None
+        """
+        key, transform = board.canonical_key()
+        move = self.entries.get((key, board.size))
+        if move is None:
+            return None
+        geometry = board.geometry
+        return geometry.symmetries[geometry.inverse_symmetry[transform]][move]
+
+    def __len__(self):
+        return len(self.entries)
+
+def _hand_tuned_move(board):
+    """
+    The hand-tuned opening move of the player to move on board,
+    or None after the first two moves
+    """
+    center = (board.size + 1) // 2
+    if board.stone_count == 0:
+        return board.pt(center, center)
+    if board.stone_count == 1:
+        if board.get_color(board.pt(center, center)) == EMPTY:
+            return board.pt(center, center)
+        return board.pt(center - 1, center - 1)
+    return None
+
+def _book_move(task):
+    """
+    Runs in a worker: the book move of the player to move
+    in the encoded position
+    """
+    encoding, games, solve_time = task
+    board = decode_position(encoding)
+    line = find_threat_win(board)
+    if line is not None:
+        return line[0]
+    if solve_time > 0:
+        result, move, draw_move = alphabeta.solve(board, TranspositionTable(),
+                                    deadline=timer() + solve_time)
+        if result is True:
+            return move if move != "NoMove" else draw_move
+    color = board.current_player
+    ordering = MoveOrdering()
+    moves = board.drop_symmetric_moves(ordering.candidates(board))
+    # the same book every time for the same settings
+    rng = np.random.RandomState(board.canonical_key()[0] % 2**32)
+    best_score, best_move = None, None
+    for move in moves:
+        with board.try_move(move, color):
+            score = playout_scores(batch_playouts(board, games, rng),
+                                   color).mean()
+        if best_score is None or score > best_score:
+            best_score, best_move = score, move
+    return best_move
+
+def build_book(size=7, plies=4, games=400, solve_time=0.0, workers=None,
+               verbose=False):
+    """
+    The book of the positions with fewer than plies stones in which the
+    player to move has only played book moves, for either color.
+    games: random playouts per candidate move
+    solve_time: seconds of alphabeta per position, 0 to not solve
+    workers: processes, one per core by default
+    """
+    book = OpeningBook()
+    # the positions of this ply by canonical key, with the colors of
+    # the players who only played book moves to get there
+    empty = SimpleGoBoard(size)
+    level = {empty.canonical_key()[0]: (empty, {BLACK, WHITE})}
+    pool = multiprocessing.Pool(workers)
+    try:
+        for ply in range(plies):
+            to_book = []
+            for board, colors in level.values():
+                if board.current_player not in colors:
+                    continue
+                move = _hand_tuned_move(board)
+                if move is not None:
+                    book.add(board, move)
+                else:
+                    to_book.append(board)
+            start = timer()
+            moves = pool.map(_book_move,
+                [(encode_position(board), games, solve_time)
+                 for board in to_book])
+            for board, move in zip(to_book, moves):
+                book.add(board, move)
+            if verbose:
+                print("ply {}: {} positions {:.1f} s".format(
+                      ply, len(to_book), timer() - start))
+            if ply + 1 < plies:
+                level = _next_level(book, level)
+    finally:
+        pool.terminate()
+    return book
+
+def _next_level(book, level):
+    """
+    The positions one move after those of level
+    """
+    next_level = {}
+    for board, colors in level.values():
+        color = board.current_player
+        book_key = None
+        if color in colors:
+            with board.try_move(book.lookup(board), color):
+                book_key = board.canonical_key()[0]
+        for move in board.drop_symmetric_moves(
+                GoBoardUtil.generate_ordered_moves_gomoku(board)):
+            child = board.copy()
+            child.play_move_gomoku(move, color)
+            key = child.canonical_key()[0]
+            if key == book_key:
+                child_colors = set(colors)
+            else:
+                child_colors = colors - {color}
+            if not child_colors or child.check_game_end_gomoku()[0]:
+                continue
+            if key in next_level:
+                next_level[key][1].update(child_colors)
+            else:
+                next_level[key] = (child, child_colors)
+    return next_level
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='Build an opening book')
+    parser.add_argument('--size', type=int, default=7)
+    parser.add_argument('--plies', type=int, default=4)
+    parser.add_argument('--games', type=int, default=400)
+    parser.add_argument('--solve-time', type=float, default=0.0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default=DEFAULT_PATH)
+    args = parser.parse_args()
+    book = build_book(args.size, args.plies, args.games, args.solve_time,
+                      args.workers, verbose=True)
+    book.save(args.out)
+    print("{} positions written to {}".format(len(book), args.out))
@@ -0,0 +1,123 @@
+"""
+parallel_mcts.py
+
+Root-parallel Monte Carlo: every worker process runs its own
+simulations from the position, with its own random seed, and the wins
+and visits of the root moves are added up at the end.
+
+The workers either play flat Monte Carlo, the same number of playouts
+for each of the given moves with the playouts of the flat loop of
+Gomoku4, or grow their own UCT tree with mcts.py.
+They share no state while they run, so the number of simulations grows
+with the number of workers.
+
+The workers are a warm pool of parallel_solve.get_pool, apart from the
+one of solve, so no process is started for a move, and all workers
+stop at the same wall clock deadline.
+"""
+
+import random
+import time
+import numpy as np
+from timeit import default_timer as timer
+from parallel_solve import encode_position, decode_position, get_pool
+from mcts import UCTSearch, AMAFTable
+
+"""
+The player of the flat playouts in a worker, made on the first task
+"""
+_player = None
+
+def _flat_counts(board, moves, playout_policy, deadline, rave):
+    """
+    Score sums and visits of each of moves, from the playouts of
+    Gomoku4.GomokuSimulationPlayer.flat_playout given to the moves in
+    turn until deadline, checked before each playout. A win scores 1,
+    a draw 0 and a loss -1 for the player to move.
+    Also returns the AMAF statistics of the playouts if rave, else None.
+    """
+    global _player
+    # Gomoku4 imports this module
+    import Gomoku4
+    if _player is None:
+        _player = Gomoku4.GomokuSimulationPlayer()
+    _player.set_playout_policy(playout_policy)
+    color = board.current_player
+    Gomoku4.current_color = color
+    amaf = AMAFTable(board.maxpoint) if rave else None
+    wins = np.zeros(len(moves))
+    visits = np.zeros(len(moves))
+    while True:
+        for i, move in enumerate(moves):
+            if timer() > deadline:
+                return wins, visits, amaf
+            wins[i] += _player.flat_playout(board, move, color, amaf)
+            visits[i] += 1
+
+def _uct_counts(board, playout_policy, rng, deadline, rave):
+    """
+    The root moves of a UCT search until deadline, with their wins
+    and visits
+    """
+    search = UCTSearch(board, playout_policy, rng=rng, rave=rave)
+    search.run(deadline=deadline)
+    nodes = search.nodes
+    children = nodes.children(0)
+    return ([nodes.move[child] for child in children],
+            np.array([nodes.wins[child] for child in children]),
+            np.array([nodes.visits[child] for child in children], dtype=float))
+
+def _simulate(task):
+    """
+    Runs in a worker: (moves, wins, visits, amaf) of the root moves,
+    where amaf is the AMAFTable of flat with rave, else None
+    """
+    encoding, moves, move_search, playout_policy, rave, seed, wall_deadline \
+        = task
+    board = decode_position(encoding)
+    # timer() values can not be compared between processes
+    deadline = timer() + wall_deadline - time.time()
+    if move_search == 'flat':
+        # the flat playouts draw from the random module
+        random.seed(seed)
+        wins, visits, amaf = _flat_counts(board, moves, playout_policy,
+                                          deadline, rave)
+        return moves, wins, visits, amaf
+    rng = random.Random(seed)
+    return _uct_counts(board, playout_policy, rng, deadline, rave) + (None,)
+
+def search(board, workers, deadline, move_search='uct',
+           playout_policy='random', moves=None, rave=True, amaf=None):
+    """
+    Simulations from the position on board by workers processes until
+    deadline, a timer() value.
+    move_search: 'flat' plays out each of moves, 'uct' searches a tree
+    Returns (moves, wins, visits), where wins and visits are the sums
+    over the workers for each move, as arrays in the order of moves.
+    wins are score sums for flat, with -1 for a loss, and win counts
+    with 0.5 for a draw for uct.
+    For uct, moves are the root moves of the trees, in increasing order.
+    rave: use RAVE in the trees of uct, and for flat collect the AMAF
+    statistics of the workers in amaf, an mcts.AMAFTable
+    """
+    assert move_search == 'uct' or moves is not None
+    pool = get_pool(workers, 'simulate')
+    encoding = encode_position(board)
+    wall_deadline = time.time() + deadline - timer()
+    seed = random.getrandbits(32)
+    tasks = [(encoding, moves, move_search, playout_policy, rave, seed + i,
+              wall_deadline) for i in range(workers)]
+    counts = {}
+    for worker_moves, wins, visits, worker_amaf in \
+            pool.imap_unordered(_simulate, tasks):
+        if amaf is not None and worker_amaf is not None:
+            amaf.add(worker_amaf)
+        for move, move_wins, move_visits in zip(worker_moves, wins, visits):
+            total = counts.setdefault(move, [0.0, 0.0])
+            total[0] += move_wins
+            total[1] += move_visits
+    if moves is None:
+        moves = sorted(counts)
+    wins = np.array([counts.get(move, [0.0, 0.0])[0] for move in moves])
+    visits = np.array([counts.get(move, [0.0, 0.0])[1] for move in moves])
+    return moves, wins, visits
@@ -0,0 +1,190 @@
+"""
+parallel_solve.py
+
+Root-split parallel solving: the root moves of alphabeta.solve are
+searched at the same time by a pool of worker processes.
+
+Each task sends a compact encoding of the position, one byte per
+point, and the worker builds its own board from it. As soon as one
+worker proves a win the others are told to stop, so the first proof
+found is the answer. Once one worker proves a draw, the moves searched
+after it only look for a win, with a null window, as alphabeta.solve
+does after its first draw.
+
+The pool is started on the first parallel solve and kept warm, and
+each worker keeps its own transposition table from one solve to the
+next. All workers stop at the same wall clock deadline, so a time
+limit buys as many seconds of search as there are workers.
+"""
+
+import multiprocessing
+import time
+from timeit import default_timer as timer
+from board_util import EMPTY
+from threat_space import find_threat_win
+from move_ordering import MoveOrdering
+from solved_db import lookup_solve, store_solve
+import alphabeta
+from alphabeta import game_end, SolveTimeout, POLL_INTERVAL
+
+def encode_position(board):
+    """
+    A compact, picklable encoding of the position on board:
+    (board class, size, player to move, pattern engine, colors),
+    where colors has one byte per point, row by row.
+    """
+    colors = bytes(board.get_color(board.pt(row, col))
+                   for row in range(1, board.size + 1)
+                   for col in range(1, board.size + 1))
+    return (type(board), board.size, board.current_player,
+            board.pattern_engine, colors)
+
+def decode_position(encoding):
+    """
+    A new board with the position of encode_position
+    """
+    board_class, size, to_play, pattern_engine, colors = encoding
+    board = board_class(size)
+    board.set_pattern_engine(pattern_engine)
+    for i, color in enumerate(colors):
+        if color != EMPTY:
+            board.play_move_gomoku(board.pt(i // size + 1, i % size + 1), color)
+    board.current_player = to_play
+    return board
+
+"""
+Set in every worker when a win is found, and when a draw is found,
+cleared between solves
+"""
+_stop = None
+_draw = None
+
+def _init_worker(stop, draw):
+    global _stop, _draw
+    _stop, _draw = stop, draw
+
+class _WorkerSearch(alphabeta.Search):
+    """
+    A Search that also gives up when the other workers found a win
+    """
+    def count_node(self):
+        alphabeta.Search.count_node(self)
+        if self.nodes % POLL_INTERVAL == 0 and _stop.is_set():
+            raise SolveTimeout()
+
+def _solve_root_move(task):
+    """
+    Runs in a worker: the value of root move for the player to move,
+    or None if the search stopped first. After a draw was found the
+    value is an upper bound, where 0 means not a win.
+    Returns (move, value, exact, nodes), where exact is False for an
+    upper bound.
+    """
+    encoding, move, wall_deadline = task
+    board = decode_position(encoding)
+    deadline = None
+    if wall_deadline is not None:
+        # timer() values can not be compared between processes
+        deadline = timer() + wall_deadline - time.time()
+    table = alphabeta.transposition_table
+    table.new_search()
+    search = _WorkerSearch(table, deadline)
+    exact = not _draw.is_set()
+    alpha = -1 if exact else 0
+    board.play_move_gomoku(move, board.current_player)
+    try:
+        value = -alphabeta.StackSearch(board, -1, -alpha, search).run()
+    except SolveTimeout:
+        value = None
+    if value == 0 and exact:
+        _draw.set()
+    return move, value, exact, search.nodes
+
+"""
+The warm pools by purpose, 'solve' or 'simulate', as
+(pool, number of workers, stop event, draw event of the workers)
+"""
+_pools = {}
+
+def get_pool(workers, purpose='solve'):
+    """
+    The warm pool for purpose, started again if its number of workers
+    changed. parallel_mcts.py has a pool of its own, so that solves and
+    genmoves with different numbers of workers do not restart a pool
+    each time.
+    """
+    pool, pool_workers = _pools.get(purpose, (None, 0))[:2]
+    if pool is None or pool_workers != workers:
+        if pool is not None:
+            pool.terminate()
+        stop, draw = multiprocessing.Event(), multiprocessing.Event()
+        pool = multiprocessing.Pool(workers, _init_worker, (stop, draw))
+        _pools[purpose] = (pool, workers, stop, draw)
+    return pool
+
+"""
+The values found for the root moves by the last call to solve, by
+move, where None means the search stopped first and, for the moves
+searched after a draw was found, 0 means not a win, and the total
+number of nodes searched by the workers
+"""
+last_root_values = {}
+last_nodes = 0
+
+def solve(board, workers, deadline=None):
+    """
+    Same results as alphabeta.solve, with the root moves searched by
+    workers processes, and by alphabeta.solve itself for one worker.
+    The draw move is the first one proven to draw, which is not always
+    the first in move order that draws.
+    """
+    global last_root_values, last_nodes
+    last_root_values, last_nodes = {}, 0
+    if workers <= 1:
+        return alphabeta.solve(board, deadline=deadline)
+    result = game_end(board)
+    if result is not None:
+        return result,"First",None
+    stored = lookup_solve(board, exact_only=True)
+    if stored is not None:
+        return stored
+    line = find_threat_win(board, deadline=deadline)
+    if line is not None:
+        return True,line[0],None
+    solvePoint = board.list_solve_point()
+    if solvePoint:
+        moves = [solvePoint[0]]
+    else:
+        ordering = MoveOrdering()
+        moves = ordering.order(board,
+                    board.drop_symmetric_moves(ordering.generate(board)))
+    pool = get_pool(workers)
+    stop, draw = _pools['solve'][2:]
+    encoding = encode_position(board)
+    wall_deadline = None
+    if deadline is not None:
+        wall_deadline = time.time() + deadline - timer()
+    tasks = [(encoding, move, wall_deadline) for move in moves]
+    winning_move = drawMove = None
+    try:
+        for move, value, exact, nodes in \
+                pool.imap_unordered(_solve_root_move, tasks):
+            last_root_values[move] = value
+            last_nodes += nodes
+            if value == 1 and winning_move is None:
+                winning_move = move
+                stop.set()
+            elif value == 0 and exact and drawMove is None:
+                drawMove = move
+    finally:
+        # the loop waits for all tasks, so none is left for the next solve
+        stop.clear()
+        draw.clear()
+    if winning_move is not None:
+        result = True,winning_move,None
+    else:
+        if None in last_root_values.values():
+            return None,"Unknown",drawMove
+        result = drawMove is not None,"NoMove",drawMove
+    store_solve(board, result, exact=True)
+    return result
@@ -0,0 +1,105 @@
+"""
+pattern_automaton.py
+
+Gomoku pattern matching with an Aho-Corasick automaton.
+
+All pattern strings of a pattern list are compiled into one automaton,
+so a query reads each line of the board once, point by point, and
+finds the moves of all four pattern classes at the same time.
+Unlike the line codes in line_patterns.py it keeps no state on the
+board, it only needs the colors of the points.
+"""
+
+from collections import deque
+from board_util import EMPTY, GoBoardUtil
+
+"""
+Alphabet of the pattern strings: empty point, stone of the color to
+play, opponent stone, border
+"""
+SYMBOLS = {'.': 0, 'x': 1, 'o': 2, 'B': 3}
+NUM_SYMBOLS = len(SYMBOLS)
+BORDER_SYMBOL = SYMBOLS['B']
+
+class PatternAutomaton(object):
+    """
+    Automaton for a pattern list in the format used by SimpleGoBoard:
+    a list of four dicts from a pattern string to the set of move
+    offsets, counted from the end of the pattern.
+
+    delta: transition table, the next state is
+           delta[state * NUM_SYMBOLS + symbol]
+    outputs: for each state, the list of (pattern class, offsets)
+             of all patterns that end when that state is reached
+    """
+    def __init__(self, pattern_list):
+        goto = [[-1] * NUM_SYMBOLS]
+        self.outputs = [[]]
+        for i, patterns in enumerate(pattern_list):
+            for pattern, offsets in patterns.items():
+                state = 0
+                for c in pattern:
+                    symbol = SYMBOLS[c]
+                    if goto[state][symbol] == -1:
+                        goto[state][symbol] = len(goto)
+                        goto.append([-1] * NUM_SYMBOLS)
+                        self.outputs.append([])
+                    state = goto[state][symbol]
+                # a pattern only counts for the first class it is in
+                if not self.outputs[state]:
+                    self.outputs[state].append((i, tuple(sorted(offsets))))
+        self._add_failure_transitions(goto)
+        self.delta = [next_state for row in goto for next_state in row]
+
+    def _add_failure_transitions(self, goto):
+        """
+        Turn the trie into a complete automaton. States are visited
+        in breadth first order, so the failure state of a state is
+        always finished before the state itself.
+        """
+        fail = [0] * len(goto)
+        queue = deque()
+        for symbol in range(NUM_SYMBOLS):
+            if goto[0][symbol] == -1:
+                goto[0][symbol] = 0
+            else:
+                queue.append(goto[0][symbol])
+        while queue:
+            state = queue.popleft()
+            self.outputs[state] = self.outputs[state] + self.outputs[fail[state]]
+            for symbol in range(NUM_SYMBOLS):
+                next_state = goto[state][symbol]
+                if next_state == -1:
+                    goto[state][symbol] = goto[fail[state]][symbol]
+                else:
+                    fail[next_state] = goto[fail[state]][symbol]
+                    queue.append(next_state)
+
+    def scan(self, colors, lines, color):
+        """
+        Find the pattern moves for color to play.
+        colors: the color of each point, indexed by point
+        lines: the lines of the board, as in line_patterns.BoardLines
+        Returns a list of four sets of moves, one for each pattern class.
+        """
+        moveSet = [set(), set(), set(), set()]
+        symbol = [0] * NUM_SYMBOLS
+        symbol[EMPTY] = SYMBOLS['.']
+        symbol[color] = SYMBOLS['x']
+        symbol[GoBoardUtil.opponent(color)] = SYMBOLS['o']
+        delta = self.delta
+        outputs = self.outputs
+        for line in lines:
+            # position 0 is the border before the line, and
+            # position len(line) + 1 the border after it
+            state = delta[BORDER_SYMBOL]
+            for position, point in enumerate(line, 1):
+                state = delta[state * NUM_SYMBOLS + symbol[colors[point]]]
+                for i, offsets in outputs[state]:
+                    for dis in offsets:
+                        moveSet[i].add(line[position - dis - 1])
+            state = delta[state * NUM_SYMBOLS + BORDER_SYMBOL]
+            for i, offsets in outputs[state]:
+                for dis in offsets:
+                    moveSet[i].add(line[len(line) - dis])
+        return moveSet
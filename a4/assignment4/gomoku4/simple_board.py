@@ -10,16 +10,60 @@ The board uses a 1-dimensional representation with padding
 """
 
 import numpy as np
+import random
+from contextlib import contextmanager
 from board_util import GoBoardUtil, BLACK, WHITE, EMPTY, BORDER, \
                        PASS, is_black_white, coord_to_point, where1d, \
                        MAXSIZE, NULLPOINT
+from line_patterns import PatternTable
+from pattern_automaton import PatternAutomaton
+from board_geometry import board_geometry
 import alphabeta
+import dfpn
+import parallel_solve
+
+"""
+Patterns used by get_pattern_moves and list_solve_point.
+In the pattern strings 'x' is a stone of the player to move, 'o' an
+opponent stone, '.' an empty point and 'B' the border. The numbers are
+the offsets of the moves, counted from the end of the pattern.
+"""
+PATTERN_MOVES_LIST=[{'xxxx.':{0},'xxx.x':{1},'xx.xx':{2},'x.xxx':{3},'.xxxx':{4}}, #win
+                    {'oooo.':{0},'ooo.o':{1},'oo.oo':{2},'o.ooo':{3},'.oooo':{4}}, #block win
+                    {'.xxx..':{1},'..xxx.':{4},'.xx.x.':{2},'.x.xx.':{3}}, #make-four
+                    {'.ooo..':{1,5},'..ooo.':{0,4},'.oo.o.':{0,2,5},'.o.oo.':{0,3,5}, 'B.ooo..':{0}, '..ooo.B':{6},
+                    'x.ooo..':{0}, '..ooo.x':{6} #block-open-four
+                    }]
+
+SOLVE_POINT_LIST=[{'xxxx.':{0},'xxx.x':{1},'xx.xx':{2},'x.xxx':{3},'.xxxx':{4}},{'oooo.':{0},'ooo.o':{1},'oo.oo':{2},'o.ooo':{3},'.oooo':{4}},{'.xxx..':{1},'..xxx.':{4},'.xx.x.':{2},'.x.xx.':{3}},{'.ooo..':{1,5},'..ooo.':{0,4},'.oo.o.':{2},'.o.oo.':{3}}]
+
+PATTERN_MOVES_TABLE=PatternTable(PATTERN_MOVES_LIST)
+SOLVE_POINT_TABLE=PatternTable(SOLVE_POINT_LIST)
+PATTERN_MOVES_AUTOMATON=PatternAutomaton(PATTERN_MOVES_LIST)
+SOLVE_POINT_AUTOMATON=PatternAutomaton(SOLVE_POINT_LIST)
+
+"""
+Ways of finding pattern moves: look up the incrementally updated
+line codes, or scan the board with the pattern automaton
+"""
+PATTERN_ENGINES = ['line_codes', 'automaton']
+
+"""
+Solvers used by solve, all with the results of alphabeta.solve
+"""
+SOLVERS = {'alphabeta': alphabeta.solve, 'dfpn': dfpn.solve}
 
 class SimpleGoBoard(object):
 
     def get_color(self, point):
         return self.board[point]
 
+    def point_colors(self):
+        """
+        The color of each point as a list, indexed by point
+        """
+        return self.board.tolist()
+
     def pt(self, row, col):
         return coord_to_point(row, col, self.size)
 
@@ -64,6 +108,15 @@ class SimpleGoBoard(object):
         """
         return where1d(self.board == EMPTY)
 
+    def random_empty_point(self):
+        """
+        Return:
+            A random empty point, or PASS if the board is full
+        """
+        if not self.empty_points:
+            return PASS
+        return random.choice(self.empty_points)
+
     def get_same_color_points(self, color):
         """
         Return:
@@ -71,11 +124,21 @@ class SimpleGoBoard(object):
         """
         return where1d(self.board == color)
 
+    def get_board_points(self):
+        """
+        Return:
+            All points on the board, without the BORDER padding
+        """
+        return self.geometry.board_points
+
     def __init__(self, size):
         """
         Creates a Go board of given size
         """
         assert 2 <= size <= MAXSIZE
+        self.pattern_engine = 'line_codes'
+        self.solver = 'alphabeta'
+        self.workers = 1
         self.reset(size)
 
     def reset(self, size):
@@ -84,25 +147,91 @@ class SimpleGoBoard(object):
         The board is stored as a one-dimensional array
         See GoBoardUtil.coord_to_point for explanations of the array encoding
         """
+        self.geometry = board_geometry(size)
         self.size = size
-        self.NS = size + 1
-        self.WE = 1
+        self.NS = self.geometry.NS
+        self.WE = self.geometry.WE
         self.ko_recapture = None
         self.current_player = BLACK
-        self.maxpoint = size * size + 3 * (size + 1)
-        self.board = np.full(self.maxpoint, BORDER, dtype = np.int32)
+        self.winner = None
+        self.win_point = None
+        self.stone_count = 0
+        self.moves = []
+        self.maxpoint = self.geometry.maxpoint
+        self.board = np.copy(self.geometry.empty_board)
         self.liberty_of = np.full(self.maxpoint, NULLPOINT, dtype = np.int32)
-        self._initialize_empty_points(self.board)
-        self._initialize_neighbors()
+        self._initialize_empty_index()
+        self.neighbors = self.geometry.neighbors
+        self.lines = self.geometry.lines
+        self.line_codes = [0] * len(self.lines.lines)
+        self.zobrist = self.geometry.zobrist
+        self.stone_hash = 0
+
+    @property
+    def hash(self):
+        """
+        64 bit Zobrist key of the position, including the player to move
+        """
+        if self.current_player == WHITE:
+            return self.stone_hash ^ self.zobrist.white_to_play
+        return self.stone_hash
+
+    def _stones(self):
+        return [(self.get_color(point), point) for point in self.moves]
+
+    def canonical_key(self):
+        """
+        The smallest hash of the 8 symmetric images of the position,
+        and the index t of the symmetry that gives it:
+        geometry.symmetries[t] maps this position to the canonical one.
+        Mirrored or rotated positions have the same canonical key.
+        """
+        keys = self.zobrist.keys
+        stones = self._stones()
+        best_key, best_transform = None, None
+        for t, symmetry in enumerate(self.geometry.symmetries):
+            key = self.zobrist.white_to_play \
+                  if self.current_player == WHITE else 0
+            for color, point in stones:
+                key ^= keys[color][symmetry[point]]
+            if best_key is None or key < best_key:
+                best_key, best_transform = key, t
+        return best_key, best_transform
+
+    def symmetric_transforms(self):
+        """
+        Indices of the symmetries that map the position onto itself
+        """
+        stones = self._stones()
+        return [t for t, symmetry in enumerate(self.geometry.symmetries)
+                if all(self.get_color(symmetry[point]) == color
+                       for color, point in stones)]
+
+    def drop_symmetric_moves(self, moves):
+        """
+        Keep one move of each set of moves that are the same up to a
+        symmetry of the position: the one with the smallest point.
+        """
+        symmetries = [self.geometry.symmetries[t]
+                      for t in self.symmetric_transforms()[1:]]
+        if not symmetries:
+            return moves
+        return [move for move in moves
+                if all(symmetry[move] >= move for symmetry in symmetries)]
 
     def copy(self):
-        b = SimpleGoBoard(self.size)
-        assert b.NS == self.NS
-        assert b.WE == self.WE
-        b.ko_recapture = self.ko_recapture
-        b.current_player = self.current_player
-        assert b.maxpoint == self.maxpoint
+        """
+        The geometry is shared, only the board array and the
+        incremental state are copied.
+        """
+        b = SimpleGoBoard.__new__(SimpleGoBoard)
+        b.__dict__.update(self.__dict__)
         b.board = np.copy(self.board)
+        b.liberty_of = np.copy(self.liberty_of)
+        b.moves = list(self.moves)
+        b.line_codes = list(self.line_codes)
+        b.empty_points = list(self.empty_points)
+        b.empty_position = list(self.empty_position)
         return b
 
     def row_start(self, row):
@@ -110,36 +239,45 @@ class SimpleGoBoard(object):
         assert row <= self.size
         return row * self.NS + 1
         
-    def _initialize_empty_points(self, board):
+    def _initialize_empty_index(self):
         """
-        Fills points on the board with EMPTY
-        Argument
-        ---------
-        board: numpy array, filled with BORDER
-        """
-        for row in range(1, self.size + 1):
-            start = self.row_start(row)
-            board[start : start + self.size] = EMPTY
-
-    def _on_board_neighbors(self, point):
-        nbs = []
-        for nb in self._neighbors(point):
-            if self.board[nb] != BORDER:
-                nbs.append(nb)
-        return nbs
-            
-    def _initialize_neighbors(self):
+        Besides the board array, the empty points are kept in the list
+        empty_points, and empty_position[point] is the index of point
+        in that list. play_move_gomoku swap-removes the point from the
+        list and undo_move puts it back in the same place,
+        so both are O(1) and do not look at the rest of the board.
+        """
+        # called on the empty board, so all board points are empty
+        self.empty_points = list(self.geometry.board_points)
+        self.empty_position = [NULLPOINT] * self.maxpoint
+        for i, point in enumerate(self.empty_points):
+            self.empty_position[point] = i
+
+    def _remove_empty_point(self, point):
         """
-        precompute neighbor array.
-        For each point on the board, store its list of on-the-board neighbors
+        Swap-remove point from empty_points. empty_position[point]
+        keeps its old index, for _restore_empty_point.
         """
-        self.neighbors = []
-        for point in range(self.maxpoint):
-            if self.board[point] == BORDER:
-                self.neighbors.append([])
-            else:
-                self.neighbors.append(self._on_board_neighbors(point))
-        
+        i = self.empty_position[point]
+        last = self.empty_points.pop()
+        if last != point:
+            self.empty_points[i] = last
+            self.empty_position[last] = i
+
+    def _restore_empty_point(self, point):
+        """
+        Undo _remove_empty_point. Only correct when points are restored
+        in the reverse order they were removed.
+        """
+        i = self.empty_position[point]
+        if i == len(self.empty_points):
+            self.empty_points.append(point)
+        else:
+            moved = self.empty_points[i]
+            self.empty_position[moved] = len(self.empty_points)
+            self.empty_points.append(moved)
+            self.empty_points[i] = point
+
     def is_eye(self, point, color):
         """
         Check if point is a simple eye for color
@@ -316,10 +454,7 @@ class SimpleGoBoard(object):
 
     def _diag_neighbors(self, point):
         """ List of all four diagonal neighbors of point """
-        return [point - self.NS - 1, 
-                point - self.NS + 1, 
-                point + self.NS - 1, 
-                point + self.NS + 1]
+        return self.geometry.diag_neighbors[point]
     
     def _point_to_coord(self, point):
         """
@@ -355,8 +490,55 @@ class SimpleGoBoard(object):
         if self.board[point] != EMPTY:
             return False
         self.board[point] = color
+        self.stone_count += 1
+        self.moves.append(point)
+        self.stone_hash ^= self.zobrist.keys[color][point]
+        self._remove_empty_point(point)
+        for line_index, power in self.lines.point_lines[point]:
+            self.line_codes[line_index] += color * power
+        if self.winner is None and self.point_check_game_end_gomoku(point):
+            self.winner = color
+            self.win_point = point
         self.current_player = GoBoardUtil.opponent(color)
         return True
+
+    def undo_move(self):
+        """
+            Take back the last move played by play_move_gomoku.
+            Restores the stone count, winner, line codes, empty point index
+            and the player to move, so a search can play and undo moves
+            instead of copying the board.
+            """
+        point = self.moves.pop()
+        color = int(self.board[point])
+        assert is_black_white(color)
+        for line_index, power in self.lines.point_lines[point]:
+            self.line_codes[line_index] -= color * power
+        self.board[point] = EMPTY
+        self.stone_count -= 1
+        self.stone_hash ^= self.zobrist.keys[color][point]
+        self._restore_empty_point(int(point))
+        if point == self.win_point:
+            self.winner = None
+            self.win_point = None
+        self.current_player = color
+
+    @contextmanager
+    def try_move(self, point, color=None):
+        """
+            Play point for color, or for the player to move, inside a
+            with statement, and undo it at the end of the block:
+                with board.try_move(point) as legal:
+                    ...
+            """
+        if color is None:
+            color = self.current_player
+        legal = self.play_move_gomoku(point, color)
+        try:
+            yield legal
+        finally:
+            if legal:
+                self.undo_move()
         
     def _point_direction_check_connect_gomoko(self, point, shift):
         """
@@ -375,6 +557,8 @@ class SimpleGoBoard(object):
                     break
             else:
                 break
+        if count == 5:
+            return True
         d = -d
         p = point
         while True:
@@ -413,22 +597,33 @@ class SimpleGoBoard(object):
     def check_game_end_gomoku(self):
         """
             Check if the game ends for the game of Gomoku.
+            The winner is kept up to date by play_move_gomoku and
+            undo_move, so this does not scan the board.
             """
-        white_points = where1d(self.board == WHITE)
-        black_points = where1d(self.board == BLACK)
-        
-        for point in white_points:
-            if self.point_check_game_end_gomoku(point):
-                return True, WHITE
-    
-        for point in black_points:
-            if self.point_check_game_end_gomoku(point):
-                return True, BLACK
-
+        if self.winner is not None:
+            return True, self.winner
         return False, None
 
-    def solve(self):
-        result, move, drawMove = alphabeta.solve(self)
+    def is_board_full(self):
+        """
+            Check if there are no empty points left on the board.
+            """
+        return self.stone_count == self.size * self.size
+
+    def solve(self, deadline=None):
+        """
+        deadline: timer() value to give up at, or None for no limit.
+        Returns 'unknown','NoMove' when the deadline passes first.
+        With more than one worker, alphabeta splits the root moves
+        between worker processes.
+        """
+        if self.solver == 'alphabeta' and self.workers > 1:
+            result, move, drawMove = parallel_solve.solve(self, self.workers,
+                                                          deadline=deadline)
+        else:
+            result, move, drawMove = SOLVERS[self.solver](self, deadline=deadline)
+        if move=="Unknown":
+            return 'unknown','NoMove'
         if move=="First":
             if result==0:
                 return 'draw',drawMove
@@ -445,62 +640,62 @@ class SimpleGoBoard(object):
             winner='w' if self.current_player==WHITE else 'b'
             return winner, move
 
-    def check_pattern(self,point,have,direction_x,direction_y,moveSet,patternList,color,flag):
-        for i in range(0,4):
-            if have in patternList[i]:
-                for dis in patternList[i][have]:
-                    moveSet[i].add(point-direction_x*(dis+1)-direction_y*self.NS*(dis+1))
-                #flag[0]=True
-                break
-        if (not (0<= point<len(self.board))) or len(have)==9:
-            return
-#if self.get_color(point)==BORDER or len(have)==7:
-#            return
-        piece=self.get_color(point)
-        if piece==EMPTY:
-            piece='.'
-        elif piece==color:
-            piece='x'
-        elif piece == BORDER:
-            piece='B'
-        else:
-            piece='o'
-        have+=piece
-        #print(GoBoardUtil.format_point(self._point_to_coord(point)),have,self.board[point])
-        self.check_pattern(point+direction_x+direction_y*self.NS,have,direction_x,direction_y,moveSet,patternList,color,flag)
+    def set_solver(self, solver='alphabeta'):
+        assert(solver in SOLVERS)
+        self.solver=solver
 
-    def get_pattern_moves(self):
+    def set_workers(self, workers=1):
+        assert(workers >= 1)
+        self.workers=workers
+
+    def set_pattern_engine(self, pattern_engine='line_codes'):
+        assert(pattern_engine in PATTERN_ENGINES)
+        self.pattern_engine=pattern_engine
+
+    def pattern_move_sets(self, table, automaton, color):
         """
-        1. direct winning point xxxx. x.xxx xx.xx
-        2. urgent blocking point xoooo.
-        3. wining in 2 step point
+        The moves of a pattern list for color with the current pattern
+        engine: a list with the set of moves of each of the four
+        pattern classes.
         """
+        lines=self.lines.lines
+        if self.pattern_engine=='automaton':
+            return automaton.scan(self.point_colors(), lines, color)
         moveSet=[set(),set(),set(),set()]
-        color=self.current_player
-
-        patternList=[{'xxxx.':{0},'xxx.x':{1},'xx.xx':{2},'x.xxx':{3},'.xxxx':{4}}, #win
-                     {'oooo.':{0},'ooo.o':{1},'oo.oo':{2},'o.ooo':{3},'.oooo':{4}}, #block win
-                     {'.xxx..':{1},'..xxx.':{4},'.xx.x.':{2},'.x.xx.':{3}}, #make-four
-                     {'.ooo..':{1,5},'..ooo.':{0,4},'.oo.o.':{0,2,5},'.o.oo.':{0,3,5}, 'B.ooo..':{0}, '..ooo.B':{6},
-                     'x.ooo..':{0}, '..ooo.x':{6} #block-open-four
-                     }]
-
-        direction_x=[1,0,1,-1]
-        direction_y=[0,1,1,1]
-        flag=[False]
-
-        for point in range(0, len(self.board)):
-            if flag[0]:
-                break
-            for direction in range(0,4):
-                    self.check_pattern(point,'',direction_x[direction],direction_y[direction],moveSet,patternList,color,flag)
-        
+        pairs=table.pairs
+        for line_index, code in enumerate(self.line_codes):
+            if code == 0:
+                continue
+            line=lines[line_index]
+            found=pairs.get((len(line), code, color))
+            if found is None:
+                found=table.line_move_pairs(len(line), code, color)
+            for i, position in found:
+                moveSet[i].add(line[position])
+        return moveSet
+
+    def _find_pattern_moves(self, table, automaton):
+        """
+        Find the moves of a pattern list for the player to move.
+        Returns the pattern class of the first class that has moves,
+        and those moves. Returns None if no pattern is found.
+        """
+        moveSet=self.pattern_move_sets(table, automaton, self.current_player)
         i=0
-        while i<4 and not bool(moveSet[i]): i+=1
+        while i<4 and not bool(moveSet[i]):
+            i+=1
         if i==4:
             return None
         else:
             return i, list(moveSet[i])
+
+    def get_pattern_moves(self):
+        """
+        1. direct winning point xxxx. x.xxx xx.xx
+        2. urgent blocking point xoooo.
+        3. wining in 2 step point
+        """
+        return self._find_pattern_moves(PATTERN_MOVES_TABLE, PATTERN_MOVES_AUTOMATON)
             
     def list_solve_point(self):
         """
@@ -508,25 +703,7 @@ class SimpleGoBoard(object):
         2. urgent blocking point xoooo.
         3. wining in 2 step point
         """
-        moveSet=[set(),set(),set(),set()]
-        color=self.current_player
-
-        patternList=[{'xxxx.':{0},'xxx.x':{1},'xx.xx':{2},'x.xxx':{3},'.xxxx':{4}},{'oooo.':{0},'ooo.o':{1},'oo.oo':{2},'o.ooo':{3},'.oooo':{4}},{'.xxx..':{1},'..xxx.':{4},'.xx.x.':{2},'.x.xx.':{3}},{'.ooo..':{1,5},'..ooo.':{0,4},'.oo.o.':{2},'.o.oo.':{3}}]
-
-        direction_x=[1,0,1,-1]
-        direction_y=[0,1,1,1]
-        flag=[False]
-
-        for point in where1d(self.board!=BORDER):
-            if flag[0]:
-                break
-            for direction in range(0,4):
-                    self.check_pattern(point,'',direction_x[direction],direction_y[direction],moveSet,patternList,color,flag)
-        
-        i=0
-        while i<4 and not bool(moveSet[i]):
-            i+=1
-        if i==4:
+        ret=self._find_pattern_moves(SOLVE_POINT_TABLE, SOLVE_POINT_AUTOMATON)
+        if ret is None:
             return None
-        else:
-            return list(moveSet[i])
+        return ret[1]
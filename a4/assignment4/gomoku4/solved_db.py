@@ -0,0 +1,265 @@
+"""
+solved_db.py
+
+A database of solved positions, kept on disk, so a position proven in
+one game or engine process is only looked up in the next one.
+
+Positions are keyed by board.canonical_key, so the 8 symmetric images
+of a position share one entry, and the best move is stored for the
+canonical image. Each record also says whether the result is exact,
+from a solver that searches every move that matters, or from an
+alphabeta solver restricted to the moves near a stone. The file is
+append-only: a header, then one record
+per solved position. Records are written whole with a single write
+under an exclusive lock, and readers only read whole records, so any
+number of engine processes can read the file while others append to
+it. A reader that misses a position reads what was appended since it
+last looked before giving up.
+
+Writes go through a queue to a background thread, so the solver does
+not wait for the disk.
+
+A file of the previous format, without the exact flag, is rewritten in
+the current one, with all its results marked not exact. A file that is
+not a database at all is copied aside to path + INVALID_SUFFIX and the
+database starts empty. Both print a warning to stderr.
+"""
+
+import atexit
+import os
+import queue
+import struct
+import sys
+import threading
+import fcntl
+
+MAGIC = b'GMKSDB2\n'
+
+"""
+Record: canonical key, board size, value for the player to move
+(1 win, 0 draw, -1 loss), the move in canonical coordinates,
+0 for no move, and 1 for an exact result, else 0
+"""
+RECORD = struct.Struct('<QBbHB')
+
+"""
+The previous format: the same records without the exact flag
+"""
+OLD_MAGIC = b'GMKSDB1\n'
+OLD_RECORD = struct.Struct('<QBbH')
+
+INVALID_SUFFIX = '.invalid'
+
+"""
+Default file, next to this module, unless GOMOKU_SOLVED_DB is set
+"""
+DEFAULT_PATH = os.environ.get('GOMOKU_SOLVED_DB',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                 'solved_positions.db'))
+
+class SolvedDB(object):
+    """
+    The solved positions of one file.
+    entries: (key, size) -> (value, canonical move or None, exact)
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.read_offset = 0
+        self.hits = 0
+        self.misses = 0
+        self.fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        self._lock()
+        try:
+            header = os.pread(self.fd, len(MAGIC), 0)
+            if not header:
+                os.write(self.fd, MAGIC)
+            elif header == OLD_MAGIC:
+                self._migrate()
+            elif header != MAGIC:
+                self._start_over()
+        finally:
+            self._unlock()
+        self.read_offset = len(MAGIC)
+        self.refresh()
+        self.pending = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+
+    def _lock(self):
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+
+    def _unlock(self):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+    def _rewrite(self, data):
+        """
+        Replace the contents of the file with data, under the lock,
+        so the other processes see the new contents when they get it
+        """
+        os.ftruncate(self.fd, 0)
+        os.write(self.fd, data)
+
+    def _migrate(self):
+        """
+        Rewrite a file of the previous format in the current one
+        """
+        size = os.fstat(self.fd).st_size
+        count = (size - len(OLD_MAGIC)) // OLD_RECORD.size
+        data = os.pread(self.fd, count * OLD_RECORD.size, len(OLD_MAGIC))
+        records = [RECORD.pack(key, board_size, value, move, 0)
+                   for key, board_size, value, move
+                   in OLD_RECORD.iter_unpack(data)]
+        self._rewrite(MAGIC + b''.join(records))
+        sys.stderr.write('solved_db: converted %d positions of %s to the '
+                         'current format, as not exact\n'
+                         % (len(records), self.path))
+
+    def _start_over(self):
+        """
+        Copy a file that is not a database aside and empty it
+        """
+        size = os.fstat(self.fd).st_size
+        with open(self.path + INVALID_SUFFIX, 'wb') as f:
+            f.write(os.pread(self.fd, size, 0))
+        self._rewrite(MAGIC)
+        sys.stderr.write('solved_db: %s is not a database of solved '
+                         'positions, copied it to %s and started a new one\n'
+                         % (self.path, self.path + INVALID_SUFFIX))
+
+    def refresh(self):
+        """
+        Read the whole records appended since the last refresh
+        """
+        size = os.fstat(self.fd).st_size
+        count = (size - self.read_offset) // RECORD.size
+        if count <= 0:
+            return
+        data = os.pread(self.fd, count * RECORD.size, self.read_offset)
+        self.read_offset += len(data)
+        for key, board_size, value, move, exact in RECORD.iter_unpack(data):
+            self.entries[(key, board_size)] = (value, move or None, bool(exact))
+
+    def lookup(self, board, exact_only=False):
+        """
+        (value, move) for the player to move on board, or None.
+        move is a point of board, or None.
+        exact_only: None for a result that is not exact
+        """
+        key, transform = board.canonical_key()
+        entry = self.entries.get((key, board.size))
+        if entry is None or (exact_only and not entry[2]):
+            self.refresh()
+            entry = self.entries.get((key, board.size))
+        if entry is None or (exact_only and not entry[2]):
+            self.misses += 1
+            return None
+        self.hits += 1
+        value, move, _ = entry
+        if move is not None:
+            geometry = board.geometry
+            move = geometry.symmetries[geometry.inverse_symmetry[transform]][move]
+        return value, move
+
+    def store(self, board, value, move=None, exact=False):
+        """
+        Queue the value and move of the player to move on board
+        for writing. An exact result is not replaced by one that
+        is not.
+        """
+        key, transform = board.canonical_key()
+        if move is not None:
+            move = board.geometry.symmetries[transform][move]
+        entry = self.entries.get((key, board.size))
+        if entry == (value, move, exact) or \
+                (entry is not None and entry[2] and not exact):
+            return
+        self.entries[(key, board.size)] = (value, move, exact)
+        self.pending.put(RECORD.pack(key, board.size, value, move or 0,
+                                     int(exact)))
+
+    def _write_loop(self):
+        while True:
+            records = [self.pending.get()]
+            while not self.pending.empty():
+                records.append(self.pending.get())
+            self._lock()
+            try:
+                os.write(self.fd, b''.join(records))
+            finally:
+                self._unlock()
+            for _ in records:
+                self.pending.task_done()
+
+    def flush(self):
+        """
+        Wait until all stored positions are written
+        """
+        self.pending.join()
+
+    def close(self):
+        self.flush()
+        os.close(self.fd)
+
+    def __len__(self):
+        return len(self.entries)
+
+"""
+The database used by the solvers and genmove, None for no database
+"""
+solved_db = None
+
+def open_db(path=DEFAULT_PATH):
+    """
+    Use the database at path from now on, written to disk at exit
+    """
+    global solved_db
+    if solved_db is not None:
+        solved_db.close()
+    solved_db = SolvedDB(path)
+    atexit.register(solved_db.flush)
+    return solved_db
+
+def close_db():
+    global solved_db
+    if solved_db is not None:
+        solved_db.close()
+        solved_db = None
+
+def lookup_solve(board, exact_only=False):
+    """
+    The result of the last solve of the position on board, in the
+    format of alphabeta.solve, or None
+    exact_only: only a result stored as exact
+    """
+    if solved_db is None:
+        return None
+    entry = solved_db.lookup(board, exact_only)
+    if entry is None:
+        return None
+    value, move = entry
+    if value == 1:
+        return True,move,None
+    if value == 0:
+        return True,"NoMove",move
+    return False,"NoMove",None
+
+def store_solve(board, result, exact=False):
+    """
+    Store a result of alphabeta.solve for the position on board.
+    Results of games already over and of timed out searches are
+    not stored.
+    exact: the result is proven, not only found by a search of the
+    candidate moves
+    """
+    if solved_db is None:
+        return
+    have_result, move, draw_move = result
+    if move in ("First", "Unknown"):
+        return
+    if move != "NoMove":
+        solved_db.store(board, 1, move, exact)
+    elif have_result:
+        solved_db.store(board, 0, draw_move, exact)
+    else:
+        solved_db.store(board, -1, exact=exact)
@@ -0,0 +1,252 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+import random
+import json
+import os
+import tempfile
+from timeit import default_timer as timer
+from board_util import BLACK, WHITE
+from simple_board import SimpleGoBoard
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+import alphabeta
+
+class TranspositionTableTestCase(unittest.TestCase):
+    """Tests for transposition.py"""
+
+    def test_store_and_lookup(self):
+        table = TranspositionTable()
+        self.assertIsNone(table.lookup(12345))
+        table.store(12345, 1, EXACT, 17, 10)
+        self.assertEqual(table.lookup(12345)[:4], (1, EXACT, 17, 10))
+        table.store(12345, 0, LOWER, 18, 10)
+        self.assertEqual(table.lookup(12345)[:3], (0, LOWER, 18))
+        self.assertEqual(len(table), 1)
+        self.assertEqual((table.hits, table.misses, table.stores), (2, 1, 2))
+
+    def test_memory_cap(self):
+        table = TranspositionTable(memory_mb=0.01)
+        for key in range(10000):
+            table.store(key, 0, EXACT, None, key % 7)
+        self.assertLessEqual(len(table), table.size)
+        self.assertLessEqual(table.size * 200, 0.01 * 2**20)
+
+    def test_replacement_prefers_depth_and_age(self):
+        table = TranspositionTable(memory_mb=0)
+        bucket = table.mask + 1
+        table.store(0, 0, EXACT, None, 5)
+        table.store(bucket, 0, EXACT, None, 3)
+        table.store(2 * bucket, 0, UPPER, None, 4)
+        self.assertIsNotNone(table.lookup(0))
+        self.assertIsNone(table.lookup(bucket))
+        table.new_search()
+        table.store(3 * bucket, 0, EXACT, None, 1)
+        self.assertIsNotNone(table.lookup(3 * bucket))
+        self.assertEqual(table.replacements, 2)
+
+class AlphabetaTestCase(unittest.TestCase):
+    """Tests for alphabeta.py"""
+
+    def test_win_in_one(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(1,1), (7,7), (1,2), (7,6), (1,3), (7,4), (1,4), (6,1)])
+        self.assertEqual(goboard.solve(), ('b', goboard.pt(1,5)))
+
+    def test_game_over(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(1,1), (7,7), (1,2), (7,6), (1,3), (7,4), (1,4), (6,1), (1,5)])
+        self.assertEqual(goboard.solve(), ('b', 'NoMove'))
+
+    def test_table_does_not_change_result(self):
+        for seed in range(4):
+            goboard = random_position(random.Random(seed), 39)
+            before = list(goboard.board)
+            results = []
+            for table in [TranspositionTable(), TranspositionTable(memory_mb=0)]:
+                result, move, draw_move = alphabeta.solve(goboard, table)
+                results.append(result)
+                self.assertEqual(list(goboard.board), before)
+            self.assertEqual(results[0], results[1])
+
+    def test_solve_again_uses_table(self):
+        # a draw, so the full search runs
+        goboard = random_position(random.Random(2), 39)
+        table = TranspositionTable()
+        first = alphabeta.solve(goboard, table)[0]
+        hits = table.hits
+        self.assertEqual(alphabeta.solve(goboard, table)[0], first)
+        self.assertGreater(table.hits, hits)
+    def test_deadline(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,4), (4,5)])
+        before = list(goboard.board)
+        table = TranspositionTable()
+        start = timer()
+        self.assertEqual(alphabeta.solve(goboard, table, deadline=start + 0.2)[:2],
+                         (None, "Unknown"))
+        self.assertLess(timer() - start, 1.0)
+        self.assertEqual(list(goboard.board), before)
+        self.assertEqual(len(goboard.empty_points), 47)
+        self.assertGreater(alphabeta.last_search.nodes, 0)
+        self.assertGreater(len(table), 0)
+        self.assertEqual(goboard.solve(deadline=timer()), ('unknown', 'NoMove'))
+
+    def test_stack_search_same_as_recursive(self):
+        for seed in range(4):
+            goboard = random_position(random.Random(seed), 35)
+            results = []
+            for run in [lambda search: recursive_alphabeta(goboard, -1, 1, search),
+                        lambda search: alphabeta.StackSearch(goboard, -1, 1, search).run()]:
+                search = alphabeta.Search(TranspositionTable())
+                results.append((run(search), search.nodes, search.table.stores))
+            self.assertEqual(results[0], results[1])
+
+    def test_stack_search_resumes(self):
+        goboard = random_position(random.Random(2), 35)
+        before = list(goboard.board)
+        expected = recursive_alphabeta(goboard, -1, 1,
+                                       alphabeta.Search(TranspositionTable()))
+        search = alphabeta.Search(TranspositionTable())
+        stack_search = alphabeta.StackSearch(goboard, -1, 1, search)
+        pauses = 0
+        while True:
+            # stops after the next POLL_INTERVAL nodes
+            search.deadline = timer() - 1
+            try:
+                value = stack_search.run()
+                break
+            except alphabeta.SolveTimeout:
+                pauses += 1
+                self.assertEqual(list(goboard.board), before)
+        self.assertEqual(value, expected)
+        self.assertGreater(pauses, 1)
+
+    def test_solve_resumes(self):
+        goboard = random_position(random.Random(2), 35)
+        expected = alphabeta.solve(goboard, TranspositionTable())
+        table = TranspositionTable()
+        self.assertEqual(alphabeta.solve(goboard, table, deadline=timer())[1],
+                         "Unknown")
+        search = alphabeta.last_search
+        self.assertEqual(alphabeta.solve(goboard, table), expected)
+        self.assertIs(alphabeta.last_search, search)
+
+    def test_solve_resumes_on_copy(self):
+        goboard = random_position(random.Random(2), 35)
+        expected = alphabeta.solve(goboard, TranspositionTable())
+        table = TranspositionTable()
+        self.assertEqual(alphabeta.solve(goboard, table,
+                                         deadline=timer() + 0.01)[1],
+                         "Unknown")
+        # genmove and solve of gtp_connection work on a copy of the board
+        copy = goboard.copy()
+        self.assertEqual(alphabeta.solve(copy, table), expected)
+        self.assertEqual(list(copy.board), list(goboard.board))
+
+    def test_stats(self):
+        goboard = random_position(random.Random(2), 35)
+        result = alphabeta.solve(goboard, TranspositionTable())
+        stats = alphabeta.last_search.stats()
+        self.assertEqual(stats['result'], alphabeta.result_name(result))
+        self.assertEqual(stats['nodes'], alphabeta.last_search.nodes)
+        self.assertEqual(stats['calls'], 1)
+        self.assertGreater(stats['max_depth'], 0)
+        self.assertEqual(json.loads(json.dumps(stats)), stats)
+
+    def test_result_name(self):
+        self.assertEqual(alphabeta.result_name((True, 9, None)), "win")
+        self.assertEqual(alphabeta.result_name((True, "NoMove", 9)), "draw")
+        self.assertEqual(alphabeta.result_name((False, "NoMove", None)), "loss")
+        self.assertEqual(alphabeta.result_name((True, "First", None)), "over")
+        self.assertEqual(alphabeta.result_name((None, "Unknown", 9)), "unknown")
+
+    def test_stats_log_and_trace(self):
+        goboard = random_position(random.Random(2), 35)
+        with tempfile.TemporaryDirectory() as directory:
+            alphabeta.stats_log = os.path.join(directory, 'stats.jsonl')
+            alphabeta.trace_path = os.path.join(directory, 'trace.txt')
+            try:
+                result = alphabeta.solve(goboard, TranspositionTable())
+            finally:
+                alphabeta.stats_log = alphabeta.trace_path = None
+            with open(os.path.join(directory, 'stats.jsonl')) as f:
+                lines = f.readlines()
+            self.assertEqual(len(lines), 1)
+            self.assertEqual(json.loads(lines[0]),
+                             alphabeta.last_search.stats())
+            with open(os.path.join(directory, 'trace.txt')) as f:
+                trace = f.read().split('\n')
+        self.assertEqual(trace[0].split()[:3], ['solve', '7', str(goboard.current_player)])
+        self.assertEqual(len(trace[0].split()[3]), 49)
+        self.assertEqual(trace[-2], 'result ' + alphabeta.result_name(result))
+        entered = [line for line in trace if line.startswith('e ')]
+        exited = [line for line in trace if line.startswith('x ')]
+        self.assertEqual(len(entered), alphabeta.last_search.nodes)
+        self.assertEqual(len(exited), len(entered))
+
+
+"""Utility"""
+def recursive_alphabeta(board, alpha, beta, search):
+    """
+    The recursive alphabeta that StackSearch replaced, kept as the
+    reference it must agree with, and for bench.py
+    """
+    search.count_node()
+    result = alphabeta.game_end(board)
+    if result is not None:
+        return result
+    table = search.table
+    key = board.hash
+    entry = table.lookup(key)
+    best_move = None
+    if entry is not None:
+        value, bound, best_move = entry[0], entry[1], entry[2]
+        if bound == EXACT:
+            return value
+        if bound == LOWER and value >= beta:
+            return beta
+        if bound == UPPER and value <= alpha:
+            return alpha
+    depth = len(board.empty_points)
+    old_alpha = alpha
+    for m in alphabeta._moves(board, best_move, search):
+        board.play_move_gomoku(m, board.current_player)
+        try:
+            result = -recursive_alphabeta(board, -beta, -alpha, search)
+        finally:
+            board.undo_move()
+        if result >= beta:
+            search.ordering.cutoff(board, m)
+            table.store(key, beta, LOWER, m, depth)
+            return beta
+        if result > alpha:
+            alpha = result
+            best_move = m
+    if alpha > old_alpha:
+        table.store(key, alpha, EXACT, best_move, depth)
+    else:
+        table.store(key, alpha, UPPER, best_move, depth)
+    return alpha
+
+def play_line(goboard, coords):
+    for row, col in coords:
+        goboard.play_move_gomoku(goboard.pt(row, col), goboard.current_player)
+
+def random_position(rng, num_moves):
+    """
+    A position of num_moves random moves that is not over yet
+    """
+    while True:
+        goboard = SimpleGoBoard(7)
+        moves = list(goboard.get_empty_points())
+        rng.shuffle(moves)
+        for move in moves[:num_moves]:
+            goboard.play_move_gomoku(move, goboard.current_player)
+        if not goboard.check_game_end_gomoku()[0]:
+            return goboard
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+import numpy as np
+from board_util import GoBoardUtil, BLACK, WHITE, EMPTY
+from simple_board import SimpleGoBoard
+from batch_playout import has_five, batch_playouts, playout_scores
+from timeit import default_timer as timer
+import Gomoku4
+
+class BatchPlayoutTestCase(unittest.TestCase):
+    """Tests for batch_playout.py"""
+
+    def stones(self, board, color):
+        twoD = GoBoardUtil.get_twoD_board(board)
+        return (twoD == color).reshape(1, board.size, board.size)
+
+    def test_has_five_all_directions(self):
+        for direction in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+            goboard = SimpleGoBoard(7)
+            row, col = 2, 4
+            for _ in range(5):
+                self.assertFalse(has_five(self.stones(goboard, BLACK))[0])
+                goboard.play_move_gomoku(goboard.pt(row, col), BLACK)
+                row, col = row + direction[0], col + direction[1]
+                if not 1 <= col <= 7:
+                    row, col = row - 5 * direction[0], col - 5 * direction[1]
+            self.assertTrue(has_five(self.stones(goboard, BLACK))[0])
+
+    def test_no_wrap_around(self):
+        goboard = SimpleGoBoard(7)
+        for row, col in [(1,5), (1,6), (1,7), (2,1), (2,2)]:
+            goboard.play_move_gomoku(goboard.pt(row, col), BLACK)
+        self.assertFalse(has_five(self.stones(goboard, BLACK))[0])
+
+    def test_finished_game(self):
+        goboard = SimpleGoBoard(7)
+        for col in range(1, 6):
+            goboard.play_move_gomoku(goboard.pt(1, col), WHITE)
+        results = batch_playouts(goboard, 10)
+        self.assertTrue((results == WHITE).all())
+        self.assertTrue((playout_scores(results, BLACK) == -1.0).all())
+
+    def test_results(self):
+        goboard = SimpleGoBoard(7)
+        goboard.play_move_gomoku(goboard.pt(4, 4), BLACK)
+        before = list(goboard.board)
+        results = batch_playouts(goboard, 200, np.random.RandomState(1))
+        self.assertEqual(list(goboard.board), before)
+        self.assertEqual(len(results), 200)
+        self.assertTrue(np.isin(results, [BLACK, WHITE, EMPTY]).all())
+        self.assertTrue((results == BLACK).any())
+        self.assertTrue((results == WHITE).any())
+
+    def test_player_deadline(self):
+        player = Gomoku4.GomokuSimulationPlayer()
+        player.set_batch_size(50)
+        goboard = SimpleGoBoard(7)
+        goboard.play_move_gomoku(goboard.pt(4, 4), BLACK)
+        player.best_move = goboard.pt(4, 4)
+        # past the deadline only one move is scored
+        start = timer()
+        move = player._batch_get_move(goboard, WHITE, start - 1.0)
+        self.assertLess(timer() - start, 0.5)
+        self.assertEqual(goboard.get_color(move), EMPTY)
+        self.assertEqual(player.best_move, move)
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+import random
+from board_util import BLACK, WHITE, EMPTY, BORDER
+from simple_board import SimpleGoBoard
+from bitboard import BitboardGomokuBoard
+
+class BitboardGomokuBoardTestCase(unittest.TestCase):
+    """Tests for bitboard.py"""
+
+    def test_empty_board(self):
+        goboard = BitboardGomokuBoard(7)
+        self.assertEqual(len(goboard.get_empty_points()), 49)
+        self.assertEqual(goboard.get_color(0), BORDER)
+        self.assertEqual(goboard.get_color(goboard.pt(1,1)), EMPTY)
+        self.assertEqual(list(goboard.board), list(SimpleGoBoard(7).board))
+
+    def test_no_wrap_around(self):
+        goboard = BitboardGomokuBoard(7)
+        for row, col in [(1,5), (1,6), (1,7), (2,1), (2,2)]:
+            goboard.play_move_gomoku(goboard.pt(row, col), BLACK)
+        self.assertEqual(goboard.check_game_end_gomoku(), (False, None))
+
+    def test_diagonal_five(self):
+        goboard = BitboardGomokuBoard(7)
+        for i in range(1, 6):
+            goboard.play_move_gomoku(goboard.pt(i, 7 - i), WHITE)
+        self.assertEqual(goboard.check_game_end_gomoku(), (True, WHITE))
+        goboard.undo_move()
+        self.assertEqual(goboard.check_game_end_gomoku(), (False, None))
+
+    def test_same_as_simple_board(self):
+        rng = random.Random(7)
+        for _ in range(20):
+            simple = SimpleGoBoard(7)
+            bitboard = BitboardGomokuBoard(7)
+            moves = list(simple.get_empty_points())
+            rng.shuffle(moves)
+            for move in moves[:rng.randint(0, 30)]:
+                simple.play_move_gomoku(move, simple.current_player)
+                bitboard.play_move_gomoku(move, bitboard.current_player)
+                self.assertEqual(simple.check_game_end_gomoku(),
+                                 bitboard.check_game_end_gomoku())
+                if simple.check_game_end_gomoku()[0]:
+                    break
+            self.assertEqual(list(simple.board), list(bitboard.board))
+            self.assertEqual(simple.get_pattern_moves(),
+                             bitboard.get_pattern_moves())
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+import random
+from timeit import default_timer as timer
+from board_util import BLACK, WHITE
+from simple_board import SimpleGoBoard
+from transposition import TranspositionTable
+from test_alphabeta import play_line, random_position
+import alphabeta
+import dfpn
+
+class ProofTableTestCase(unittest.TestCase):
+    """Tests for dfpn.ProofTable"""
+
+    def test_collect_keeps_proven(self):
+        table = dfpn.ProofTable(memory_mb=0)
+        for key in range(table.max_entries):
+            table.store(key, 1, 1, key)
+        table.store(-1, 0, dfpn.INF, 0)
+        self.assertEqual(table.collections, 1)
+        self.assertEqual(len(table), table.max_entries // 2)
+        self.assertEqual(table.lookup(-1), (0, dfpn.INF, 0))
+        self.assertIsNotNone(table.lookup(table.max_entries - 1))
+        self.assertIsNone(table.lookup(0))
+
+    def test_collect_keeps_pinned(self):
+        table = dfpn.ProofTable(memory_mb=0)
+        table.store(-1, 1, 1, 0)
+        table.pinned = {-1}
+        for key in range(table.max_entries):
+            table.store(key, 0, dfpn.INF, key)
+        self.assertEqual(table.collections, 1)
+        self.assertEqual(table.lookup(-1), (1, 1, 0))
+
+class DfpnTestCase(unittest.TestCase):
+    """Tests for dfpn.py"""
+
+    def test_win_in_one(self):
+        goboard = SimpleGoBoard(7)
+        goboard.set_solver('dfpn')
+        play_line(goboard, [(1,1), (7,7), (1,2), (7,6), (1,3), (7,4), (1,4), (6,1)])
+        self.assertEqual(goboard.solve(), ('b', goboard.pt(1,5)))
+
+    def test_game_over(self):
+        goboard = SimpleGoBoard(7)
+        goboard.set_solver('dfpn')
+        play_line(goboard, [(1,1), (7,7), (1,2), (7,6), (1,3), (7,4), (1,4), (6,1), (1,5)])
+        self.assertEqual(goboard.solve(), ('b', 'NoMove'))
+
+    def test_same_results_as_alphabeta(self):
+        for seed in range(4):
+            goboard = random_position(random.Random(seed), 39)
+            before = list(goboard.board)
+            expected = alphabeta.solve(goboard, TranspositionTable())[0]
+            result, move, draw_move = dfpn.solve(goboard, dfpn.ProofTable())
+            self.assertEqual(result, expected)
+            self.assertEqual(list(goboard.board), before)
+            if result is True and move == "NoMove":
+                self.assertIn(draw_move, goboard.get_empty_points())
+
+    def test_proving_move_after_collect(self):
+        goboard = random_position(random.Random(1), 45)
+        table = dfpn.ProofTable(memory_mb=0)
+        result, move, draw_move = dfpn.solve(goboard, table)
+        self.assertEqual((result, move), (True, "NoMove"))
+        # proven positions with more work behind them than any of the
+        # search fill the table
+        for key in range(2 * table.max_entries):
+            table.store(-1 - key, 0, dfpn.INF, 10 ** 6)
+        self.assertGreater(table.collections, 1)
+        self.assertEqual(dfpn.last_searches[-1].proving_move(), draw_move)
+
+    def test_deadline(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,4), (4,5)])
+        before = list(goboard.board)
+        table = dfpn.ProofTable()
+        start = timer()
+        self.assertEqual(dfpn.solve(goboard, table, deadline=start + 0.2)[:2],
+                         (None, "Unknown"))
+        self.assertLess(timer() - start, 1.0)
+        self.assertEqual(list(goboard.board), before)
+        self.assertEqual(len(goboard.empty_points), 47)
+        self.assertGreater(dfpn.last_searches[0].nodes, 0)
+        self.assertGreater(len(table), 0)
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,214 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+import random
+from board_util import BLACK, WHITE, EMPTY, PASS
+from simple_board import SimpleGoBoard
+from bitboard import BitboardGomokuBoard
+from opening_book import OpeningBook
+import Gomoku4
+from mcts import NodeStore, UCTSearch, AMAFTable, random_playout, \
+                 rule_based_playout, NO_CHILDREN
+
+class MCTSTestCase(unittest.TestCase):
+    """Tests for mcts.py"""
+
+    def test_node_store_blocks(self):
+        nodes = NodeStore()
+        root = nodes.add(0, -1)
+        nodes.add_children(root, [10, 11, 12])
+        self.assertEqual(list(nodes.children(root)), [1, 2, 3])
+        self.assertEqual([nodes.move[child] for child in nodes.children(root)],
+                         [10, 11, 12])
+        self.assertEqual(nodes.first_child[1], NO_CHILDREN)
+        nodes.add_children(2, [20, 21])
+        self.assertEqual(list(nodes.children(2)), [4, 5])
+        self.assertEqual(nodes.parent[5], 2)
+        self.assertEqual(len(nodes), 6)
+
+    def test_playouts_leave_board_unchanged(self):
+        for board_class in [SimpleGoBoard, BitboardGomokuBoard]:
+            goboard = board_class(7)
+            play_line(goboard, [(4, 4), (3, 3), (4, 3)])
+            before = (list(goboard.get_empty_points()), goboard.current_player)
+            for playout in [random_playout, rule_based_playout]:
+                for seed in range(5):
+                    winner = playout(goboard, random.Random(seed))
+                    self.assertIn(winner, [BLACK, WHITE, EMPTY])
+                    self.assertEqual((list(goboard.get_empty_points()),
+                                      goboard.current_player), before)
+
+    def test_visits_add_up(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4, 4), (3, 3), (4, 3)])
+        search = UCTSearch(goboard, rng=random.Random(1))
+        search.run(simulations=300)
+        nodes = search.nodes
+        self.assertEqual(nodes.visits[0], 300)
+        self.assertEqual(sum(visits for _, visits, _ in search.root_stats()),
+                         300)
+        for node in range(len(nodes)):
+            if nodes.first_child[node] != NO_CHILDREN:
+                # the visit that expanded the node did not go to a child
+                child_visits = sum(nodes.visits[child]
+                                   for child in nodes.children(node))
+                self.assertIn(nodes.visits[node] - child_visits, (0, 1))
+
+    def test_blocks_a_four(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(1, 1), (2, 2), (1, 2), (3, 3), (1, 3), (4, 4),
+                            (1, 4)])
+        search = UCTSearch(goboard, rng=random.Random(1))
+        self.assertEqual(search.run(simulations=100), goboard.pt(1, 5))
+        # the only move, found in the first simulation
+        self.assertEqual(search.simulations, 1)
+
+    def test_finds_open_three_win(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4, 2), (1, 1), (4, 3), (1, 7), (4, 4), (7, 1)])
+        search = UCTSearch(goboard, 'rule_based', rng=random.Random(1))
+        self.assertIn(search.run(simulations=2000),
+                      [goboard.pt(4, 1), goboard.pt(4, 5)])
+
+    def test_same_search_for_same_seed(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4, 4), (3, 3)])
+        stats = []
+        for _ in range(2):
+            search = UCTSearch(goboard, rng=random.Random(7))
+            search.run(simulations=200)
+            stats.append(search.root_stats())
+        self.assertEqual(stats[0], stats[1])
+
+    def test_subtree(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4, 4), (3, 3), (4, 3)])
+        search = UCTSearch(goboard, rng=random.Random(1))
+        search.run(simulations=500)
+        nodes = search.nodes
+        child = max(nodes.children(0), key=lambda child: nodes.visits[child])
+        subtree = nodes.subtree(child)
+        self.assertEqual(subtree.visits[0], nodes.visits[child])
+        self.assertEqual(subtree.wins[0], nodes.wins[child])
+        self.assertEqual(sorted((nodes.move[c], nodes.visits[c], nodes.wins[c])
+                                for c in nodes.children(child)),
+                         sorted((subtree.move[c], subtree.visits[c], subtree.wins[c])
+                                for c in subtree.children(0)))
+        self.assertEqual(sum(subtree.visits[c] for c in range(len(subtree))),
+                         sum(nodes.visits[c] for c in range(len(nodes))
+                             if in_subtree(nodes, c, child)))
+
+    def test_advance(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4, 4), (3, 3), (4, 3)])
+        search = UCTSearch(goboard, rng=random.Random(1))
+        move = search.run(simulations=500)
+        visits = search.nodes.visits[[child for child in search.nodes.children(0)
+                                      if search.nodes.move[child] == move][0]]
+        self.assertTrue(search.advance(move))
+        goboard.play_move_gomoku(move, goboard.current_player)
+        self.assertTrue(search.matches(goboard))
+        self.assertEqual(search.nodes.visits[0], visits)
+        self.assertEqual(search.color, goboard.current_player)
+        search.run(simulations=100)
+        self.assertEqual(search.nodes.visits[0], visits + 100)
+        self.assertFalse(search.advance(goboard.pt(7, 7)))
+
+    def test_player_keeps_tree(self):
+        player = Gomoku4.GomokuSimulationPlayer()
+        player.set_timelimit(1.0)
+        player.book = OpeningBook()
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4, 4), (3, 3), (4, 3)])
+        move = player.get_move(goboard, goboard.current_player)
+        goboard.play_move_gomoku(move, goboard.current_player)
+        player.move_played(move)
+        tree = player.tree
+        self.assertIsNotNone(tree)
+        reply = max(tree.root_stats(), key=lambda stat: stat[1])[0]
+        goboard.play_move_gomoku(reply, goboard.current_player)
+        player.move_played(reply)
+        self.assertIs(player.tree, tree)
+        self.assertGreater(tree.nodes.visits[0], 0)
+        player.get_move(goboard, goboard.current_player)
+        self.assertIs(player.tree, tree)
+        player.new_game()
+        self.assertIsNone(player.tree)
+
+    def test_player_after_pass(self):
+        player = Gomoku4.GomokuSimulationPlayer()
+        player.set_timelimit(1.0)
+        player.book = OpeningBook()
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4, 4), (3, 3), (4, 3)])
+        player.get_move(goboard, goboard.current_player)
+        tree = player.tree
+        # play w pass, as gtp_connection does it
+        goboard.play_move(PASS, WHITE)
+        goboard.current_player = BLACK
+        self.assertFalse(tree.matches(goboard))
+        move = player.get_move(goboard, BLACK)
+        self.assertIsNot(player.tree, tree)
+        self.assertEqual(player.tree.color, BLACK)
+        self.assertEqual(goboard.get_color(move), EMPTY)
+
+    def test_amaf_table(self):
+        goboard = SimpleGoBoard(7)
+        amaf = AMAFTable(goboard.maxpoint)
+        a, b, c = goboard.pt(1, 1), goboard.pt(2, 2), goboard.pt(3, 3)
+        amaf.update(BLACK, [a, b, c], 1.0)
+        amaf.update(BLACK, [c, a], -1.0)
+        self.assertEqual(amaf.visits[BLACK][c], 2)
+        self.assertEqual(amaf.win_rate(BLACK, c), 0.0)
+        self.assertEqual(amaf.win_rate(BLACK, a), 1.0)
+        self.assertEqual(amaf.win_rate(WHITE, b), -1.0)
+        self.assertEqual(amaf.win_rate(WHITE, a), 1.0)
+        self.assertEqual(amaf.win_rate(WHITE, c, 0.0), 0.0)
+
+    def test_backup_amaf(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4, 4), (3, 3), (4, 3)])
+        search = UCTSearch(goboard, rng=random.Random(1))
+        search.simulate()
+        nodes = search.nodes
+        children = list(nodes.children(0))
+        child = children[0]
+        before = [nodes.amaf_visits[c] for c in children]
+        # white plays the first child, black answers, white plays the last
+        moves = [nodes.move[child], nodes.move[children[1]],
+                 nodes.move[children[-1]]]
+        search._backup_amaf([0, child], WHITE, moves)
+        after = [nodes.amaf_visits[c] for c in children]
+        self.assertEqual(after[0] - before[0], 1)
+        self.assertEqual(after[1] - before[1], 0)
+        self.assertEqual(after[-1] - before[-1], 1)
+        self.assertEqual(sum(after) - sum(before), 2)
+
+    def test_rave_off(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4, 4), (3, 3), (4, 3)])
+        search = UCTSearch(goboard, rng=random.Random(1), rave=False)
+        search.run(simulations=200)
+        self.assertEqual(sum(search.nodes.amaf_visits), 0)
+        search = UCTSearch(goboard, rng=random.Random(1))
+        search.run(simulations=200)
+        self.assertGreater(sum(search.nodes.amaf_visits), 200)
+
+
+"""Utility"""
+def in_subtree(nodes, node, root):
+    while node != -1:
+        if node == root:
+            return True
+        node = nodes.parent[node]
+    return False
+
+def play_line(goboard, coords):
+    for row, col in coords:
+        goboard.play_move_gomoku(goboard.pt(row, col), goboard.current_player)
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()
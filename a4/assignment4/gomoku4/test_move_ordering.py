@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+import random
+from board_util import BLACK, WHITE
+from simple_board import SimpleGoBoard
+from transposition import TranspositionTable
+from move_ordering import MoveOrdering
+from test_alphabeta import play_line, random_position
+import alphabeta
+
+class MoveOrderingTestCase(unittest.TestCase):
+    """Tests for move_ordering.py"""
+
+    def test_candidates(self):
+        goboard = SimpleGoBoard(7)
+        self.assertEqual(len(MoveOrdering().candidates(goboard)), 49)
+        play_line(goboard, [(1,1)])
+        # all empty points by default, for a proven solve
+        self.assertEqual(len(MoveOrdering().candidates(goboard)), 48)
+        self.assertEqual(len(MoveOrdering(distance=2).candidates(goboard)), 8)
+        self.assertEqual(len(MoveOrdering(distance=1).candidates(goboard)), 3)
+        self.assertEqual(len(MoveOrdering(distance=None).candidates(goboard)), 48)
+
+    def test_threats_first(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,2), (7,7), (4,3), (7,6), (4,4)])
+        moves = MoveOrdering().generate(goboard)
+        # white has to stop the open three
+        self.assertEqual(set(moves[:2]), {goboard.pt(4,1), goboard.pt(4,5)})
+        self.assertEqual(moves[0], MoveOrdering().generate(goboard)[0])
+
+    def test_killers_and_history(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,4), (4,5)])
+        ordering = MoveOrdering()
+        move = ordering.generate(goboard)[-1]
+        ordering.cutoff(goboard, move)
+        self.assertEqual(ordering.killers[2], [move])
+        self.assertEqual(ordering.history[(BLACK, move)], 47 * 47)
+        self.assertEqual(ordering.generate(goboard)[0], move)
+        best = ordering.generate(goboard)[-1]
+        self.assertEqual(ordering.generate(goboard, best)[0], best)
+
+    def test_deterministic_solve(self):
+        goboard = random_position(random.Random(2), 39)
+        results = []
+        for _ in range(2):
+            result = alphabeta.solve(goboard, TranspositionTable())
+            results.append((result, alphabeta.last_search.nodes))
+        self.assertEqual(results[0], results[1])
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()
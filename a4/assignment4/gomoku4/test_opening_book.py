@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+import os
+import tempfile
+from board_util import BLACK, WHITE
+from simple_board import SimpleGoBoard
+from bitboard import BitboardGomokuBoard
+from opening_book import OpeningBook, build_book
+from test_alphabeta import play_line
+from Gomoku4 import GomokuSimulationPlayer
+
+class OpeningBookTestCase(unittest.TestCase):
+    """Tests for opening_book.py"""
+
+    def test_symmetric_lookup(self):
+        book = OpeningBook()
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(1,2)])
+        book.add(goboard, goboard.pt(2,3))
+        rotated = BitboardGomokuBoard(7)
+        play_line(rotated, [(6,1)])
+        self.assertEqual(book.lookup(rotated), rotated.pt(5,2))
+        play_line(rotated, [(4,4)])
+        self.assertIsNone(book.lookup(rotated))
+
+    def test_save_and_load(self):
+        book = OpeningBook()
+        goboard = SimpleGoBoard(7)
+        book.add(goboard, goboard.pt(4,4))
+        path = os.path.join(tempfile.mkdtemp(), 'book.bin')
+        book.save(path)
+        self.assertEqual(OpeningBook.load(path).entries, book.entries)
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+        self.assertEqual(len(OpeningBook.load(path)), 0)
+
+    def test_build_book(self):
+        book = build_book(plies=2, games=10, workers=1)
+        # the empty board, and the 10 first moves of black up to symmetry
+        self.assertEqual(len(book), 11)
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(7,6)])
+        self.assertIsNotNone(book.lookup(goboard))
+        player = GomokuSimulationPlayer()
+        player.book = book
+        self.assertEqual(player.get_move(goboard, WHITE), book.lookup(goboard))
+
+    def test_hand_tuned_openings(self):
+        book = build_book(plies=2, games=10, workers=1)
+        goboard = SimpleGoBoard(7)
+        self.assertEqual(book.lookup(goboard), goboard.pt(4,4))
+        play_line(goboard, [(1,1)])
+        self.assertEqual(book.lookup(goboard), goboard.pt(4,4))
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,4)])
+        self.assertEqual(book.lookup(goboard), goboard.pt(3,3))
+
+    def test_shipped_book(self):
+        book = OpeningBook.load()
+        goboard = SimpleGoBoard(7)
+        self.assertEqual(book.lookup(goboard), goboard.pt(4,4))
+        play_line(goboard, [(2,6)])
+        self.assertEqual(book.lookup(goboard), goboard.pt(4,4))
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+from timeit import default_timer as timer
+from simple_board import SimpleGoBoard
+from test_alphabeta import play_line
+import parallel_mcts
+import parallel_solve
+from mcts import AMAFTable
+
+class ParallelMCTSTestCase(unittest.TestCase):
+    """Tests for parallel_mcts.py"""
+
+    def test_flat(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,4), (3,3), (4,3)])
+        before = list(goboard.board)
+        moves = [goboard.pt(4, 2), goboard.pt(4, 5), goboard.pt(1, 1)]
+        start = timer()
+        result_moves, wins, visits = parallel_mcts.search(goboard, 2,
+            start + 0.5, 'flat', 'random', moves)
+        self.assertLess(timer() - start, 2.0)
+        self.assertEqual(result_moves, moves)
+        self.assertEqual(wins.shape, (3,))
+        # both workers play out the moves in turn
+        self.assertLessEqual(max(visits) - min(visits), 2)
+        self.assertGreater(min(visits), 0)
+        # score sums of wins 1, draws 0 and losses -1
+        self.assertTrue(all(abs(wins) <= visits))
+        self.assertEqual(list(goboard.board), before)
+
+    def test_flat_amaf(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,4), (3,3), (4,3)])
+        moves = [goboard.pt(4, 2), goboard.pt(4, 5)]
+        amaf = AMAFTable(goboard.maxpoint)
+        result_moves, wins, visits = parallel_mcts.search(goboard, 2,
+            timer() + 0.3, 'flat', 'rule_based', moves, True, amaf)
+        # each playout starts with one of moves, of the player to move,
+        # who may play the other later in the playout
+        color = goboard.current_player
+        for move, move_visits in zip(moves, visits):
+            self.assertGreaterEqual(amaf.visits[color][move], move_visits)
+        self.assertGreater(min(visits), 0)
+
+    def test_uct(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,4), (3,3), (4,3)])
+        before = list(goboard.board)
+        moves, wins, visits = parallel_mcts.search(goboard, 2,
+            timer() + 0.5, 'uct', 'random')
+        self.assertEqual(moves, sorted(moves))
+        self.assertEqual(len(moves), len(wins))
+        self.assertGreater(visits.sum(), 0)
+        self.assertEqual(list(goboard.board), before)
+
+    def test_forced_move(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(1,1), (2,2), (1,2), (3,3), (1,3), (4,4), (1,4)])
+        moves, wins, visits = parallel_mcts.search(goboard, 2,
+            timer() + 0.5, 'uct', 'random')
+        self.assertEqual(moves, [goboard.pt(1, 5)])
+
+    def test_own_pool(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,4), (3,3), (4,3)])
+        solve_pool = parallel_solve.get_pool(2)
+        parallel_mcts.search(goboard, 3, timer() + 0.2, 'uct', 'random')
+        # the simulations with another number of workers keep the pool
+        # of solve warm
+        self.assertIs(parallel_solve.get_pool(2), solve_pool)
+        self.assertIsNot(parallel_solve.get_pool(3, 'simulate'), solve_pool)
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+import random
+from timeit import default_timer as timer
+from simple_board import SimpleGoBoard
+from bitboard import BitboardGomokuBoard
+from transposition import TranspositionTable
+from test_alphabeta import play_line, random_position
+import alphabeta
+import parallel_solve
+
+class ParallelSolveTestCase(unittest.TestCase):
+    """Tests for parallel_solve.py"""
+
+    def test_encoding(self):
+        for board_class in [SimpleGoBoard, BitboardGomokuBoard]:
+            goboard = board_class(7)
+            goboard.set_pattern_engine('automaton')
+            play_line(goboard, [(4,4), (4,5), (1,7), (7,1), (3,3)])
+            encoding = parallel_solve.encode_position(goboard)
+            self.assertEqual(len(encoding[4]), 49)
+            decoded = parallel_solve.decode_position(encoding)
+            self.assertIs(type(decoded), board_class)
+            self.assertEqual(decoded.hash, goboard.hash)
+            self.assertEqual(decoded.current_player, goboard.current_player)
+            self.assertEqual(decoded.pattern_engine, 'automaton')
+
+    def test_same_results_as_alphabeta(self):
+        for seed in range(4):
+            goboard = random_position(random.Random(seed), 39)
+            before = list(goboard.board)
+            expected = alphabeta.solve(goboard, TranspositionTable())
+            result = parallel_solve.solve(goboard, 2)
+            self.assertEqual(result[0], expected[0])
+            if expected[1] == "NoMove":
+                self.assertEqual(result[1], "NoMove")
+            if result[0] is True and result[1] == "NoMove":
+                # the draw move holds the draw
+                with goboard.try_move(result[2], goboard.current_player):
+                    self.assertEqual(alphabeta.solve(goboard,
+                        TranspositionTable())[:2], (True, "NoMove"))
+            self.assertEqual(list(goboard.board), before)
+
+    def test_draw_among_root_moves(self):
+        goboard = random_position(random.Random(18), 41)
+        result = parallel_solve.solve(goboard, 2)
+        self.assertEqual(result[:2], (True, "NoMove"))
+        self.assertGreater(len(parallel_solve.last_root_values), 1)
+        # after the first draw the other moves are only shown not to win
+        self.assertEqual(set(parallel_solve.last_root_values.values()), {0})
+        with goboard.try_move(result[2], goboard.current_player):
+            self.assertEqual(alphabeta.solve(goboard,
+                TranspositionTable())[:2], (True, "NoMove"))
+
+    def test_one_worker(self):
+        goboard = random_position(random.Random(0), 39)
+        self.assertEqual(parallel_solve.solve(goboard, 1),
+                         alphabeta.solve(goboard, TranspositionTable()))
+        self.assertEqual(parallel_solve.last_nodes, 0)
+
+    def test_deadline(self):
+        goboard = SimpleGoBoard(7)
+        goboard.set_workers(2)
+        play_line(goboard, [(4,4), (4,5)])
+        before = list(goboard.board)
+        start = timer()
+        self.assertEqual(goboard.solve(deadline=start + 0.5), ('unknown', 'NoMove'))
+        self.assertLess(timer() - start, 2.0)
+        self.assertEqual(list(goboard.board), before)
+        self.assertIn(None, parallel_solve.last_root_values.values())
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()
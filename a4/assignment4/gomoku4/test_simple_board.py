@@ -0,0 +1,154 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+import random
+from board_util import GoBoardUtil, BLACK, WHITE
+from simple_board import SimpleGoBoard
+
+class SimpleGoBoardGomokuTestCase(unittest.TestCase):
+    """Tests for the gomoku functions of simple_board.py"""
+
+    def test_five_in_a_row(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(1,1), (2,1), (1,2), (2,2), (1,3), (2,3), (1,4), (2,4)])
+        self.assertEqual(goboard.check_game_end_gomoku(), (False, None))
+        goboard.play_move_gomoku(goboard.pt(1,5), BLACK)
+        self.assertEqual(goboard.check_game_end_gomoku(), (True, BLACK))
+
+    def test_overline_in_the_middle(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(1,1), (2,1), (1,2), (2,2), (1,4), (2,4),
+                            (1,5), (2,5), (1,6), (2,7)])
+        goboard.play_move_gomoku(goboard.pt(1,3), BLACK)
+        self.assertEqual(goboard.check_game_end_gomoku(), (True, BLACK))
+
+    def test_undo_restores_game_end(self):
+        goboard = SimpleGoBoard(7)
+        moves = [(1,1), (2,1), (1,2), (2,2), (1,3), (2,3), (1,4), (2,4), (1,5)]
+        play_line(goboard, moves)
+        self.assertEqual(goboard.check_game_end_gomoku(), (True, BLACK))
+        for _ in moves:
+            goboard.undo_move()
+            self.assertEqual(goboard.check_game_end_gomoku(), (False, None))
+        self.assertEqual(goboard.stone_count, 0)
+        self.assertEqual(goboard.current_player, BLACK)
+        self.assertEqual(len(goboard.get_empty_points()), 49)
+
+    def test_try_move(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(1,1), (2,1), (1,2), (2,2), (1,3), (2,3), (1,4), (2,4)])
+        line_codes = list(goboard.line_codes)
+        empty_points = list(goboard.empty_points)
+        with goboard.try_move(goboard.pt(1,5)) as legal:
+            self.assertTrue(legal)
+            self.assertEqual(goboard.check_game_end_gomoku(), (True, BLACK))
+            self.assertEqual(goboard.current_player, WHITE)
+        self.assertEqual(goboard.check_game_end_gomoku(), (False, None))
+        self.assertEqual(goboard.current_player, BLACK)
+        self.assertEqual(goboard.line_codes, line_codes)
+        self.assertEqual(goboard.empty_points, empty_points)
+        self.assertEqual(goboard.moves[-1], goboard.pt(2,4))
+        with goboard.try_move(goboard.pt(1,1)) as legal:
+            self.assertFalse(legal)
+        self.assertEqual(goboard.stone_count, 8)
+
+    def test_hash_of_transposition(self):
+        goboard = SimpleGoBoard(7)
+        empty_hash = goboard.hash
+        play_line(goboard, [(1,1), (2,1), (1,2)])
+        other = SimpleGoBoard(7)
+        play_line(other, [(1,2), (2,1), (1,1)])
+        self.assertEqual(goboard.hash, other.hash)
+        self.assertEqual(goboard.copy().hash, goboard.hash)
+        other.undo_move()
+        self.assertNotEqual(goboard.hash, other.hash)
+        for _ in range(3):
+            goboard.undo_move()
+        self.assertEqual(goboard.hash, empty_hash)
+        goboard.current_player = WHITE
+        self.assertNotEqual(goboard.hash, empty_hash)
+
+    def test_board_full(self):
+        goboard = SimpleGoBoard(2)
+        self.assertFalse(goboard.is_board_full())
+        play_line(goboard, [(1,1), (1,2), (2,1), (2,2)])
+        self.assertTrue(goboard.is_board_full())
+        self.assertEqual(goboard.copy().is_board_full(), True)
+
+    def test_pattern_moves_follow_undo(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(1,1), (7,7), (1,2), (7,6), (1,3), (7,5), (1,4), (6,1)])
+        self.assertEqual(goboard.get_pattern_moves(), (0, [goboard.pt(1,5)]))
+        self.assertEqual(goboard.list_solve_point(), [goboard.pt(1,5)])
+        goboard.undo_move()
+        self.assertEqual(goboard.get_pattern_moves(), (1, [goboard.pt(1,5)]))
+        goboard.undo_move()
+        self.assertEqual(goboard.get_pattern_moves(), None)
+        goboard.play_move_gomoku(goboard.pt(1,5), BLACK)
+        self.assertEqual(goboard.get_pattern_moves(), (1, [goboard.pt(1,4)]))
+
+    def test_pattern_engines_agree(self):
+        rng = random.Random(3)
+        for _ in range(30):
+            goboard = SimpleGoBoard(rng.choice([7, 9]))
+            moves = list(goboard.get_empty_points())
+            rng.shuffle(moves)
+            for move in moves[:rng.randint(0, 25)]:
+                goboard.play_move_gomoku(move, goboard.current_player)
+            goboard.set_pattern_engine('line_codes')
+            pattern_moves = normalize(goboard.get_pattern_moves())
+            solve_points = goboard.list_solve_point()
+            goboard.set_pattern_engine('automaton')
+            self.assertEqual(normalize(goboard.get_pattern_moves()), pattern_moves)
+            self.assertEqual(goboard.list_solve_point() is None, solve_points is None)
+            if solve_points is not None:
+                self.assertEqual(sorted(goboard.list_solve_point()), sorted(solve_points))
+
+    def test_canonical_key_of_mirrored_positions(self):
+        keys = set()
+        for coords in [[(1,2), (3,3)], [(2,1), (3,3)], [(7,6), (5,5)], [(6,7), (5,5)]]:
+            goboard = SimpleGoBoard(7)
+            play_line(goboard, coords)
+            key, transform = goboard.canonical_key()
+            keys.add(key)
+            symmetry = goboard.geometry.symmetries[transform]
+            image = SimpleGoBoard(7)
+            for point in goboard.moves:
+                image.play_move_gomoku(symmetry[point], goboard.get_color(point))
+            self.assertEqual(image.hash, key)
+        self.assertEqual(len(keys), 1)
+        goboard.play_move_gomoku(goboard.pt(1,1), BLACK)
+        self.assertNotIn(goboard.canonical_key()[0], keys)
+
+    def test_inverse_symmetry(self):
+        geometry = SimpleGoBoard(7).geometry
+        for t, symmetry in enumerate(geometry.symmetries):
+            inverse = geometry.symmetries[geometry.inverse_symmetry[t]]
+            for point in geometry.board_points:
+                self.assertEqual(inverse[symmetry[point]], point)
+
+    def test_unique_moves(self):
+        goboard = SimpleGoBoard(7)
+        self.assertEqual(len(GoBoardUtil.generate_legal_moves_gomoku(goboard, unique=True)), 10)
+        play_line(goboard, [(4,4)])
+        self.assertEqual(len(GoBoardUtil.generate_legal_moves_gomoku(goboard, unique=True)), 9)
+        play_line(goboard, [(4,5)])
+        self.assertEqual(len(GoBoardUtil.generate_legal_moves_gomoku(goboard, unique=True)), 26)
+        play_line(goboard, [(1,2)])
+        self.assertEqual(len(GoBoardUtil.generate_legal_moves_gomoku(goboard, unique=True)), 46)
+
+"""Utility"""
+def play_line(goboard, coords):
+    for row, col in coords:
+        goboard.play_move_gomoku(goboard.pt(row, col), goboard.current_player)
+
+def normalize(pattern_moves):
+    if pattern_moves is None:
+        return None
+    return pattern_moves[0], sorted(pattern_moves[1])
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()
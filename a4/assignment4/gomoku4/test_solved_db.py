@@ -0,0 +1,138 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+import os
+import io
+import contextlib
+import random
+import tempfile
+from simple_board import SimpleGoBoard
+from transposition import TranspositionTable
+from test_alphabeta import play_line, random_position
+from move_ordering import MoveOrdering
+import alphabeta
+import solved_db
+
+class SolvedDBTestCase(unittest.TestCase):
+    """Tests for solved_db.py"""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, 'solved.db')
+
+    def tearDown(self):
+        solved_db.close_db()
+        os.remove(self.path)
+        os.rmdir(os.path.dirname(self.path))
+
+    def test_symmetric_positions(self):
+        db = solved_db.SolvedDB(self.path)
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(1,2), (4,4), (2,2)])
+        db.store(goboard, 1, goboard.pt(3,2))
+        mirrored = SimpleGoBoard(7)
+        play_line(mirrored, [(2,1), (4,4), (2,2)])
+        self.assertEqual(db.lookup(mirrored), (1, mirrored.pt(2,3)))
+        play_line(mirrored, [(7,7)])
+        self.assertIsNone(db.lookup(mirrored))
+        db.close()
+
+    def test_shared_between_readers(self):
+        writer = solved_db.SolvedDB(self.path)
+        reader = solved_db.SolvedDB(self.path)
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,4)])
+        writer.store(goboard, 0, goboard.pt(4,5))
+        writer.store(goboard, 0, goboard.pt(4,5))
+        writer.flush()
+        self.assertEqual(os.path.getsize(self.path),
+                         len(solved_db.MAGIC) + solved_db.RECORD.size)
+        self.assertEqual(reader.lookup(goboard), (0, goboard.pt(4,5)))
+        writer.close()
+        reader.close()
+        self.assertEqual(len(solved_db.SolvedDB(self.path)), 1)
+
+    def test_exact_results(self):
+        db = solved_db.SolvedDB(self.path)
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,4)])
+        db.store(goboard, 0, goboard.pt(4,5))
+        self.assertIsNone(db.lookup(goboard, exact_only=True))
+        self.assertEqual(db.lookup(goboard), (0, goboard.pt(4,5)))
+        db.store(goboard, 1, goboard.pt(3,4), exact=True)
+        # not replaced by a result that is not exact
+        db.store(goboard, 0, goboard.pt(4,5))
+        db.close()
+        reader = solved_db.SolvedDB(self.path)
+        self.assertEqual(reader.lookup(goboard, exact_only=True),
+                         (1, goboard.pt(3,4)))
+        reader.close()
+
+    def test_old_format_converted(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,4)])
+        key, transform = goboard.canonical_key()
+        move = goboard.geometry.symmetries[transform][goboard.pt(4,5)]
+        with open(self.path, 'wb') as f:
+            f.write(solved_db.OLD_MAGIC +
+                    solved_db.OLD_RECORD.pack(key, 7, 0, move))
+        warning = io.StringIO()
+        with contextlib.redirect_stderr(warning):
+            db = solved_db.SolvedDB(self.path)
+        self.assertIn('converted 1 positions', warning.getvalue())
+        self.assertEqual(db.lookup(goboard), (0, goboard.pt(4,5)))
+        self.assertIsNone(db.lookup(goboard, exact_only=True))
+        db.store(goboard, 0, goboard.pt(4,5), exact=True)
+        db.close()
+        reader = solved_db.SolvedDB(self.path)
+        self.assertEqual(reader.lookup(goboard, exact_only=True),
+                         (0, goboard.pt(4,5)))
+        reader.close()
+
+    def test_invalid_file_copied_aside(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a database')
+        warning = io.StringIO()
+        with contextlib.redirect_stderr(warning):
+            db = solved_db.SolvedDB(self.path)
+        self.assertIn('started a new one', warning.getvalue())
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,4)])
+        db.store(goboard, 0, goboard.pt(4,5), exact=True)
+        db.close()
+        reader = solved_db.SolvedDB(self.path)
+        self.assertEqual(reader.lookup(goboard), (0, goboard.pt(4,5)))
+        reader.close()
+        invalid = self.path + solved_db.INVALID_SUFFIX
+        with open(invalid, 'rb') as f:
+            self.assertEqual(f.read(), b'not a database')
+        os.remove(invalid)
+
+    def test_solve_uses_db(self):
+        solved_db.open_db(self.path)
+        goboard = random_position(random.Random(2), 39)
+        first = alphabeta.solve(goboard, TranspositionTable())
+        solved_db.solved_db.flush()
+        solved_db.open_db(self.path)
+        self.assertEqual(alphabeta.solve(goboard, TranspositionTable()), first)
+        self.assertEqual(alphabeta.last_search.nodes, 0)
+        self.assertEqual(solved_db.solved_db.hits, 1)
+
+    def test_restricted_solve_not_exact(self):
+        solved_db.open_db(self.path)
+        goboard = random_position(random.Random(2), 39)
+        alphabeta.solve(goboard, TranspositionTable(),
+                        ordering=MoveOrdering(distance=2))
+        solved_db.solved_db.flush()
+        self.assertIsNone(solved_db.solved_db.lookup(goboard, exact_only=True))
+        # a solve of all moves does not take the result
+        alphabeta.solve(goboard, TranspositionTable())
+        self.assertGreater(alphabeta.last_search.nodes, 0)
+        self.assertIsNotNone(solved_db.solved_db.lookup(goboard,
+                                                        exact_only=True))
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()
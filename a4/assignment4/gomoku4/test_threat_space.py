@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+from board_util import BLACK, WHITE
+from simple_board import SimpleGoBoard
+from threat_space import find_vcf, find_vct, find_threat_win
+
+class ThreatSpaceTestCase(unittest.TestCase):
+    """Tests for threat_space.py"""
+
+    def test_double_four(self):
+        goboard = setup([(1,1), (1,2), (1,3), (2,4), (3,4), (4,4)],
+                        [(7,1), (7,3), (7,5), (6,7), (5,7), (6,2)], BLACK)
+        before = list(goboard.board)
+        line = find_vcf(goboard)
+        self.assertEqual(line[0], goboard.pt(1,4))
+        self.assertEqual(len(line), 3)
+        self.assertEqual(list(goboard.board), before)
+
+    def test_double_three_needs_vct(self):
+        goboard = setup([(4,3), (4,4), (2,5), (3,5)], [(1,1), (7,7), (1,7)], BLACK)
+        self.assertIsNone(find_vcf(goboard))
+        line = find_vct(goboard)
+        self.assertEqual(line[0], goboard.pt(4,5))
+        self.assertEqual(find_threat_win(goboard), line)
+
+    def test_opponent_five_comes_first(self):
+        goboard = setup([(1,1), (1,2), (1,3), (2,4), (3,4), (4,4)],
+                        [(7,1), (7,2), (7,3), (7,4), (6,2), (5,2)], BLACK)
+        self.assertEqual(find_vcf(goboard), None)
+        goboard.current_player = WHITE
+        self.assertEqual(find_vcf(goboard), [goboard.pt(7,5)])
+
+    def test_no_win(self):
+        goboard = setup([(4,4)], [(4,5)], BLACK)
+        self.assertIsNone(find_threat_win(goboard))
+
+"""Utility"""
+def setup(black, white, to_play):
+    goboard = SimpleGoBoard(7)
+    for row, col in black:
+        goboard.play_move_gomoku(goboard.pt(row, col), BLACK)
+    for row, col in white:
+        goboard.play_move_gomoku(goboard.pt(row, col), WHITE)
+    goboard.current_player = to_play
+    return goboard
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+import random
+from timeit import default_timer as timer
+from simple_board import SimpleGoBoard
+from test_alphabeta import play_line
+from time_manager import TimeManager, TIME_MARGIN
+from mcts import UCTSearch
+
+class TimeManagerTestCase(unittest.TestCase):
+    """Tests for time_manager.py"""
+
+    def test_forced_move(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(1,1), (2,2), (1,2), (3,3), (1,3), (4,4), (1,4)])
+        quiet = SimpleGoBoard(7)
+        play_line(quiet, [(4,4), (3,3), (4,3)])
+        manager = TimeManager(10)
+        self.assertLess(manager.budget(goboard), 0.1 * manager.budget(quiet))
+
+    def test_critical_position(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,2), (1,1), (4,3), (1,7), (4,4)])
+        quiet = SimpleGoBoard(7)
+        play_line(quiet, [(4,4), (3,3), (4,3)])
+        manager = TimeManager(10)
+        self.assertEqual(manager.budget(goboard), manager.usable_time())
+        self.assertLess(manager.budget(quiet), manager.budget(goboard))
+
+    def test_late_game(self):
+        early = SimpleGoBoard(7)
+        play_line(early, [(4,4), (3,3), (4,3)])
+        late = SimpleGoBoard(7)
+        # two colours alternating in columns of pairs, no line of five
+        coords = [(row, col) for col in range(1, 8) for row in range(1, 8)
+                  if (col + (row - 1) // 2) % 2 == 0][:20]
+        coords += [(row, col) for col in range(1, 8) for row in range(1, 8)
+                   if (col + (row - 1) // 2) % 2 == 1][:20]
+        moves = [move for pair in zip(coords[:20], coords[20:])
+                 for move in pair]
+        play_line(late, moves)
+        self.assertIsNone(late.get_pattern_moves())
+        manager = TimeManager(10)
+        self.assertLess(manager.budget(late), 0.5 * manager.budget(early))
+        self.assertGreater(manager.budget(late), 0)
+
+    def test_deadline_within_timelimit(self):
+        goboard = SimpleGoBoard(7)
+        for timelimit in [0.2, 1, 1.5, 60]:
+            manager = TimeManager(timelimit)
+            start = timer()
+            deadline = manager.deadline(goboard, start)
+            self.assertGreaterEqual(deadline, start)
+            self.assertLessEqual(deadline - start, timelimit - min(
+                TIME_MARGIN, 0.1 * timelimit) + 1e-9)
+            self.assertAlmostEqual(manager.last_budget, deadline - start)
+
+    def test_search_decided(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,4), (3,3), (4,3)])
+        search = UCTSearch(goboard, rng=random.Random(1))
+        search.run(simulations=1000)
+        stats = search.root_stats()
+        lead = stats[0][1] - stats[1][1]
+        self.assertGreater(lead, 0)
+        self.assertTrue(search.decided(lead - 1))
+        self.assertFalse(search.decided(lead))
+
+    def test_search_past_deadline(self):
+        goboard = SimpleGoBoard(7)
+        play_line(goboard, [(4,4), (3,3), (4,3)])
+        search = UCTSearch(goboard, rng=random.Random(1))
+        # one simulation, for a move to play
+        self.assertIsNotNone(search.run(deadline=timer() - 1.0))
+        self.assertEqual(search.simulations, 1)
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()
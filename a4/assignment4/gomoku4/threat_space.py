@@ -0,0 +1,218 @@
+"""
+threat_space.py
+
+Threat-space search: look for a win made only of threats, which the
+opponent has to answer every time.
+
+A four threatens to make five on the next move, so the opponent has to
+block it. A three threatens to make an open four, which can not be
+blocked, so the opponent has to block it or make a four of its own.
+A victory by continuous fours (VCF) uses only fours, a victory by
+continuous threats (VCT) uses fours and threes.
+Only the few moves that make or answer a threat are searched, so most
+tactical wins are found in a few hundred positions.
+
+A found win is a real win: every reply of the opponent that could stop
+a threat is searched. The search gives up when it runs out of depth,
+nodes or time, so not finding a win proves nothing.
+"""
+
+from itertools import combinations
+from timeit import default_timer as timer
+from board_util import GoBoardUtil
+from line_patterns import PatternTable
+from pattern_automaton import PatternAutomaton
+
+"""
+Classes of THREAT_PATTERN_LIST
+FIVE: moves that make five
+FOUR: moves that make a four
+THREE_DEFENCE: the empty points of the player's threes, where an
+               opponent stone can stop the open four
+THREE: moves that make a three, that is a move away from an open four
+"""
+FIVE = 0
+FOUR = 1
+THREE_DEFENCE = 2
+THREE = 3
+
+def _with_stones(length, num_stones):
+    """
+    All strings of length with num_stones 'x' and the rest '.'
+    """
+    for stones in combinations(range(length), num_stones):
+        yield ''.join('x' if i in stones else '.' for i in range(length))
+
+def _offsets(pattern, positions):
+    """
+    Offsets of the positions in pattern, counted from the end
+    """
+    return {len(pattern) - 1 - i for i in positions}
+
+def _dots(pattern):
+    return [i for i, c in enumerate(pattern) if c == '.']
+
+def _threat_pattern_list():
+    five, four, defence, three = {}, {}, {}, {}
+    for window in _with_stones(5, 4):
+        five[window] = _offsets(window, _dots(window))
+    for window in _with_stones(5, 3):
+        four[window] = _offsets(window, _dots(window))
+    for middle in _with_stones(4, 3):
+        pattern = '.' + middle + '.'
+        defence[pattern] = _offsets(pattern, _dots(pattern))
+    for middle in _with_stones(4, 2):
+        pattern = '.' + middle + '.'
+        three[pattern] = _offsets(pattern, _dots(pattern)[1:-1])
+    return [five, four, defence, three]
+
+"""
+Patterns in the format of simple_board.PATTERN_MOVES_LIST
+"""
+THREAT_PATTERN_LIST = _threat_pattern_list()
+THREAT_TABLE = PatternTable(THREAT_PATTERN_LIST)
+THREAT_AUTOMATON = PatternAutomaton(THREAT_PATTERN_LIST)
+
+"""
+Default limits of one search. VCT looks at more moves per node,
+so it gets fewer attacking moves.
+"""
+VCF_DEPTH = 20
+VCT_DEPTH = 6
+MAX_NODES = 2000
+
+class _OutOfBudget(Exception):
+    pass
+
+class ThreatSearch(object):
+    """
+    Threat-space search for the player to move on board.
+    use_threes: False for VCF, True for VCT
+    max_depth: the number of moves of the attacker
+    max_nodes, deadline: when to give up
+    The board is changed during the search, and put back before
+    search returns.
+    """
+    def __init__(self, board, use_threes, max_depth, max_nodes=MAX_NODES,
+                 deadline=None):
+        self.board = board
+        self.attacker = board.current_player
+        self.defender = GoBoardUtil.opponent(self.attacker)
+        self.use_threes = use_threes
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.deadline = deadline
+        self.nodes = 0
+        # hash -> the largest depth the position was searched to without a win
+        self.failed = {}
+
+    def search(self):
+        """
+        Returns a winning line, starting with the move to play, or None.
+        The line follows the first answer of the opponent at each step.
+        The depth is increased one move at a time, so short wins are
+        found before a long line uses up the nodes.
+        """
+        try:
+            for depth in range(1, self.max_depth + 1):
+                line = self._attack(depth)
+                if line is not None:
+                    return line
+        except _OutOfBudget:
+            pass
+        return None
+
+    def _threats(self, color):
+        return self.board.pattern_move_sets(THREAT_TABLE, THREAT_AUTOMATON,
+                                            color)
+
+    def _count_node(self):
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise _OutOfBudget()
+        if self.deadline is not None and self.nodes % 64 == 0 \
+            and timer() > self.deadline:
+            raise _OutOfBudget()
+
+    def _attack(self, depth):
+        """
+        The attacker is to move
+        """
+        self._count_node()
+        attack = self._threats(self.attacker)
+        if attack[FIVE]:
+            return [min(attack[FIVE])]
+        key = self.board.hash
+        if depth == 0 or self.failed.get(key, -1) >= depth:
+            return None
+        defence = self._threats(self.defender)
+        if defence[FIVE]:
+            if len(defence[FIVE]) > 1:
+                return None
+            # forced to block the four of the defender
+            moves = list(defence[FIVE])
+        else:
+            moves = sorted(attack[FOUR])
+            if self.use_threes:
+                moves += sorted(attack[THREE] - attack[FOUR])
+        for move in moves:
+            self.board.play_move_gomoku(move, self.attacker)
+            try:
+                line = self._defend(depth - 1)
+            finally:
+                self.board.undo_move()
+            if line is not None:
+                return [move] + line
+        self.failed[key] = depth
+        return None
+
+    def _defend(self, depth):
+        """
+        The defender is to move, after a move of the attacker
+        """
+        self._count_node()
+        defence = self._threats(self.defender)
+        if defence[FIVE]:
+            return None
+        attack = self._threats(self.attacker)
+        if attack[FIVE]:
+            # a four has to be blocked, nothing else helps
+            replies = sorted(attack[FIVE])
+        elif attack[THREE_DEFENCE] and self.use_threes:
+            # any other move lets the attacker make an open four
+            replies = sorted(attack[THREE_DEFENCE] | defence[FOUR])
+        else:
+            return None
+        line = None
+        for reply in replies:
+            self.board.play_move_gomoku(reply, self.defender)
+            try:
+                sub_line = self._attack(depth)
+            finally:
+                self.board.undo_move()
+            if sub_line is None:
+                return None
+            if line is None:
+                line = [reply] + sub_line
+        return line
+
+def find_vcf(board, max_depth=VCF_DEPTH, max_nodes=MAX_NODES, deadline=None):
+    """
+    A victory by continuous fours for the player to move, or None
+    """
+    return ThreatSearch(board, False, max_depth, max_nodes, deadline).search()
+
+def find_vct(board, max_depth=VCT_DEPTH, max_nodes=MAX_NODES, deadline=None):
+    """
+    A victory by continuous fours and threes for the player to move, or None
+    """
+    return ThreatSearch(board, True, max_depth, max_nodes, deadline).search()
+
+def find_threat_win(board, max_nodes=MAX_NODES, deadline=None):
+    """
+    Try VCF first, then VCT. Returns a winning line or None.
+    """
+    line = find_vcf(board, max_nodes=max_nodes, deadline=deadline)
+    if line is None:
+        line = find_vct(board, max_nodes=max_nodes, deadline=deadline)
+    return line
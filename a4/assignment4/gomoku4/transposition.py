@@ -0,0 +1,109 @@
+"""
+transposition.py
+
+Transposition table for the alphabeta solver.
+
+Positions are stored by their Zobrist hash in a fixed number of buckets
+of two entries each, so the memory used never grows past the cap given
+when the table is made. A full bucket keeps the more valuable entry:
+one from the current search before one from an older search, then the
+one with the larger depth, that is the more empty points and so the
+larger subtree behind it.
+"""
+
+"""
+Kinds of stored values.
+EXACT: the value of the position
+LOWER: the value is at least the stored value
+UPPER: the value is at most the stored value
+"""
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+"""
+Rough size of one entry in bytes: the key, the entry tuple and its
+items. Used to turn a memory cap into a number of entries.
+"""
+ENTRY_BYTES = 200
+
+DEFAULT_MEMORY_MB = 64
+
+class TranspositionTable(object):
+    """
+    entries hold (value, bound, best_move, depth, age)
+    hits, misses, stores and replacements count the calls since the
+    last clear.
+    """
+    def __init__(self, memory_mb=DEFAULT_MEMORY_MB):
+        self.resize(memory_mb)
+
+    def resize(self, memory_mb):
+        """
+        Set the memory cap, and clear the table
+        """
+        max_entries = max(2, int(memory_mb * 2**20) // ENTRY_BYTES)
+        num_buckets = 1
+        while num_buckets * 4 <= max_entries:
+            num_buckets *= 2
+        self.memory_mb = memory_mb
+        self.mask = num_buckets - 1
+        self.size = 2 * num_buckets
+        self.clear()
+
+    def clear(self):
+        self.keys = [None] * self.size
+        self.entries = [None] * self.size
+        self.age = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def new_search(self):
+        """
+        Called at the start of each solve, so entries of older
+        searches are replaced first.
+        """
+        self.age += 1
+
+    def lookup(self, key):
+        """
+        The entry of the position with hash key, or None
+        """
+        i = (key & self.mask) << 1
+        if self.keys[i] == key:
+            self.hits += 1
+            return self.entries[i]
+        if self.keys[i + 1] == key:
+            self.hits += 1
+            return self.entries[i + 1]
+        self.misses += 1
+        return None
+
+    def store(self, key, value, bound, best_move, depth):
+        i = (key & self.mask) << 1
+        if self.keys[i] != key and self.keys[i + 1] != key:
+            if self._worth(i + 1) < self._worth(i):
+                i += 1
+            if self.keys[i] is not None:
+                self.replacements += 1
+        elif self.keys[i] != key:
+            i += 1
+        self.keys[i] = key
+        self.entries[i] = (value, bound, best_move, depth, self.age)
+        self.stores += 1
+
+    def _worth(self, i):
+        entry = self.entries[i]
+        if entry is None:
+            return (-1, -1)
+        return (entry[4] == self.age, entry[3])
+
+    def __len__(self):
+        return self.size - self.keys.count(None)
+
+    def stats(self):
+        return {'entries': len(self), 'capacity': self.size,
+                'hits': self.hits, 'misses': self.misses,
+                'stores': self.stores, 'replacements': self.replacements}
@@ -0,0 +1,42 @@
+"""
+zobrist.py
+
+Zobrist keys for Gomoku positions.
+
+The key of a position is the XOR of one random 64 bit number for each
+stone on the board, plus one more number when WHITE is to play.
+Playing or taking back a stone changes the key with a single XOR.
+"""
+
+import random
+from board_util import BLACK, WHITE, coord_to_point
+
+class ZobristTable(object):
+    """
+    The random numbers for a board of a given size.
+    keys[color][point]: number for a stone of color on point
+    white_to_play: number added when WHITE is to play
+
+    The numbers only depend on the board size, so keys stay the same
+    from one run to the next and can be stored on disk.
+    """
+    def __init__(self, size):
+        rng = random.Random(size)
+        maxpoint = size * size + 3 * (size + 1)
+        self.keys = [[0] * maxpoint for _ in range(WHITE + 1)]
+        for row in range(1, size + 1):
+            for col in range(1, size + 1):
+                point = coord_to_point(row, col, size)
+                self.keys[BLACK][point] = rng.getrandbits(64)
+                self.keys[WHITE][point] = rng.getrandbits(64)
+        self.white_to_play = rng.getrandbits(64)
+
+_zobrist_tables = {}
+
+def zobrist_table(size):
+    """
+    The ZobristTable of the given size, shared by all boards of that size.
+    """
+    if size not in _zobrist_tables:
+        _zobrist_tables[size] = ZobristTable(size)
+    return _zobrist_tables[size]
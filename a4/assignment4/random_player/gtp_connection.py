@@ -333,8 +333,7 @@ class GtpConnection():
     
     def gogui_rules_final_result_cmd(self, args):
         game_end, winner = self.board.check_game_end_gomoku()
-        moves = self.board.get_empty_points()
-        board_full = (len(moves) == 0)
+        board_full = self.board.is_board_full()
         if board_full and not game_end:
             self.respond("draw")
             return
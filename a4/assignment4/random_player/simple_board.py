@@ -81,6 +81,9 @@ class SimpleGoBoard(object):
         self.WE = 1
         self.ko_recapture = None
         self.current_player = BLACK
+        self.winner = None
+        self.win_point = None
+        self.stone_count = 0
         self.maxpoint = size * size + 3 * (size + 1)
         self.board = np.full(self.maxpoint, BORDER, dtype = np.int32)
         self.liberty_of = np.full(self.maxpoint, NULLPOINT, dtype = np.int32)
@@ -93,6 +96,9 @@ class SimpleGoBoard(object):
         assert b.WE == self.WE
         b.ko_recapture = self.ko_recapture
         b.current_player = self.current_player
+        b.winner = self.winner
+        b.win_point = self.win_point
+        b.stone_count = self.stone_count
         assert b.maxpoint == self.maxpoint
         b.board = np.copy(self.board)
         return b
@@ -347,8 +353,25 @@ class SimpleGoBoard(object):
         if self.board[point] != EMPTY:
             return False
         self.board[point] = color
+        self.stone_count += 1
+        if self.winner is None and self.point_check_game_end_gomoku(point):
+            self.winner = color
+            self.win_point = point
         self.current_player = GoBoardUtil.opponent(color)
         return True
+
+    def undo_move_gomoku(self, point):
+        """
+            Take back the stone on point, for the game of gomoku.
+            Moves must be undone in the reverse order they were played.
+            """
+        assert is_black_white(self.board[point])
+        self.board[point] = EMPTY
+        self.stone_count -= 1
+        if point == self.win_point:
+            self.winner = None
+            self.win_point = None
+        self.current_player = GoBoardUtil.opponent(self.current_player)
         
     def _point_direction_check_connect_gomoko(self, point, shift):
         """
@@ -367,6 +390,8 @@ class SimpleGoBoard(object):
                     break
             else:
                 break
+        if count == 5:
+            return True
         d = -d
         p = point
         while True:
@@ -405,16 +430,15 @@ class SimpleGoBoard(object):
     def check_game_end_gomoku(self):
         """
             Check if the game ends for the game of Gomoku.
+            The winner is kept up to date by play_move_gomoku and
+            undo_move_gomoku, so this does not scan the board.
             """
-        white_points = where1d(self.board == WHITE)
-        black_points = where1d(self.board == BLACK)
-        
-        for point in white_points:
-            if self.point_check_game_end_gomoku(point):
-                return True, WHITE
-    
-        for point in black_points:
-            if self.point_check_game_end_gomoku(point):
-                return True, BLACK
-
+        if self.winner is not None:
+            return True, self.winner
         return False, None
+
+    def is_board_full(self):
+        """
+            Check if there are no empty points left on the board.
+            """
+        return self.stone_count == self.size * self.size